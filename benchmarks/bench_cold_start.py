@@ -0,0 +1,90 @@
+"""
+Cold start benchmark for the Lambda entry point.
+
+Each scenario runs in a fresh interpreter so module caches do not leak between
+samples, which is what a Lambda cold start looks like.
+
+Usage:
+    python benchmarks/bench_cold_start.py [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    # What the handler used to import at module level before the lazy init path.
+    "eager imports (baseline)": (
+        "import boto3, sqlalchemy, bs4, requests\n"
+        "import src.database.models, src.database.db_manager, src.scraper.main_scraper\n"
+    ),
+    "import handler": "import handler\n",
+    "handler + ETL(phases=['transform'])": (
+        "import handler\n"
+        "from config.settings import Settings\n"
+        "handler.ETL(Settings(), phases=['transform'])\n"
+    ),
+    "handler + ETL(phases=['export']) + S3 client": (
+        "import handler\n"
+        "from config.settings import Settings\n"
+        "handler.ETL(Settings(), phases=['export']).s3_client\n"
+    ),
+}
+
+TIMER = (
+    "import time\n"
+    "_start = time.perf_counter()\n"
+    "{body}"
+    "print(time.perf_counter() - _start)\n"
+)
+
+
+def time_scenario(body: str, runs: int) -> list:
+    """Run a snippet in fresh interpreters and return the elapsed seconds per run."""
+    samples = []
+    env = dict(os.environ, AWS_REGION=os.getenv("AWS_REGION", "us-east-1"))
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", TIMER.format(body=body)],
+            cwd=ROOT_DIR,
+            env=env,
+            check=True,
+            capture_output=True,
+            text=True,
+        ).stdout
+        samples.append(float(output.strip().splitlines()[-1]))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters per scenario")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = {}
+    for name, body in SCENARIOS.items():
+        samples = time_scenario(body, args.runs)
+        results[name] = {
+            "median_ms": round(statistics.median(samples) * 1000, 1),
+            "min_ms": round(min(samples) * 1000, 1),
+            "max_ms": round(max(samples) * 1000, 1),
+        }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f"{'scenario':<48} {'median':>9} {'min':>9} {'max':>9}")
+    for name, stats in results.items():
+        print(
+            f"{name:<48} {stats['median_ms']:>7.1f}ms {stats['min_ms']:>7.1f}ms {stats['max_ms']:>7.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Query count benchmark for reading buses with their overviews and images.
+
+Seeds an in-memory SQLite database and compares the lazy access pattern the
+transform stage used to rely on (iterating ``bus.overview`` and ``bus.images``
+on each ORM object) with ``DatabaseManager.iter_bus_records``, which eager
+loads children with one ``selectinload`` query per batch.
+
+Usage:
+    python benchmarks/bench_transform_queries.py [--buses 2000] [--images 8]
+"""
+import argparse
+import os
+import sys
+import time
+from sqlalchemy import event
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.database.db_manager import DatabaseManager  # noqa: E402
+from src.database.etl import ETL  # noqa: E402
+from src.database.models import Bus  # noqa: E402
+from config.settings import Settings  # noqa: E402
+
+
+def seed(db_manager: DatabaseManager, buses: int, images: int) -> None:
+    """Insert buses, one overview per bus and ``images`` images per bus."""
+    urls = [f"https://example.com/listings/bus-{i}/" for i in range(buses)]
+    db_manager.upsert_buses([{"title": f"Bus {i}", "make": "Ford", "source_url": url} for i, url in enumerate(urls)])
+    bus_ids = db_manager.get_bus_ids(urls)
+    db_manager.replace_bus_children(
+        overviews=[{"bus_id": bus_id, "mdesc": "Clean bus", "specs": "{}"} for bus_id in bus_ids.values()],
+        images=[
+            {"bus_id": bus_id, "url": f"{url}{idx}.jpg", "image_index": idx}
+            for url, bus_id in bus_ids.items()
+            for idx in range(images)
+        ],
+    )
+
+
+def lazy_children(db_manager: DatabaseManager) -> int:
+    """Touch overview and images on plain ORM objects, as the old transform did."""
+    session = db_manager.Session()
+    try:
+        rows = 0
+        for bus in session.query(Bus).all():
+            rows += len(bus.overview) + len(bus.images)
+        return rows
+    finally:
+        session.close()
+
+
+def eager_records(db_manager: DatabaseManager) -> int:
+    """Read records through the eager loading reader and run them through transform."""
+    etl = ETL(Settings(), phases=["transform"])
+    data = etl.transform(db_manager.iter_bus_records())
+    return len(data["overview"]) + len(data["images"])
+
+
+def measure(db_manager: DatabaseManager, func):
+    statements = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(db_manager.engine, "before_cursor_execute", count)
+    start = time.perf_counter()
+    rows = func(db_manager)
+    elapsed = time.perf_counter() - start
+    event.remove(db_manager.engine, "before_cursor_execute", count)
+    return rows, len(statements), elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--buses", type=int, default=2000, help="Number of buses to seed")
+    parser.add_argument("--images", type=int, default=8, help="Images per bus")
+    args = parser.parse_args()
+
+    db_manager = DatabaseManager("sqlite://")
+    seed(db_manager, args.buses, args.images)
+
+    print(f"{'strategy':<24} {'child rows':>10} {'queries':>8} {'queries/bus':>12} {'time':>9}")
+    for name, func in (("lazy relationships", lazy_children), ("iter_bus_records", eager_records)):
+        rows, queries, elapsed = measure(db_manager, func)
+        print(f"{name:<24} {rows:>10} {queries:>8} {queries / args.buses:>12.3f} {elapsed * 1000:>7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
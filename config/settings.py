@@ -16,14 +16,130 @@ class Settings:
     DB_NAME = os.getenv("DB_NAME")
     DB_USER = os.getenv("DB_USER")
     DB_PASSWORD = os.getenv("DB_PASSWORD")
+    # Full SQLAlchemy URL; overrides the DB_* variables when set
+    # (e.g. "sqlite:///buses.db" or "sqlite://" for an in-memory database)
+    DATABASE_URL = os.getenv("DATABASE_URL")
+
+    # Sources scraped in each run (names registered in src/scraper/scheduler.py)
+    SOURCES = [name.strip() for name in os.getenv("SOURCES", "central_states").split(",") if name.strip()]
+    # Concurrent connections and request rate allowed per source host
+    SOURCE_MAX_WORKERS = int(os.getenv("SOURCE_MAX_WORKERS", 5))
+    SOURCE_REQUESTS_PER_SECOND = float(os.getenv("SOURCE_REQUESTS_PER_SECOND", 5))
+    # How detail URLs are discovered: "pagination" walks the listing pages, "sitemap"
+    # reads sitemaps or the listing feed (falling back to pagination) and, when the
+    # load phase runs, skips listings unchanged since they were last loaded
+    DISCOVERY_MODE = os.getenv("DISCOVERY_MODE", "pagination")
+    # BeautifulSoup parser backend ("html.parser", or "lxml" when installed)
+    HTML_PARSER = os.getenv("HTML_PARSER", "html.parser")
+
+    # Circuit breaker per source host: stop requesting after this many failures in a row,
+    # or once more than CIRCUIT_MAX_ERROR_RATE of at least CIRCUIT_MIN_REQUESTS failed
+    CIRCUIT_MAX_CONSECUTIVE_FAILURES = int(os.getenv("CIRCUIT_MAX_CONSECUTIVE_FAILURES", 5))
+    CIRCUIT_MAX_ERROR_RATE = float(os.getenv("CIRCUIT_MAX_ERROR_RATE", 0.5))
+    CIRCUIT_MIN_REQUESTS = int(os.getenv("CIRCUIT_MIN_REQUESTS", 20))
+    # Failed requests allowed per run across all hosts (0 = unlimited)
+    RUN_MAX_FAILED_REQUESTS = int(os.getenv("RUN_MAX_FAILED_REQUESTS", 100))
+    # Listings left unfetched when a breaker opens, resumed by the next run
+    FRONTIER_CHECKPOINT_PATH = os.getenv("FRONTIER_CHECKPOINT_PATH", "/tmp/frontier.json")
+    FRONTIER_CHECKPOINT_S3_KEY = os.getenv("FRONTIER_CHECKPOINT_S3_KEY", "cache/frontier.json")
+    # Detail fetches allowed per run, across all sources (0 = unlimited). Listings are
+    # fetched most-likely-changed first; those left over are checkpointed like above
+    CRAWL_REQUEST_BUDGET = int(os.getenv("CRAWL_REQUEST_BUDGET", 0))
+    # Seconds of scraping allowed per run, counted from the start of discovery (0 = unlimited)
+    CRAWL_TIME_BUDGET_SECONDS = float(os.getenv("CRAWL_TIME_BUDGET_SECONDS", 0))
+
+    # Detail page cache (content hash -> extracted details)
+    DETAIL_CACHE_ENABLED = os.getenv("DETAIL_CACHE_ENABLED", "true").lower() in ("true", "1", "yes")
+    DETAIL_CACHE_PATH = os.getenv("DETAIL_CACHE_PATH", "/tmp/detail_cache.json")
+    DETAIL_CACHE_MAX_ENTRIES = int(os.getenv("DETAIL_CACHE_MAX_ENTRIES", 5000))
+    # S3 key the cache file is persisted to between cold starts (requires S3_BUCKET)
+    DETAIL_CACHE_S3_KEY = os.getenv("DETAIL_CACHE_S3_KEY", "cache/detail_cache.json")
+
+    # Raw detail page archive for backfills: "" (off), "local" or "s3"
+    RAW_ARCHIVE = os.getenv("RAW_ARCHIVE", "").lower()
+    RAW_ARCHIVE_PATH = os.getenv("RAW_ARCHIVE_PATH", "/tmp/raw_pages")
+    RAW_ARCHIVE_S3_PREFIX = os.getenv("RAW_ARCHIVE_S3_PREFIX", "raw/")
+    # Re-extract the archived pages instead of scraping, with this many worker processes
+    BACKFILL = os.getenv("BACKFILL", "false").lower() in ("true", "1", "yes")
+    BACKFILL_PROCESSES = int(os.getenv("BACKFILL_PROCESSES", os.cpu_count() or 1))
+
+    # Image pipeline (download gallery images and store them in S3)
+    IMAGE_PIPELINE_ENABLED = os.getenv("IMAGE_PIPELINE_ENABLED", "false").lower() in ("true", "1", "yes")
+    IMAGE_S3_PREFIX = os.getenv("IMAGE_S3_PREFIX", "images/")
+    IMAGE_MAX_WORKERS = int(os.getenv("IMAGE_MAX_WORKERS", 8))
+    IMAGE_KEEP_LARGEST = os.getenv("IMAGE_KEEP_LARGEST", "true").lower() in ("true", "1", "yes")
+
+    # Duplicate listing detection: minimum similarity of two listings of the same bus, and
+    # whether detail pages of known duplicates are skipped on later runs
+    DEDUP_THRESHOLD = float(os.getenv("DEDUP_THRESHOLD", 0.85))
+    DEDUP_SKIP_DUPLICATE_FETCHES = os.getenv("DEDUP_SKIP_DUPLICATE_FETCHES", "false").lower() in ("true", "1", "yes")
+
+    # Store buses_overview specs and features as one blob compressed against a shared
+    # dictionary of spec keys and values instead of two JSON columns. Off by default:
+    # packed rows leave the specs and features columns NULL for SQL readers
+    PACK_OVERVIEW_SPECS = os.getenv("PACK_OVERVIEW_SPECS", "false").lower() in ("true", "1", "yes")
+
+    # Seconds read-side facet counts are served from memory before checking for a newer ETL run
+    FACET_CACHE_TTL = float(os.getenv("FACET_CACHE_TTL", 60))
+
+    # Also export the buses as Parquet with typed columns (requires pyarrow)
+    EXPORT_PARQUET = os.getenv("EXPORT_PARQUET", "false").lower() in ("true", "1", "yes")
+
+    # S3 prefix of the run manifests uploaded with each export
+    RUN_MANIFEST_S3_PREFIX = os.getenv("RUN_MANIFEST_S3_PREFIX", "runs/")
+    # Local directory the export phase writes to instead of S3 (used by the CLI)
+    OUTPUT_DIR = os.getenv("OUTPUT_DIR")
+    # Scrape and transform without writing anything: the detail caches and frontier
+    # checkpoints are read but not saved (set by the CLI's --dry-run)
+    DRY_RUN = os.getenv("DRY_RUN", "false").lower() in ("true", "1", "yes")
+
+    # Opt-in profiling (also enabled by {"profile": true} in the Lambda event): cProfile of
+    # the scrape and load stages, sampled stacks of all threads and tracemalloc allocation sites
+    PROFILE = os.getenv("PROFILE", "false").lower() in ("true", "1", "yes")
+    PROFILE_SAMPLE_INTERVAL = float(os.getenv("PROFILE_SAMPLE_INTERVAL", 0.01))
+    PROFILE_ALLOCATIONS = os.getenv("PROFILE_ALLOCATIONS", "true").lower() in ("true", "1", "yes")
+    # Profiles go to PROFILE_OUTPUT_DIR when set, else to S3 under PROFILE_S3_PREFIX, else /tmp/profiles
+    PROFILE_OUTPUT_DIR = os.getenv("PROFILE_OUTPUT_DIR")
+    PROFILE_S3_PREFIX = os.getenv("PROFILE_S3_PREFIX", "profiles/")
 
     # Debug Mode
     DEBUG = os.getenv("DEBUG", "false").lower() in ("true", "1", "yes")
 
-    @staticmethod
-    def validate():
-        """Validate required environment variables."""
-        required_env_vars = ["S3_BUCKET", "DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"]
+    # Environment variables required by each ETL phase
+    PHASE_ENV_VARS = {
+        "extract": [],
+        "transform": [],
+        "load": ["DB_HOST", "DB_NAME", "DB_USER", "DB_PASSWORD"],
+        "export": ["S3_BUCKET"],
+    }
+
+    def validate(self, phases=None, has_data=False):
+        """
+        Validate required environment variables.
+
+        Settings overridden on this instance (e.g. the CLI's ``--dry-run`` turning the
+        image pipeline off) are taken into account.
+
+        Args:
+            phases (Optional[Iterable[str]]): ETL phases that will run. Only the variables
+                those phases need are checked; all phases are assumed when omitted.
+            has_data (bool): Whether transformed data is passed in. Without it, an export
+                that neither extracts nor loads reads the buses from the database.
+        """
+        phases = list(phases or self.PHASE_ENV_VARS.keys())
+        if "export" in phases and not has_data and not {"extract", "load"} & set(phases):
+            phases.append("load")
+        required_env_vars = []
+        for phase in phases:
+            for var in self.PHASE_ENV_VARS.get(phase, []):
+                if var.startswith("DB_") and os.getenv("DATABASE_URL"):
+                    continue
+                if var == "S3_BUCKET" and phase == "export" and os.getenv("OUTPUT_DIR"):
+                    continue
+                if var not in required_env_vars:
+                    required_env_vars.append(var)
+        if self.IMAGE_PIPELINE_ENABLED and "transform" in phases and "S3_BUCKET" not in required_env_vars:
+            required_env_vars.append("S3_BUCKET")
         missing_vars = [var for var in required_env_vars if not os.getenv(var)]
 
         if missing_vars:
@@ -32,9 +148,22 @@ class Settings:
                 "Ensure these variables are set in your environment or Lambda configuration."
             )
 
+    def get_database_url(self):
+        """
+        Get the SQLAlchemy database URL.
+
+        Returns:
+            str: DATABASE_URL when set, otherwise a MySQL URL built from the DB_* variables.
+        """
+        if self.DATABASE_URL:
+            return self.DATABASE_URL
+        return (
+            f"mysql+pymysql://{self.DB_USER}:{self.DB_PASSWORD}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
+        )
+
     def __repr__(self):
         return (
             f"Settings(BASE_URL={self.BASE_URL}, DB_HOST={self.DB_HOST}, DB_PORT={self.DB_PORT}, "
             f"DB_NAME={self.DB_NAME}, DB_USER={self.DB_USER}, AWS_REGION={self.AWS_REGION}, "
-            f"S3_BUCKET_NAME={self.S3_BUCKET_NAME}, DEBUG={self.DEBUG})"
+            f"S3_BUCKET_NAME={self.S3_BUCKET_NAME}, SOURCES={self.SOURCES}, DEBUG={self.DEBUG})"
         )
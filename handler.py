@@ -1,8 +1,13 @@
 import json
 import logging
-from src.database.etl import ETL
+from src.database.etl import ETL, PHASES
+from src.runtime import RuntimeContext
 from config.settings import Settings
 
+# Created once per container; warm invocations reuse its database engine, S3 client
+# and HTTP connection pools
+RUNTIME = RuntimeContext()
+
 def initialize_logger():
     """Initialize the logger for CloudWatch."""
     logger = logging.getLogger()
@@ -24,41 +29,52 @@ def lambda_handler(event, context):
     logger = initialize_logger()
     logger.info("Lambda function invoked.")
 
+    etl = None
     try:
-        settings = Settings()
-        settings.validate()  # Asegurarse de validar las configuraciones
-
-        etl = ETL(settings)
+        health = RUNTIME.check_health()
+        if health:
+            logger.info(f"Reused clients: {health}")
+        if (event or {}).get("health_check"):
+            # Warm-up or monitoring ping: report the reused clients without running the ETL
+            return {
+                "statusCode": 200,
+                "body": json.dumps({"invocations": RUNTIME.invocations, "databases": health})
+            }
 
-        # Step 1: Extract data
-        logger.info("Starting extraction phase.")
-        extracted_data = etl.extract()
+        phases = (event or {}).get("phases") or PHASES
+        settings = Settings()
+        settings.validate(phases, has_data=(event or {}).get("data") is not None)  # Asegurarse de validar las configuraciones
 
-        # Step 2: Transform data
-        logger.info("Starting transformation phase.")
-        transformed_data = etl.transform(extracted_data)
+        # Profiling can be switched on per invocation without redeploying
+        if (event or {}).get("profile"):
+            settings.PROFILE = True
 
-        # Step 3: Load data into the database
-        logger.info("Starting loading phase.")
-        etl.load(transformed_data)
+        etl = ETL(settings, phases=phases, runtime=RUNTIME)
 
-        # Step 4: Always upload data to S3
-        logger.info("Uploading transformed data to S3.")
-        etl.load_to_s3(
-            data=transformed_data,
-            bucket_name=settings.S3_BUCKET_NAME,
-            key="scraped_data.json"
-        )
+        # Run only the requested phases (extract, transform, load, export)
+        logger.info(f"Running ETL phases: {', '.join(phases)}.")
+        etl.run(data=(event or {}).get("data"))
 
-        logger.info("ETL process completed successfully.")
+        if etl.manifest.status == "partial":
+            message = "ETL process completed partially: at least one source failed; see the run's errors."
+        elif etl.manifest.status == "circuit_open":
+            message = "ETL process stopped early: a source host is failing; unfetched listings were checkpointed."
+        elif etl.manifest.status == "budget_exhausted":
+            message = "ETL process stopped at its crawl budget; unfetched listings were checkpointed."
+        else:
+            message = "ETL process completed successfully."
+        logger.info(message)
         return {
             "statusCode": 200,
-            "body": json.dumps({"message": "ETL process completed successfully."})
+            "body": json.dumps({"message": message, "run": etl.manifest.summary()})
         }
 
     except Exception as e:
         logger.error(f"Unhandled error: {e}")
+        body = {"error": str(e)}
+        if etl is not None:
+            body["run"] = etl.manifest.summary()
         return {
             "statusCode": 500,
-            "body": json.dumps({"error": str(e)})
-        }
\ No newline at end of file
+            "body": json.dumps(body)
+        }
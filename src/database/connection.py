@@ -1,20 +1,48 @@
+from typing import Optional
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
 from config.settings import Settings
 import logging
 
+def create_db_engine(database_url: str, **kwargs):
+    """
+    Create a SQLAlchemy engine with backend-specific options.
+
+    MySQL engines recycle idle connections. SQLite engines may be shared across
+    threads, and in-memory databases use a single static connection so every
+    session sees the same data.
+
+    Args:
+        database_url (str): SQLAlchemy database URL, e.g. ``mysql+pymysql://...``,
+            ``sqlite:///buses.db`` or ``sqlite://`` for an in-memory database.
+        **kwargs: Extra keyword arguments passed to ``create_engine``.
+
+    Returns:
+        Engine: The configured SQLAlchemy engine.
+    """
+    url = make_url(database_url)
+    if url.get_backend_name() == "sqlite":
+        connect_args = kwargs.pop("connect_args", {})
+        connect_args.setdefault("check_same_thread", False)
+        if url.database in (None, "", ":memory:"):
+            kwargs.setdefault("poolclass", StaticPool)
+        return create_engine(url, connect_args=connect_args, **kwargs)
+
+    kwargs.setdefault("pool_recycle", 3600)  # Opcional: para manejar conexiones inactivas
+    return create_engine(url, **kwargs)
+
 class DatabaseConnection:
     """
-    Handles the connection to the MySQL database using SQLAlchemy.
+    Handles the connection to the database using SQLAlchemy.
     """
 
-    def __init__(self):
+    def __init__(self, database_url: Optional[str] = None):
         settings = Settings()
         self.logger = logging.getLogger(__name__)
         try:
-            self.engine = create_engine(
-                f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}"
-            )
+            self.engine = create_db_engine(database_url or settings.get_database_url())
             self.Session = sessionmaker(bind=self.engine)
             self.logger.info("Database engine successfully created.")
         except Exception as e:
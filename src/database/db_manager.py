@@ -1,13 +1,79 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-from .models import Base, Bus, BusOverview, BusImage
+import enum
+import json
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import Enum, delete, distinct, func, insert, inspect, or_, select, text, update
+from sqlalchemy.dialects import mysql, sqlite
+from sqlalchemy.orm import selectinload, sessionmaker
+from .connection import create_db_engine
+from .models import (
+    Base, Bus, BusChange, BusFacetCount, BusOverview, BusImage, BusSearchTerm, ScrapeRun, representative_listings,
+)
+from .dedup import DEFAULT_THRESHOLD, Listing, cluster_listings, image_hash
+from .search_index import document_terms
+from .spec_storage import overview_specs, pack_overview_row, pack_specs
+from src.scraper.normalize import parse_integer, parse_price, parse_state, parse_year
+from src.scraper.records import BusRecord
 from config.settings import Settings
 import logging
 
+# Number of rows sent per bulk statement
+BULK_BATCH_SIZE = 500
+
+# Columns derived from a scraped column of the buses table, with their parser: typed
+# copies of year and price for range filters, and the US state of the location
+DERIVED_BUS_COLUMNS = {
+    "year_number": ("year", parse_year),
+    "price_amount": ("price", parse_price),
+    "state": ("location", parse_state),
+}
+# Bus columns never recorded in bus_changes
+UNTRACKED_COLUMNS = ("id", "source_url", "created_at", "updated_at", "cluster_id") + tuple(DERIVED_BUS_COLUMNS)
+# Fields recorded for buses seen for the first time, so their history starts at the first load
+INITIAL_TRACKED_COLUMNS = ("price",)
+# Parsers that bring stored and incoming values to the same form before they are compared,
+# so "45000.0" stored before normalization and "45000" are not recorded as a change
+HISTORY_PARSERS = {
+    "price": parse_price,
+    "year": parse_year,
+    "mileage": parse_integer,
+    "passengers": parse_integer,
+}
+
+# Bus columns counted as search facets
+FACET_COLUMNS = ("make", "year", "us_region", "airconditioning", "wheelchair")
+# Upper bounds of the price facet buckets; prices above the last bound share one bucket
+PRICE_BUCKETS = (25000, 50000, 75000, 100000)
+
+def price_bucket(price) -> Optional[str]:
+    """
+    Name the price facet bucket of a stored price.
+
+    Args:
+        price: Price as stored in buses.price, e.g. ``"45000.0"``.
+
+    Returns:
+        Optional[str]: Bucket such as ``"25000-50000"`` or ``"100000+"``, or None for
+            missing, zero or unparseable prices.
+    """
+    try:
+        amount = float(price)
+    except (TypeError, ValueError):
+        return None
+    if amount <= 0:
+        return None
+    lower = 0
+    for upper in PRICE_BUCKETS:
+        if amount < upper:
+            return f"{lower}-{upper}"
+        lower = upper
+    return f"{lower}+"
+
 class DatabaseManager:
     """Handles database operations using SQLAlchemy."""
 
-    def __init__(self):
+    def __init__(self, database_url: Optional[str] = None):
         settings = Settings()
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
@@ -18,18 +84,110 @@ class DatabaseManager:
             self.logger.addHandler(handler)
 
         try:
-            self.engine = create_engine(
-                f"mysql+pymysql://{settings.DB_USER}:{settings.DB_PASSWORD}@{settings.DB_HOST}:{settings.DB_PORT}/{settings.DB_NAME}",
-                pool_recycle=3600  # Opcional: para manejar conexiones inactivas
-            )
-            self.logger.info("Database engine created successfully.")
+            self.pack_overview_specs = settings.PACK_OVERVIEW_SPECS
+            self.engine = create_db_engine(database_url or settings.get_database_url())
+            self.logger.info(f"Database engine created successfully ({self.engine.dialect.name}).")
             self.logger.info("Creating tables if they do not exist.")
             Base.metadata.create_all(self.engine)
+            added = self.add_missing_columns()
             self.Session = sessionmaker(bind=self.engine)
+            if any(f"buses.{name}" in added for name in DERIVED_BUS_COLUMNS):
+                self.fill_derived_bus_columns()
         except Exception as e:
             self.logger.error(f"Error initializing DatabaseManager: {e}")
             raise
 
+    def add_missing_columns(self) -> List[str]:
+        """
+        Add model columns that tables created by an older version do not have yet.
+
+        ``create_all`` only creates missing tables, so columns added to existing tables
+        (``buses.cluster_id``, ``buses_overview.specs_packed``, ``buses_images.storage_key``)
+        are added here with ``ALTER TABLE``, together with their indexes. Only nullable
+        columns are added; existing rows get NULL.
+
+        Returns:
+            List[str]: ``table.column`` names that were added.
+        """
+        inspector = inspect(self.engine)
+        preparer = self.engine.dialect.identifier_preparer
+        added = []
+        with self.engine.begin() as connection:
+            for table in Base.metadata.sorted_tables:
+                existing = {column["name"] for column in inspector.get_columns(table.name)}
+                for column in table.columns:
+                    if column.name in existing:
+                        continue
+                    if not column.nullable:
+                        self.logger.warning(f"Cannot add NOT NULL column {table.name}.{column.name}; "
+                                            "migrate it manually.")
+                        continue
+                    column_type = column.type.compile(dialect=self.engine.dialect)
+                    self.logger.info(f"Adding column {table.name}.{column.name} ({column_type}).")
+                    connection.execute(text(
+                        f"ALTER TABLE {preparer.format_table(table)} "
+                        f"ADD COLUMN {preparer.format_column(column)} {column_type}"
+                    ))
+                    for index in table.indexes:
+                        if column.name in index.columns.keys():
+                            index.create(connection, checkfirst=True)
+                    added.append(f"{table.name}.{column.name}")
+        return added
+
+    def fill_derived_bus_columns(self) -> int:
+        """
+        Fill ``year_number``, ``price_amount`` and ``state`` of buses stored before those
+        columns existed.
+
+        Returns:
+            int: Number of buses updated.
+        """
+        columns = Bus.__table__.columns
+        sources = [source for source, _ in DERIVED_BUS_COLUMNS.values()]
+        pending = or_(*[
+            columns[derived].is_(None) & columns[source].isnot(None)
+            for derived, (source, _) in DERIVED_BUS_COLUMNS.items()
+        ])
+        session = self.Session()
+        try:
+            rows = session.execute(select(Bus.id, *[columns[source] for source in sources]).where(pending)).all()
+            updates = [{"id": row[0], **self._derived_bus_values(dict(zip(sources, row[1:])))} for row in rows]
+            for start in range(0, len(updates), BULK_BATCH_SIZE):
+                session.execute(update(Bus), updates[start:start + BULK_BATCH_SIZE])
+            session.commit()
+            self.logger.info(f"Filled the derived columns of {len(updates)} buses.")
+            return len(updates)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error filling derived bus columns: {e}")
+            raise e
+        finally:
+            session.close()
+
+    @staticmethod
+    def _derived_bus_values(bus_data: dict) -> dict:
+        """Derived column values for the scraped columns present in bus_data."""
+        return {
+            typed: parser(bus_data[source])
+            for typed, (source, parser) in DERIVED_BUS_COLUMNS.items()
+            if source in bus_data
+        }
+
+    def ping(self) -> bool:
+        """
+        Check that the database answers a trivial query.
+
+        Returns:
+            bool: True if ``SELECT 1`` succeeded.
+        """
+        try:
+            with self.engine.connect() as connection:
+                connection.execute(text("SELECT 1"))
+            return True
+        except Exception as e:
+            self.logger.warning(f"Database ping failed: {e}")
+            return False
+
     def insert_or_update_bus(self, bus_data: dict):
         """
         Insert a new bus or update an existing one based on source_url.
@@ -47,11 +205,12 @@ class DatabaseManager:
                 self.logger.info(f"Updating existing bus with source_url: {bus_data['source_url']}")
                 # Excluir 'id' si está presente en bus_data
                 bus_data.pop("id", None)
+                bus_data.update(self._derived_bus_values(bus_data))
                 for key, value in bus_data.items():
                     setattr(existing_bus, key, value)
             else:
                 self.logger.info(f"Inserting new bus with source_url: {bus_data['source_url']}")
-                new_bus = Bus(**bus_data)
+                new_bus = Bus(**bus_data, **self._derived_bus_values(bus_data))
                 session.add(new_bus)
             session.commit()
             self.logger.info(f"Bus with source_url '{bus_data['source_url']}' processed successfully.")
@@ -63,6 +222,679 @@ class DatabaseManager:
             session.close()
             self.logger.info("Database session closed.")
 
+    def upsert_buses(self, buses: list, track_changes: bool = True):
+        """
+        Insert or update buses in bulk, matching existing rows on source_url.
+
+        Uses ``INSERT ... ON DUPLICATE KEY UPDATE`` on MySQL and
+        ``INSERT ... ON CONFLICT DO UPDATE`` on SQLite. Other backends fall back to
+        ``insert_or_update_bus`` row by row, without change tracking.
+
+        Args:
+            buses (list): List of dictionaries containing bus data.
+            track_changes (bool): Append the fields that differ from the stored rows
+                to bus_changes, in the same transaction.
+
+        Returns:
+            Optional[dict]: Number of buses ``inserted``, ``updated`` and ``unchanged``
+                (without change tracking every existing bus counts as updated), or None
+                on the row-by-row fallback.
+        """
+        if not buses:
+            self.logger.warning("No buses provided for upsert. Skipping.")
+            return {"inserted": 0, "updated": 0, "unchanged": 0}
+
+        dialect = self.engine.dialect.name
+        if dialect not in ("mysql", "sqlite"):
+            for bus_data in buses:
+                self.insert_or_update_bus(bus_data)
+            return None
+
+        now = datetime.utcnow()
+        rows = [self._prepare_bus_row(bus_data, now) for bus_data in buses]
+        session = self.Session()
+        try:
+            if track_changes:
+                changes, existing = self._diff_bus_rows(session, rows, now)
+                changed = {change["source_url"] for change in changes if change["bus_id"] is not None}
+            else:
+                changes = []
+                existing = changed = self._stored_source_urls(session, [row["source_url"] for row in rows])
+            incoming = {row["source_url"] for row in rows}
+            counts = {
+                "inserted": len(incoming - existing),
+                "updated": len(changed),
+                "unchanged": len(existing - changed),
+            }
+
+            # Group rows by their column set so each statement has a uniform shape
+            rows_by_columns = {}
+            for row in rows:
+                rows_by_columns.setdefault(tuple(sorted(row)), []).append(row)
+
+            for columns, column_rows in rows_by_columns.items():
+                update_columns = [col for col in columns if col not in ("source_url", "created_at")]
+                for start in range(0, len(column_rows), BULK_BATCH_SIZE):
+                    batch = column_rows[start:start + BULK_BATCH_SIZE]
+                    if dialect == "mysql":
+                        stmt = mysql.insert(Bus)
+                        stmt = stmt.on_duplicate_key_update({col: stmt.inserted[col] for col in update_columns})
+                    else:
+                        stmt = sqlite.insert(Bus)
+                        stmt = stmt.on_conflict_do_update(
+                            index_elements=["source_url"],
+                            set_={col: stmt.excluded[col] for col in update_columns},
+                        )
+                    session.execute(stmt, batch)
+            if changes:
+                self._insert_changes(session, changes)
+            session.commit()
+            self.logger.info(
+                f"Upserted {len(rows)} buses into table buses ({counts['inserted']} inserted, "
+                f"{counts['updated']} updated, {len(changes)} field changes)."
+            )
+            return counts
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error upserting buses: {e}")
+            raise e
+        finally:
+            session.close()
+            self.logger.info("Database session closed.")
+
+    @staticmethod
+    def _history_value(value) -> Optional[str]:
+        """Render a column value the way bus_changes stores it."""
+        if value is None:
+            return None
+        if isinstance(value, enum.Enum):
+            return value.name
+        if isinstance(value, bool):
+            return "1" if value else "0"
+        return str(value)
+
+    @staticmethod
+    def _same_value(name: str, old_value: Optional[str], new_value: Optional[str]) -> bool:
+        """Whether two history values of a column are equal once both are normalized."""
+        if old_value == new_value:
+            return True
+        parser = HISTORY_PARSERS.get(name)
+        if parser is None or old_value is None or new_value is None:
+            return False
+        old_parsed, new_parsed = parser(old_value), parser(new_value)
+        return old_parsed is not None and old_parsed == new_parsed
+
+    @staticmethod
+    def _stored_source_urls(session, source_urls: List[str]) -> Set[str]:
+        """The subset of source_urls that already have a row in buses."""
+        stored = set()
+        for start in range(0, len(source_urls), BULK_BATCH_SIZE):
+            batch = source_urls[start:start + BULK_BATCH_SIZE]
+            stored.update(session.scalars(select(Bus.source_url).where(Bus.source_url.in_(batch))))
+        return stored
+
+    def _diff_bus_rows(self, session, rows: List[dict], now: datetime) -> Tuple[List[dict], Set[str]]:
+        """
+        Compare incoming bus rows with the stored ones and list the changed fields.
+
+        Stored rows are fetched in batches by source_url and compared in memory, so
+        the history costs one SELECT per batch and one insert per actual change.
+
+        Returns:
+            Tuple[List[dict], Set[str]]: The changes, and the source_urls already stored.
+        """
+        columns = Bus.__table__.columns
+        incoming_columns = sorted(
+            {key for row in rows for key in row if key in columns and key not in UNTRACKED_COLUMNS}
+        )
+        selected = [Bus.id, Bus.source_url] + [columns[name] for name in incoming_columns]
+        source_urls = [row["source_url"] for row in rows]
+        current = {}
+        for start in range(0, len(source_urls), BULK_BATCH_SIZE):
+            batch = source_urls[start:start + BULK_BATCH_SIZE]
+            for stored in session.execute(select(*selected).where(Bus.source_url.in_(batch))):
+                current[stored.source_url] = stored._mapping
+
+        changes = []
+        for row in rows:
+            stored = current.get(row["source_url"])
+            if stored is None:
+                fields = [name for name in INITIAL_TRACKED_COLUMNS if name in row]
+                old_values = {}
+                bus_id = None
+            else:
+                fields = [name for name in incoming_columns if name in row]
+                old_values = {name: self._history_value(stored[name]) for name in fields}
+                bus_id = stored["id"]
+            for name in fields:
+                old_value = old_values.get(name)
+                new_value = self._history_value(row[name])
+                if stored is None and new_value is None:
+                    continue
+                if stored is None or not self._same_value(name, old_value, new_value):
+                    changes.append({
+                        "bus_id": bus_id,
+                        "source_url": row["source_url"],
+                        "field": name,
+                        "old_value": old_value,
+                        "new_value": new_value,
+                        "changed_at": now,
+                    })
+        return changes, set(current)
+
+    def _insert_changes(self, session, changes: List[dict]) -> None:
+        """Append changes to bus_changes, resolving the ids of buses inserted by this upsert."""
+        new_urls = list({change["source_url"] for change in changes if change["bus_id"] is None})
+        bus_ids = {}
+        for start in range(0, len(new_urls), BULK_BATCH_SIZE):
+            batch = new_urls[start:start + BULK_BATCH_SIZE]
+            rows = session.execute(select(Bus.source_url, Bus.id).where(Bus.source_url.in_(batch)))
+            bus_ids.update({source_url: bus_id for source_url, bus_id in rows})
+        rows = [
+            dict(change, bus_id=change["bus_id"] or bus_ids[change["source_url"]])
+            for change in changes
+            if change["bus_id"] is not None or change["source_url"] in bus_ids
+        ]
+        for start in range(0, len(rows), BULK_BATCH_SIZE):
+            session.execute(insert(BusChange), rows[start:start + BULK_BATCH_SIZE])
+
+    def get_bus_ids(self, source_urls: List[str]) -> Dict[str, int]:
+        """
+        Look up bus ids by source_url.
+
+        Args:
+            source_urls (List[str]): Source URLs of the buses.
+
+        Returns:
+            Dict[str, int]: Mapping of source_url to bus id for the buses that exist.
+        """
+        session = self.Session()
+        try:
+            bus_ids = {}
+            for start in range(0, len(source_urls), BULK_BATCH_SIZE):
+                batch = source_urls[start:start + BULK_BATCH_SIZE]
+                rows = session.execute(select(Bus.source_url, Bus.id).where(Bus.source_url.in_(batch)))
+                bus_ids.update({source_url: bus_id for source_url, bus_id in rows})
+            return bus_ids
+        finally:
+            session.close()
+
+    def get_last_updated(self, source: str) -> Dict[str, datetime]:
+        """
+        Look up when each bus of a source was last loaded.
+
+        Buses loaded before the source column existed have no source and are included.
+
+        Args:
+            source (str): Source name, e.g. ``central_states``.
+
+        Returns:
+            Dict[str, datetime]: Mapping of source_url to updated_at.
+        """
+        session = self.Session()
+        try:
+            rows = session.execute(
+                select(Bus.source_url, Bus.updated_at)
+                .where(or_(Bus.source == source, Bus.source.is_(None)))
+                .where(Bus.source_url.is_not(None))
+            )
+            return {source_url: updated_at for source_url, updated_at in rows if updated_at is not None}
+        finally:
+            session.close()
+
+    def get_crawl_history(self, source: str) -> Dict[str, dict]:
+        """
+        Collect what is known about each bus of a source to prioritize the next crawl.
+
+        ``changes`` counts the loads that changed a bus after it was inserted, from bus_changes.
+        Buses loaded before the source column existed have no source and are included.
+
+        Args:
+            source (str): Source name, e.g. ``central_states``.
+
+        Returns:
+            Dict[str, dict]: Mapping of source_url to ``price``, ``updated_at``, ``created_at``
+                and ``changes``.
+        """
+        session = self.Session()
+        try:
+            change_counts = (
+                select(BusChange.bus_id, func.count(distinct(BusChange.changed_at)).label("changes"))
+                .join(Bus, Bus.id == BusChange.bus_id)
+                .where(or_(Bus.created_at.is_(None), BusChange.changed_at > Bus.created_at))
+                .group_by(BusChange.bus_id)
+                .subquery()
+            )
+            rows = session.execute(
+                select(Bus.source_url, Bus.price, Bus.updated_at, Bus.created_at,
+                       func.coalesce(change_counts.c.changes, 0))
+                .outerjoin(change_counts, change_counts.c.bus_id == Bus.id)
+                .where(or_(Bus.source == source, Bus.source.is_(None)))
+                .where(Bus.source_url.is_not(None))
+            )
+            return {
+                source_url: {"price": price, "updated_at": updated_at, "created_at": created_at, "changes": changes}
+                for source_url, price, updated_at, created_at, changes in rows
+            }
+        finally:
+            session.close()
+
+    def compute_facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Count the buses per value of every search facet.
+
+        All facets, including the price buckets, are counted from a single scan of
+        the facet columns instead of one ``GROUP BY`` per facet. Like ``BusQueries.search``,
+        only one listing per cluster of duplicates is counted, so the counts match the
+        results a user can page through.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Counts per facet value, most frequent first.
+        """
+        counters = {facet: Counter() for facet in FACET_COLUMNS + ("price",)}
+        columns = [getattr(Bus, facet) for facet in FACET_COLUMNS] + [Bus.price]
+        session = self.Session()
+        try:
+            stmt = select(*columns).where(representative_listings())
+            for row in session.execute(stmt).yield_per(BULK_BATCH_SIZE):
+                for facet, value in zip(FACET_COLUMNS, row):
+                    if isinstance(value, enum.Enum):
+                        value = value.value
+                    if value not in (None, ""):
+                        counters[facet][str(value)] += 1
+                bucket = price_bucket(row[-1])
+                if bucket is not None:
+                    counters["price"][bucket] += 1
+        finally:
+            session.close()
+        return {facet: dict(counter.most_common()) for facet, counter in counters.items()}
+
+    def refresh_facet_counts(self) -> datetime:
+        """
+        Recompute the search facet counts and replace the stored ones.
+
+        Called once at the end of each load so readers never run the aggregation
+        themselves. Each refresh stores the next ``version``, which tells their caches
+        to reload even when two loads finish within the same second.
+
+        Returns:
+            datetime: The computed_at timestamp of the new counts.
+        """
+        counts = self.compute_facet_counts()
+        computed_at = datetime.utcnow()
+        session = self.Session()
+        try:
+            version = (session.scalar(select(func.max(BusFacetCount.version))) or 0) + 1
+            rows = [
+                {"facet": facet, "value": value, "count": count, "computed_at": computed_at, "version": version}
+                for facet, values in counts.items()
+                for value, count in values.items()
+            ]
+            session.execute(delete(BusFacetCount))
+            for start in range(0, len(rows), BULK_BATCH_SIZE):
+                session.execute(insert(BusFacetCount), rows[start:start + BULK_BATCH_SIZE])
+            session.commit()
+            self.logger.info(f"Refreshed {len(rows)} facet counts.")
+            return computed_at
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error refreshing facet counts: {e}")
+            raise e
+        finally:
+            session.close()
+
+    def update_search_index(self, bus_ids: List[int]):
+        """
+        Reindex the given buses in the full-text index.
+
+        Each bus's previous terms are replaced by terms from its title, model, overview
+        description and spec JSON, so the load only reindexes what it touched.
+
+        Args:
+            bus_ids (List[int]): Ids of the loaded buses.
+
+        Returns:
+            None
+        """
+        bus_ids = sorted(set(bus_ids))
+        if not bus_ids:
+            return
+
+        session = self.Session()
+        try:
+            indexed_terms = 0
+            for start in range(0, len(bus_ids), BULK_BATCH_SIZE):
+                batch = bus_ids[start:start + BULK_BATCH_SIZE]
+                buses = session.scalars(
+                    select(Bus).options(selectinload(Bus.overview)).where(Bus.id.in_(batch))
+                ).all()
+                rows = []
+                for bus in buses:
+                    overview = bus.overview[0] if bus.overview else None
+                    specs, features = overview_specs(overview) if overview else (None, None)
+                    terms = document_terms(
+                        bus.title,
+                        bus.model,
+                        mdesc=overview.mdesc if overview else None,
+                        specs=specs,
+                        features=features,
+                    )
+                    rows.extend({"term": term, "bus_id": bus.id, "weight": weight} for term, weight in terms.items())
+                session.execute(delete(BusSearchTerm).where(BusSearchTerm.bus_id.in_(batch)))
+                for row_start in range(0, len(rows), BULK_BATCH_SIZE):
+                    session.execute(insert(BusSearchTerm), rows[row_start:row_start + BULK_BATCH_SIZE])
+                indexed_terms += len(rows)
+            session.commit()
+            self.logger.info(f"Indexed {indexed_terms} terms for {len(bus_ids)} buses.")
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error updating search index: {e}")
+            raise e
+        finally:
+            session.close()
+
+    def rebuild_search_index(self):
+        """Reindex every bus, e.g. after changing the tokenizer."""
+        session = self.Session()
+        try:
+            bus_ids = list(session.scalars(select(Bus.id)))
+            session.execute(delete(BusSearchTerm))
+            session.commit()
+        finally:
+            session.close()
+        self.update_search_index(bus_ids)
+
+    def assign_duplicate_clusters(self, threshold: float = DEFAULT_THRESHOLD) -> int:
+        """
+        Detect listings of the same bus across runs and sources and store their cluster ids.
+
+        Buses with duplicates get the id of their cluster's most recently updated listing
+        in ``cluster_id``; the others get NULL. Only changed rows are written.
+
+        Args:
+            threshold (float): Minimum similarity of two listings of the same bus.
+
+        Returns:
+            int: Number of buses that belong to a cluster.
+        """
+        session = self.Session()
+        try:
+            image_hashes = {}
+            for bus_id, url in session.execute(select(BusImage.bus_id, BusImage.url)).yield_per(BULK_BATCH_SIZE):
+                image_hashes.setdefault(bus_id, set()).add(image_hash(url))
+
+            listings = []
+            current_clusters = {}
+            for row in session.execute(
+                select(Bus.id, Bus.make, Bus.model, Bus.year, Bus.mileage, Bus.price, Bus.location, Bus.state,
+                       Bus.updated_at, Bus.cluster_id)
+            ).yield_per(BULK_BATCH_SIZE):
+                listings.append(Listing(
+                    row.id, make=row.make, model=row.model, year=row.year, mileage=row.mileage, price=row.price,
+                    location=row.state or row.location, image_hashes=image_hashes.get(row.id, ()),
+                    updated_at=row.updated_at,
+                ))
+                current_clusters[row.id] = row.cluster_id
+
+            clusters = cluster_listings(listings, threshold)
+            changes = [
+                {"id": bus_id, "cluster_id": clusters.get(bus_id)}
+                for bus_id, cluster_id in current_clusters.items()
+                if clusters.get(bus_id) != cluster_id
+            ]
+            for start in range(0, len(changes), BULK_BATCH_SIZE):
+                session.execute(update(Bus), changes[start:start + BULK_BATCH_SIZE])
+            session.commit()
+            self.logger.info(
+                f"Found {len(set(clusters.values()))} duplicate clusters covering {len(clusters)} buses "
+                f"({len(changes)} updated)."
+            )
+            return len(clusters)
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error assigning duplicate clusters: {e}")
+            raise e
+        finally:
+            session.close()
+
+    def get_duplicate_source_urls(self) -> List[str]:
+        """
+        Source URLs of buses that duplicate another listing shown in their place.
+
+        Returns:
+            List[str]: URLs of clustered buses that are not their cluster's representative.
+        """
+        session = self.Session()
+        try:
+            return list(session.scalars(
+                select(Bus.source_url).where(Bus.cluster_id.is_not(None)).where(Bus.cluster_id != Bus.id)
+            ))
+        finally:
+            session.close()
+
+    def record_run(self, manifest: dict) -> None:
+        """
+        Store a run manifest in scrape_runs, replacing an earlier copy of the same run.
+
+        Args:
+            manifest (dict): ``RunManifest.to_dict()`` of the run.
+        """
+        totals = manifest.get("totals", {})
+        row = {
+            "run_id": manifest["run_id"],
+            "started_at": datetime.fromisoformat(manifest["started_at"]),
+            "finished_at": datetime.fromisoformat(manifest["finished_at"]) if manifest.get("finished_at") else None,
+            "status": manifest["status"],
+            "duration_seconds": manifest.get("duration_seconds"),
+            "details_fetched": totals.get("details_fetched", 0),
+            "details_failed": totals.get("details_failed", 0),
+            "rows_inserted": totals.get("rows_inserted", 0),
+            "rows_updated": totals.get("rows_updated", 0),
+            "error_count": totals.get("error_count", 0),
+            "manifest": json.dumps(manifest),
+        }
+        session = self.Session()
+        try:
+            session.execute(delete(ScrapeRun).where(ScrapeRun.run_id == row["run_id"]))
+            session.execute(insert(ScrapeRun), [row])
+            session.commit()
+            self.logger.info(f"Recorded manifest of run {row['run_id']} ({row['status']}).")
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error recording run {row['run_id']}: {e}")
+            raise e
+        finally:
+            session.close()
+
+    def get_runs(self, limit: int = 20) -> List[dict]:
+        """
+        Read the manifests of the most recent runs.
+
+        Args:
+            limit (int): Maximum number of runs returned.
+
+        Returns:
+            List[dict]: Manifests, newest first.
+        """
+        session = self.Session()
+        try:
+            manifests = session.scalars(
+                select(ScrapeRun.manifest).order_by(ScrapeRun.started_at.desc(), ScrapeRun.id.desc()).limit(limit)
+            )
+            return [json.loads(manifest) for manifest in manifests]
+        finally:
+            session.close()
+
+    def get_run(self, run_id: str) -> Optional[dict]:
+        """
+        Read the manifest of one run.
+
+        Args:
+            run_id (str): Id of the run.
+
+        Returns:
+            Optional[dict]: The manifest, or None if the run is unknown.
+        """
+        session = self.Session()
+        try:
+            manifest = session.scalar(select(ScrapeRun.manifest).where(ScrapeRun.run_id == run_id))
+            return json.loads(manifest) if manifest is not None else None
+        finally:
+            session.close()
+
+    def iter_bus_records(self, batch_size: int = BULK_BATCH_SIZE) -> Iterator[BusRecord]:
+        """
+        Read all buses with their overviews and images as records.
+
+        Buses are paged by id, and each page eager loads its children with one
+        ``selectinload`` query per relationship, so reading N buses costs three
+        queries per batch instead of 2N lazy loads.
+
+        Args:
+            batch_size (int): Number of buses read per batch.
+
+        Yields:
+            BusRecord: A detached record for each bus, ordered by id.
+        """
+        last_id = 0
+        while True:
+            session = self.Session()
+            try:
+                buses = session.scalars(
+                    select(Bus)
+                    .options(selectinload(Bus.overview), selectinload(Bus.images))
+                    .where(Bus.id > last_id)
+                    .order_by(Bus.id)
+                    .limit(batch_size)
+                ).all()
+                records = [BusRecord.from_model(bus) for bus in buses]
+            finally:
+                session.close()
+            if not records:
+                return
+            last_id = buses[-1].id
+            yield from records
+
+    def replace_bus_children(self, overviews: list, images: list):
+        """
+        Replace the overviews and images of the given buses in a single transaction.
+
+        Existing child rows of every bus referenced in ``overviews`` or ``images`` are
+        deleted before the new rows are bulk inserted, so reloading a bus does not
+        duplicate its children. Overview specs are packed when PACK_OVERVIEW_SPECS is set.
+
+        Args:
+            overviews (list): Overview rows, each with a ``bus_id``.
+            images (list): Image rows, each with a ``bus_id``.
+
+        Returns:
+            None
+        """
+        bus_ids = sorted({row["bus_id"] for row in overviews} | {row["bus_id"] for row in images})
+        if not bus_ids:
+            self.logger.warning("No overviews or images provided. Skipping.")
+            return
+
+        if self.pack_overview_specs:
+            overviews = [pack_overview_row(row) for row in overviews]
+
+        session = self.Session()
+        try:
+            for start in range(0, len(bus_ids), BULK_BATCH_SIZE):
+                batch = bus_ids[start:start + BULK_BATCH_SIZE]
+                session.execute(delete(BusOverview).where(BusOverview.bus_id.in_(batch)))
+                session.execute(delete(BusImage).where(BusImage.bus_id.in_(batch)))
+            for model, rows in ((BusOverview, overviews), (BusImage, images)):
+                for start in range(0, len(rows), BULK_BATCH_SIZE):
+                    session.execute(insert(model), rows[start:start + BULK_BATCH_SIZE])
+            session.commit()
+            self.logger.info(
+                f"Replaced children of {len(bus_ids)} buses: {len(overviews)} overviews, {len(images)} images."
+            )
+        except Exception as e:
+            session.rollback()
+            self.logger.error(f"Error replacing bus overviews and images: {e}")
+            raise e
+        finally:
+            session.close()
+            self.logger.info("Database session closed.")
+
+    def pack_stored_overviews(self) -> int:
+        """
+        Pack the specs and features of overview rows still stored as JSON columns.
+
+        Rows are read and updated by id in batches, each batch in its own transaction,
+        so the conversion can be stopped and resumed.
+
+        Returns:
+            int: Number of rows packed.
+        """
+        packed_rows = 0
+        last_id = 0
+        while True:
+            session = self.Session()
+            try:
+                rows = session.execute(
+                    select(BusOverview.id, BusOverview.specs, BusOverview.features)
+                    .where(BusOverview.id > last_id)
+                    .where(BusOverview.specs_packed.is_(None))
+                    .where(or_(BusOverview.specs.is_not(None), BusOverview.features.is_not(None)))
+                    .order_by(BusOverview.id)
+                    .limit(BULK_BATCH_SIZE)
+                ).all()
+                if not rows:
+                    return packed_rows
+                session.execute(update(BusOverview), [
+                    {"id": overview_id, "specs_packed": pack_specs(specs, features), "specs": None, "features": None}
+                    for overview_id, specs, features in rows
+                ])
+                session.commit()
+            except Exception as e:
+                session.rollback()
+                self.logger.error(f"Error packing overview specs: {e}")
+                raise e
+            finally:
+                session.close()
+            packed_rows += len(rows)
+            last_id = rows[-1][0]
+            self.logger.info(f"Packed the specs of {packed_rows} overview rows.")
+
+    @staticmethod
+    def _prepare_bus_row(bus_data: dict, now: datetime) -> dict:
+        """
+        Build a Core insert row for the buses table.
+
+        Enum columns accept either member names or values; unknown values fall back to
+        the column default, as do ``None`` values for non-nullable columns.
+
+        Args:
+            bus_data (dict): Dictionary containing bus data.
+            now (datetime): Timestamp recorded in updated_at (and created_at on insert).
+
+        Returns:
+            dict: Row restricted to the columns of the buses table.
+        """
+        columns = Bus.__table__.columns
+        row = {}
+        bus_data = dict(bus_data, **DatabaseManager._derived_bus_values(bus_data))
+        for key, value in bus_data.items():
+            if key == "id" or key not in columns:
+                continue
+            column = columns[key]
+            if isinstance(column.type, Enum) and value is not None and not isinstance(value, enum.Enum):
+                enum_class = column.type.enum_class
+                value = enum_class.__members__.get(str(value).upper())
+                if value is None:
+                    value = column.default.arg if column.default is not None else None
+            if value is None and not column.nullable:
+                if column.default is None:
+                    continue
+                value = column.default.arg
+            row[key] = value
+        row.setdefault("created_at", now)
+        row["updated_at"] = now
+        return row
+
     def insert_data(self, table_name: str, data: list):
         """
         Insert a list of records into the specified table.
@@ -96,13 +928,14 @@ class DatabaseManager:
                 # Remove 'id' field if it exists to let the database handle it
                 record.pop("id", None)
 
-                if table_name == "buses":
-                    self.insert_or_update_bus(record)
-                else:
-                    obj = model(**record)
-                    session.add(obj)
-
-            if table_name != "buses":
+            if table_name == "buses":
+                return self.upsert_buses(data)
+            else:
+                if model is BusOverview and self.pack_overview_specs:
+                    # Same storage format as replace_bus_children
+                    data = [pack_overview_row(row) for row in data]
+                for start in range(0, len(data), BULK_BATCH_SIZE):
+                    session.execute(insert(model), data[start:start + BULK_BATCH_SIZE])
                 session.commit()
                 self.logger.info(f"Data insertion into table {table_name} completed successfully.")
         except Exception as e:
@@ -117,6 +950,8 @@ class DatabaseManager:
         """
         Insert bus overviews into the buses_overview table.
 
+        Specs are packed when PACK_OVERVIEW_SPECS is set, like in ``replace_bus_children``.
+
         Args:
             overviews (list): List of dictionaries representing bus overviews.
 
@@ -0,0 +1,182 @@
+import hashlib
+import re
+from datetime import datetime
+from itertools import combinations
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from src.urls import canonicalize_image_url
+
+NUMBER_PATTERN = re.compile(r"[\d.]+")
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Listings compared with each of their next WINDOW neighbours within a make/year block
+WINDOW = 10
+# Image hashes shared by more listings than this are placeholders, not evidence
+MAX_IMAGE_BLOCK = 8
+# Minimum weighted similarity for two listings to be the same bus
+DEFAULT_THRESHOLD = 0.85
+
+# Weight of each field in the similarity score
+FIELD_WEIGHTS = {
+    "model": 0.25,
+    "mileage": 0.2,
+    "price": 0.15,
+    "location": 0.1,
+    "images": 0.3,
+}
+
+def parse_number(value) -> Optional[float]:
+    """Read the first number of a stored string such as ``"85,000 mi"``; None if there is none."""
+    if value is None:
+        return None
+    match = NUMBER_PATTERN.search(str(value).replace(",", ""))
+    if not match:
+        return None
+    try:
+        number = float(match.group())
+    except ValueError:
+        return None
+    return number if number > 0 else None
+
+def image_hash(url: Optional[str]) -> Optional[str]:
+    """
+    Identify an image across listings by the hash of its canonical URL (every size
+    variant of one upload).
+
+    Always the URL, never the S3 key: only some buses have stored images, and one photo
+    must get the same key whether or not the image pipeline ran for its bus.
+    """
+    if not url:
+        return None
+    canonical, _ = canonicalize_image_url(url)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+class Listing:
+    """The fields of one bus that duplicate detection compares."""
+
+    __slots__ = ("id", "make", "model_terms", "year", "mileage", "price", "location", "image_hashes", "updated_at")
+
+    def __init__(self, id: int, make: Optional[str] = None, model: Optional[str] = None, year=None,
+                 mileage=None, price=None, location: Optional[str] = None, image_hashes: Iterable[str] = (),
+                 updated_at: Optional[datetime] = None):
+        self.id = id
+        self.make = (make or "").strip().lower() or None
+        self.model_terms = frozenset(WORD_PATTERN.findall((model or "").lower()))
+        self.year = str(year).strip() if year else None
+        self.mileage = parse_number(mileage)
+        self.price = parse_number(price)
+        self.location = (location or "").strip().lower() or None
+        self.image_hashes = frozenset(h for h in image_hashes if h)
+        self.updated_at = updated_at
+
+    def __repr__(self):
+        return f"Listing(id={self.id}, make={self.make}, year={self.year})"
+
+def numeric_similarity(a: Optional[float], b: Optional[float], tolerance: float) -> Optional[float]:
+    """1 for equal values, falling linearly to 0 at a relative difference of ``tolerance``."""
+    if a is None or b is None:
+        return None
+    difference = abs(a - b) / max(a, b)
+    return max(0.0, 1.0 - difference / tolerance)
+
+def jaccard(a: Set, b: Set) -> Optional[float]:
+    if not a or not b:
+        return None
+    return len(a & b) / len(a | b)
+
+def overlap(a: Set, b: Set) -> Optional[float]:
+    """Share of the smaller set found in the other, so "E450" matches "E450 Diesel 6.7L"."""
+    if not a or not b:
+        return None
+    return len(a & b) / min(len(a), len(b))
+
+def similarity(a: Listing, b: Listing) -> float:
+    """
+    Weighted similarity of two listings, from 0 to 1.
+
+    Fields missing on either side do not count; listings with different known makes
+    or years never match.
+    """
+    if (a.make and b.make and a.make != b.make) or (a.year and b.year and a.year != b.year):
+        return 0.0
+    scores = {
+        "model": overlap(a.model_terms, b.model_terms),
+        "mileage": numeric_similarity(a.mileage, b.mileage, 0.1),
+        "price": numeric_similarity(a.price, b.price, 0.2),
+        "location": None if not (a.location and b.location) else float(a.location == b.location),
+        "images": jaccard(a.image_hashes, b.image_hashes),
+    }
+    # Shared photos are near-conclusive on their own
+    if scores["images"]:
+        scores["images"] = min(1.0, scores["images"] * 2)
+    known = {field: score for field, score in scores.items() if score is not None}
+    weight = sum(FIELD_WEIGHTS[field] for field in known)
+    # A single matching field is not enough evidence
+    if len(known) < 2 or not weight:
+        return 0.0
+    return sum(FIELD_WEIGHTS[field] * score for field, score in known.items()) / weight
+
+def candidate_pairs(listings: List[Listing]) -> Set[Tuple[int, int]]:
+    """
+    Pairs of listing indexes worth comparing.
+
+    Listings are blocked by make and year and, within a block, sorted by mileage and
+    price and compared only with their next ``WINDOW`` neighbours (sorted
+    neighbourhood). Listings sharing an image hash are always compared. The number of
+    pairs grows linearly with the catalogue instead of quadratically.
+    """
+    blocks: Dict[Tuple, List[int]] = {}
+    image_blocks: Dict[str, List[int]] = {}
+    for index, listing in enumerate(listings):
+        blocks.setdefault((listing.make, listing.year), []).append(index)
+        for hash_ in listing.image_hashes:
+            image_blocks.setdefault(hash_, []).append(index)
+
+    pairs = set()
+    for members in blocks.values():
+        members.sort(key=lambda i: (listings[i].mileage or 0, listings[i].price or 0))
+        for position, i in enumerate(members):
+            for j in members[position + 1:position + 1 + WINDOW]:
+                pairs.add((min(i, j), max(i, j)))
+    for members in image_blocks.values():
+        if len(members) <= MAX_IMAGE_BLOCK:
+            pairs.update((min(i, j), max(i, j)) for i, j in combinations(members, 2))
+    return pairs
+
+def cluster_listings(listings: List[Listing], threshold: float = DEFAULT_THRESHOLD) -> Dict[int, int]:
+    """
+    Group listings of the same physical bus.
+
+    Matching pairs are merged transitively. Each cluster is identified by the id of
+    its most recently updated listing (highest id on ties), the one to show.
+
+    Args:
+        listings (List[Listing]): Every listing of the catalogue.
+        threshold (float): Minimum similarity of a matching pair.
+
+    Returns:
+        Dict[int, int]: Cluster id per listing id, for listings with duplicates only.
+    """
+    parents = list(range(len(listings)))
+
+    def find(i):
+        while parents[i] != i:
+            parents[i] = parents[parents[i]]
+            i = parents[i]
+        return i
+
+    for i, j in candidate_pairs(listings):
+        if similarity(listings[i], listings[j]) >= threshold:
+            parents[find(i)] = find(j)
+
+    groups: Dict[int, List[Listing]] = {}
+    for index, listing in enumerate(listings):
+        groups.setdefault(find(index), []).append(listing)
+
+    clusters = {}
+    for members in groups.values():
+        if len(members) < 2:
+            continue
+        representative = max(members, key=lambda listing: (listing.updated_at or datetime.min, listing.id))
+        for listing in members:
+            clusters[listing.id] = representative.id
+    return clusters
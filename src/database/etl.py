@@ -1,17 +1,26 @@
 import json
-import boto3
-from typing import List, Dict
-from src.scraper.main_scraper import BusScraper
-from src.database.models import Bus, BusOverview, BusImage
-from src.database.db_manager import DatabaseManager
+import os
+from typing import Iterable, List, Dict, Optional, Sequence, TYPE_CHECKING
 from config.settings import Settings
+from src.database.manifest import RunManifest
+from src.profiling import NULL_PROFILER, RunProfiler
 import logging
 
+# boto3, SQLAlchemy and the scraper stack are imported on first use so that a
+# cold start only pays for the phases the invocation actually runs.
+if TYPE_CHECKING:
+    from src.scraper.records import BusRecord
+
+PHASES = ("extract", "transform", "load", "export")
+
 class ETL:
     """ETL class to manage the extraction, transformation, and loading of data."""
 
-    def __init__(self, settings: Settings):
+    def __init__(self, settings: Settings, phases: Optional[Sequence[str]] = None, runtime=None):
         self.settings = settings
+        # RuntimeContext whose clients outlive this run (warm Lambda invocations), or None
+        self.runtime = runtime
+        self.phases = tuple(phases) if phases else PHASES
         self.logger = logging.getLogger(__name__)
         self.logger.setLevel(logging.INFO)
         handler = logging.StreamHandler()
@@ -20,21 +29,178 @@ class ETL:
         if not self.logger.handlers:
             self.logger.addHandler(handler)
 
-        try:
-            self.db_manager = DatabaseManager()
-            self.scraper = BusScraper(settings.BASE_URL, self.db_manager.Session())
-            self.s3_client = boto3.client("s3", region_name=settings.AWS_REGION)
-            self.logger.info("ETL class initialized successfully.")
-        except Exception as e:
-            self.logger.error(f"Error initializing ETL class: {e}")
-            raise
+        unknown_phases = [phase for phase in self.phases if phase not in PHASES]
+        if unknown_phases:
+            raise ValueError(f"Unknown ETL phases: {', '.join(unknown_phases)}")
+
+        # Heavy clients are created lazily by the properties below.
+        self._db_manager = None
+        self._scheduler = None
+        self._s3_client = None
+        self._raw_archive = None
+        self.manifest = RunManifest(self.phases)
+        self.profiler = (
+            RunProfiler(settings.PROFILE_SAMPLE_INTERVAL, trace_allocations=settings.PROFILE_ALLOCATIONS)
+            if settings.PROFILE else NULL_PROFILER
+        )
+        self.logger.info(f"ETL class initialized for phases: {', '.join(self.phases)}.")
+
+    @property
+    def db_manager(self):
+        """Database manager, created on first access or reused from the runtime context."""
+        if self._db_manager is None:
+            from src.database.db_manager import DatabaseManager
+            try:
+                database_url = self.settings.get_database_url()
+                if self.runtime is not None:
+                    self._db_manager = self.runtime.db_manager(database_url)
+                else:
+                    self._db_manager = DatabaseManager(database_url)
+            except Exception as e:
+                self.logger.error(f"Error initializing database manager: {e}")
+                raise
+        return self._db_manager
+
+    @db_manager.setter
+    def db_manager(self, value):
+        self._db_manager = value
+
+    @property
+    def scheduler(self):
+        """Scheduler with one scraper per configured source, created on first access."""
+        if self._scheduler is None:
+            from src.scraper.scheduler import SourceScheduler, get_source_adapter
+            scheduler = SourceScheduler(
+                max_workers=self.settings.SOURCE_MAX_WORKERS,
+                requests_per_second=self.settings.SOURCE_REQUESTS_PER_SECOND,
+                discovery_mode=self.settings.DISCOVERY_MODE,
+                max_consecutive_failures=self.settings.CIRCUIT_MAX_CONSECUTIVE_FAILURES,
+                max_error_rate=self.settings.CIRCUIT_MAX_ERROR_RATE,
+                min_requests=self.settings.CIRCUIT_MIN_REQUESTS,
+                max_failed_requests=self.settings.RUN_MAX_FAILED_REQUESTS,
+                parser=self.settings.HTML_PARSER,
+                max_detail_requests=self.settings.CRAWL_REQUEST_BUDGET,
+                max_seconds=self.settings.CRAWL_TIME_BUDGET_SECONDS,
+                sessions=self.runtime.http_sessions if self.runtime is not None else None,
+            )
+            for name in self.settings.SOURCES:
+                adapter = get_source_adapter(name)
+                scraper = scheduler.add_source(adapter, detail_cache=self._create_detail_cache(adapter))
+                scraper.archive = self.raw_archive
+                scraper.profiler = self.profiler
+            self._scheduler = scheduler
+        return self._scheduler
+
+    @scheduler.setter
+    def scheduler(self, value):
+        self._scheduler = value
+
+    @property
+    def raw_archive(self):
+        """Archive of raw detail pages selected by RAW_ARCHIVE, or None when archiving is off."""
+        if self._raw_archive is None and self.settings.RAW_ARCHIVE:
+            from src.scraper.archive import LocalRawArchive, S3RawArchive
+            if self.settings.RAW_ARCHIVE == "local":
+                self._raw_archive = LocalRawArchive(self.settings.RAW_ARCHIVE_PATH)
+            elif self.settings.RAW_ARCHIVE == "s3":
+                self._raw_archive = S3RawArchive(
+                    self.s3_client, self.settings.S3_BUCKET_NAME, prefix=self.settings.RAW_ARCHIVE_S3_PREFIX
+                )
+            else:
+                raise ValueError(f"Unknown RAW_ARCHIVE: {self.settings.RAW_ARCHIVE} (expected local or s3)")
+        return self._raw_archive
+
+    @raw_archive.setter
+    def raw_archive(self, value):
+        self._raw_archive = value
+
+    def _create_detail_cache(self, adapter):
+        """Create the detail cache of a source, stored in a file per source."""
+        if not self.settings.DETAIL_CACHE_ENABLED:
+            return None
+        from src.scraper.cache import DetailCache
+        root, extension = os.path.splitext(self.settings.DETAIL_CACHE_PATH)
+        return DetailCache(
+            version=f"{adapter.name}:{adapter.EXTRACTION_VERSION}",
+            path=f"{root}.{adapter.name}{extension}",
+            max_entries=self.settings.DETAIL_CACHE_MAX_ENTRIES,
+        )
+
+    def _detail_cache_s3_key(self, cache) -> str:
+        """S3 key of a source's cache file, next to DETAIL_CACHE_S3_KEY."""
+        prefix = os.path.dirname(self.settings.DETAIL_CACHE_S3_KEY)
+        filename = os.path.basename(cache.path)
+        return f"{prefix}/{filename}" if prefix else filename
+
+    def _frontier_checkpoint(self, scraper):
+        """Frontier checkpoint of a source, stored in a file per source."""
+        from src.scraper.checkpoint import FrontierCheckpoint
+        root, extension = os.path.splitext(self.settings.FRONTIER_CHECKPOINT_PATH)
+        return FrontierCheckpoint(f"{root}.{scraper.adapter.name}{extension}")
+
+    def _frontier_s3_key(self, checkpoint) -> str:
+        """S3 key of a source's frontier checkpoint, next to FRONTIER_CHECKPOINT_S3_KEY."""
+        prefix = os.path.dirname(self.settings.FRONTIER_CHECKPOINT_S3_KEY)
+        filename = os.path.basename(checkpoint.path)
+        return f"{prefix}/{filename}" if prefix else filename
+
+    @property
+    def stopped_early(self) -> Optional[str]:
+        """
+        ``partial`` when a source failed while others were scraped, ``circuit_open`` when
+        a circuit breaker stopped a source early in this run, ``budget_exhausted`` when
+        the crawl budget left listings unfetched, else None.
+        """
+        if self._scheduler is None:
+            return None
+        statuses = {scraper.status for scraper in self._scheduler.scrapers}
+        if "failed" in statuses:
+            return "partial"
+        for status in ("circuit_open", "budget_exhausted"):
+            if status in statuses:
+                return status
+        return None
+
+    @property
+    def s3_client(self):
+        """S3 client, created on first access or reused from the runtime context."""
+        if self._s3_client is None:
+            if self.runtime is not None:
+                self._s3_client = self.runtime.s3_client(self.settings.AWS_REGION)
+            else:
+                import boto3
+                self._s3_client = boto3.client("s3", region_name=self.settings.AWS_REGION)
+        return self._s3_client
 
-    def extract(self) -> List[Bus]:
-        """Extract data from the source URL using the scraper."""
+    @s3_client.setter
+    def s3_client(self, value):
+        self._s3_client = value
+
+    def extract(self) -> List["BusRecord"]:
+        """Extract data from the configured sources using their scrapers, or from the raw archive in backfills."""
+        if self.settings.BACKFILL:
+            return self.backfill()
         try:
             self.logger.info("Starting data extraction from source.")
-            buses = self.scraper.scrape_all_pages()
+            self.restore_detail_cache()
+            self.restore_last_fetched()
+            self.restore_crawl_history()
+            self.restore_duplicate_urls()
+            self.restore_frontier()
+            try:
+                buses = self.scheduler.run()
+            except Exception:
+                # Keep the details extracted before the failure for the next run
+                self.record_sources()
+                self.persist_scrape_state()
+                raise
+            self.record_sources()
+            self.persist_detail_cache()
+            self.persist_frontier()
             if not buses:
+                if self.stopped_early:
+                    self.logger.warning(f"Scraping stopped early ({self.stopped_early}) before any bus was scraped.")
+                    return []
                 raise ValueError("No data extracted from source.")
             self.logger.info(f"Extracted {len(buses)} buses from source.")
             return buses
@@ -42,8 +208,181 @@ class ETL:
             self.logger.error(f"Error during data extraction: {e}")
             raise
 
-    def transform(self, buses: List[Bus]) -> Dict[str, List[dict]]:
-        """Transform data into separate JSON-serializable formats for each table."""
+    def record_sources(self) -> None:
+        """Add every source's stats and status to the manifest, with the errors of failed sources."""
+        for scraper in self.scheduler.scrapers:
+            self.manifest.add_source(scraper.adapter.name, scraper.stats, status=scraper.status)
+        for error in self.scheduler.failures.values():
+            self.manifest.record_error(error)
+
+    def backfill(self) -> List["BusRecord"]:
+        """
+        Re-extract every source's archived detail pages with the current extraction code.
+
+        Nothing is fetched; the records go through transform and load like scraped ones,
+        so corrected values are bulk-upserted over the stored rows.
+        """
+        from src.scraper.backfill import Backfill
+        from src.scraper.scheduler import get_source_adapter
+        try:
+            if self.raw_archive is None:
+                raise ValueError("Backfill requires a raw page archive (set RAW_ARCHIVE to local or s3).")
+            buses = []
+            for name in self.settings.SOURCES:
+                backfill = Backfill(
+                    get_source_adapter(name),
+                    self.raw_archive,
+                    processes=self.settings.BACKFILL_PROCESSES,
+                    parser=self.settings.HTML_PARSER,
+                )
+                buses.extend(backfill.run())
+                self.manifest.add_source(name, backfill.stats, status="backfill")
+            if not buses:
+                raise ValueError("No data re-extracted from the raw archive.")
+            self.logger.info(f"Re-extracted {len(buses)} buses from the raw archive.")
+            return buses
+        except Exception as e:
+            self.logger.error(f"Error during backfill: {e}")
+            raise
+
+    def restore_last_fetched(self) -> None:
+        """
+        Tell sitemap-discovering scrapers when each listing was last loaded.
+
+        Only done when this run also loads, so skipped listings are never lost.
+        """
+        if "load" not in self.phases:
+            return
+        for scraper in self.scheduler.scrapers:
+            if scraper.discovery_mode != "sitemap":
+                continue
+            try:
+                scraper.last_fetched = self.db_manager.get_last_updated(scraper.adapter.name)
+            except Exception as e:
+                self.logger.warning(f"Could not read last fetch times for {scraper.adapter.name}: {e}")
+
+    def restore_crawl_history(self) -> None:
+        """
+        Give the scrapers the stored prices, fetch times and change counts of their listings,
+        so the listings most likely to have changed are fetched first.
+
+        Only done when this run also loads, so the history reflects what was actually stored.
+        """
+        if "load" not in self.phases:
+            return
+        for scraper in self.scheduler.scrapers:
+            try:
+                scraper.crawl_history = self.db_manager.get_crawl_history(scraper.adapter.name)
+            except Exception as e:
+                self.logger.warning(f"Could not read the crawl history of {scraper.adapter.name}: {e}")
+
+    def restore_duplicate_urls(self) -> None:
+        """Tell the scrapers which listings duplicate another one, when skipping them is enabled."""
+        if "load" not in self.phases or not self.settings.DEDUP_SKIP_DUPLICATE_FETCHES:
+            return
+        try:
+            duplicate_urls = set(self.db_manager.get_duplicate_source_urls())
+        except Exception as e:
+            self.logger.warning(f"Could not read duplicate listings: {e}")
+            return
+        for scraper in self.scheduler.scrapers:
+            scraper.skip_urls = duplicate_urls
+
+    def restore_detail_cache(self) -> None:
+        """Load the sources' detail caches, fetching cache files from S3 if they are not on disk."""
+        for scraper in self.scheduler.scrapers:
+            cache = scraper.detail_cache
+            if cache is None:
+                continue
+            if not os.path.exists(cache.path) and self.settings.S3_BUCKET_NAME:
+                try:
+                    self.s3_client.download_file(
+                        self.settings.S3_BUCKET_NAME, self._detail_cache_s3_key(cache), cache.path
+                    )
+                except Exception as e:
+                    self.logger.warning(f"No detail cache restored from S3: {e}")
+            cache.load()
+
+    def persist_detail_cache(self) -> None:
+        """Save the sources' detail caches to disk and, when a bucket is configured, to S3."""
+        if self.settings.DRY_RUN:
+            self.logger.info("Dry run: the detail caches are not saved.")
+            return
+        for scraper in self.scheduler.scrapers:
+            cache = scraper.detail_cache
+            if cache is None:
+                continue
+            cache.save()
+            if self.settings.S3_BUCKET_NAME:
+                try:
+                    self.s3_client.upload_file(
+                        cache.path, self.settings.S3_BUCKET_NAME, self._detail_cache_s3_key(cache)
+                    )
+                except Exception as e:
+                    self.logger.warning(f"Failed to persist detail cache to S3: {e}")
+
+    def restore_frontier(self) -> None:
+        """Hand each scraper the listings a previous run checkpointed, fetching checkpoints from S3 if needed."""
+        for scraper in self.scheduler.scrapers:
+            checkpoint = self._frontier_checkpoint(scraper)
+            if not os.path.exists(checkpoint.path) and self.settings.S3_BUCKET_NAME:
+                try:
+                    self.s3_client.download_file(
+                        self.settings.S3_BUCKET_NAME, self._frontier_s3_key(checkpoint), checkpoint.path
+                    )
+                except Exception as e:
+                    self.logger.info(f"No frontier checkpoint restored from S3 for {scraper.adapter.name}: {e}")
+            scraper.resume_entries = checkpoint.load()
+
+    def persist_scrape_state(self) -> None:
+        """
+        Save the detail caches and the listings left unfetched after a failed scrape.
+
+        Checkpoints are only added to, never cleared, and persistence errors are logged
+        so they do not hide the scrape's own exception.
+        """
+        try:
+            self.persist_detail_cache()
+            self.persist_frontier(keep_checkpoints=True)
+        except Exception as e:
+            self.logger.warning(f"Failed to persist the scrape state of the failed run: {e}")
+
+    def persist_frontier(self, keep_checkpoints: bool = False) -> None:
+        """
+        Checkpoint the listings each source left unfetched, on disk and, when a bucket is
+        configured, in S3. A source that finished removes its previous checkpoint, unless
+        ``keep_checkpoints`` is set (the run failed, so resumed listings may be unfetched).
+        Dry runs leave the checkpoints as they were.
+        """
+        if self.settings.DRY_RUN:
+            self.logger.info("Dry run: the frontier checkpoints are left unchanged.")
+            return
+        for scraper in self.scheduler.scrapers:
+            if keep_checkpoints and not scraper.frontier:
+                continue
+            checkpoint = self._frontier_checkpoint(scraper)
+            checkpoint.save(scraper.frontier)
+            if not self.settings.S3_BUCKET_NAME or not (scraper.frontier or scraper.resume_entries):
+                continue
+            try:
+                if scraper.frontier:
+                    self.s3_client.upload_file(
+                        checkpoint.path, self.settings.S3_BUCKET_NAME, self._frontier_s3_key(checkpoint)
+                    )
+                else:
+                    self.s3_client.delete_object(
+                        Bucket=self.settings.S3_BUCKET_NAME, Key=self._frontier_s3_key(checkpoint)
+                    )
+            except Exception as e:
+                self.logger.warning(f"Failed to persist frontier checkpoint to S3: {e}")
+
+    def transform(self, buses: Iterable["BusRecord"]) -> Dict[str, List[dict]]:
+        """
+        Transform data into separate JSON-serializable formats for each table.
+
+        Overview and image rows reference their bus by ``source_url``; database ids
+        are resolved in the load phase.
+        """
         try:
             self.logger.info("Starting data transformation.")
             buses_data = []
@@ -51,66 +390,25 @@ class ETL:
             images_data = []
 
             for bus in buses:
-                # Asignar 0 a 'price' si está ausente o es None
-                price = bus.price if bus.price else "0"
-
-                # Convert Bus object to dictionary sin incluir 'id'
-                bus_dict = {
-                    # "id": bus.id,  # Excluir 'id' para evitar problemas al actualizar
-                    "title": bus.title,
-                    "year": bus.year,
-                    "make": bus.make,
-                    "model": bus.model,
-                    "body": bus.body,
-                    "chassis": bus.chassis,
-                    "engine": bus.engine,
-                    "transmission": bus.transmission,
-                    "mileage": bus.mileage,
-                    "passengers": bus.passengers,
-                    "wheelchair": bus.wheelchair,
-                    "color": bus.color,
-                    "interior_color": bus.interior_color,
-                    "exterior_color": bus.exterior_color,
-                    "gvwr": bus.gvwr,
-                    "dimensions": bus.dimensions,
-                    "luggage": bus.luggage,
-                    "state_bus_standard": bus.state_bus_standard,
-                    "airconditioning": bus.airconditioning.value if bus.airconditioning else None,
-                    "location": bus.location,
-                    "price": price,  # Asegurar que price es una cadena, asignar '0' si es None
-                    "vin": bus.vin,
-                    "description": bus.description,
-                    "source_url": bus.source_url,
-                    "contact_email": bus.contact_email,
-                    "contact_phone": bus.contact_phone,
-                    "us_region": bus.us_region.value if bus.us_region else None,
-                }
-
-                buses_data.append(bus_dict)
+                buses_data.append(bus.to_dict())
 
                 # Preparar datos de BusOverview
-                for overview in bus.overview:
-                    overview_dict = {
-                        "bus_id": bus.id,  # Necesita 'id' para la relación
-                        "mdesc": overview.mdesc,
-                        "intdesc": overview.intdesc,
-                        "extdesc": overview.extdesc,
-                        "features": overview.features,
-                        "specs": overview.specs,
-                    }
+                if bus.overview is not None:
+                    overview_dict = bus.overview.to_dict()
+                    overview_dict["source_url"] = bus.source_url
                     overview_data.append(overview_dict)
 
                 # Preparar datos de BusImage
                 for image in bus.images:
-                    image_dict = {
-                        "bus_id": bus.id,  # Necesita 'id' para la relación
-                        "name": image.name,
-                        "url": image.url,
-                        "description": image.description,
-                        "image_index": image.image_index,
-                    }
+                    image_dict = image.to_dict()
+                    image_dict["source_url"] = bus.source_url
                     images_data.append(image_dict)
 
+            # Normalize numbers, locations, regions and air conditioning column by column;
+            # a missing price is stored as "0"
+            from src.scraper.normalize import ColumnBatch
+            buses_data = ColumnBatch(buses_data).db_rows()
+
             self.logger.info("Data transformation complete.")
             return {
                 "buses": buses_data,
@@ -121,27 +419,78 @@ class ETL:
             self.logger.error(f"Error during data transformation: {e}")
             raise
 
+    def store_images(self, data: Dict[str, List[dict]]) -> Dict[str, List[dict]]:
+        """Download the images of the transformed data to S3 and record their storage keys."""
+        from src.scraper.images import ImagePipeline
+        from src.scraper.main_scraper import DEFAULT_HEADERS
+        try:
+            self.logger.info("Storing images in S3.")
+            pipeline = ImagePipeline(
+                self.s3_client,
+                self.settings.S3_BUCKET_NAME,
+                prefix=self.settings.IMAGE_S3_PREFIX,
+                max_workers=self.settings.IMAGE_MAX_WORKERS,
+                keep_largest=self.settings.IMAGE_KEEP_LARGEST,
+                headers=DEFAULT_HEADERS,
+                http=self.scheduler,
+            )
+            images = pipeline.store(data["images"])
+            self.manifest.images = {"stored": len(images), "bytes_downloaded": pipeline.bytes_downloaded}
+            return dict(data, images=images)
+        except Exception as e:
+            self.logger.error(f"Error storing images: {e}")
+            raise
+
     def load(self, data: Dict[str, List[dict]]) -> None:
         """Load the transformed data into the database."""
+        with self.profiler.section("load"):
+            self._load(data)
+
+    def _load(self, data: Dict[str, List[dict]]) -> None:
         try:
             self.logger.info("Loading data into the database.")
-            # Insert or update buses
-            for bus in data["buses"]:
-                self.db_manager.insert_or_update_bus(bus)
+            # Insert or update buses in bulk
+            counts = self.db_manager.insert_data("buses", data["buses"])
+            if counts:
+                self.manifest.rows = counts
 
-            # Insert overviews
-            self.db_manager.insert_overviews(data["overview"])
+            # Resolve bus ids for the child rows and replace the previous overviews and images
+            bus_ids = self.db_manager.get_bus_ids([bus["source_url"] for bus in data["buses"]])
+            self.db_manager.replace_bus_children(
+                overviews=self._attach_bus_ids(data["overview"], bus_ids),
+                images=self._attach_bus_ids(data["images"], bus_ids),
+            )
+
+            self.db_manager.update_search_index(list(bus_ids.values()))
+            self.db_manager.assign_duplicate_clusters(self.settings.DEDUP_THRESHOLD)
 
-            # Insert images
-            self.db_manager.insert_images(data["images"])
+            # Precompute the search facets once per run and drop this process's cached copy
+            from src.database.queries import invalidate_facet_cache
+            self.db_manager.refresh_facet_counts()
+            invalidate_facet_cache(self.db_manager.engine)
 
             self.logger.info("Data successfully loaded into the database.")
         except Exception as e:
             self.logger.error(f"Error during data loading: {e}")
             raise
 
+    def _attach_bus_ids(self, rows: List[dict], bus_ids: Dict[str, int]) -> List[dict]:
+        """Replace the source_url reference of child rows with the bus id."""
+        attached = []
+        for row in rows:
+            row = dict(row)
+            source_url = row.pop("source_url", None)
+            if "bus_id" not in row:
+                if source_url not in bus_ids:
+                    self.logger.warning(f"No bus found for child row with source_url: {source_url}")
+                    continue
+                row["bus_id"] = bus_ids[source_url]
+            attached.append(row)
+        return attached
+
     def load_to_s3(self, data: Dict[str, List[dict]], bucket_name: str, key: str) -> None:
         """Load the transformed data to an S3 bucket."""
+        import boto3
         try:
             self.logger.info(f"Uploading data to S3 bucket: {bucket_name}, key: {key}.")
             self.s3_client.put_object(
@@ -158,19 +507,149 @@ class ETL:
             self.logger.error(f"Unexpected error during S3 upload: {e}")
             raise
 
-    def run(self):
-        """Execute the full ETL pipeline."""
+    def export_parquet(self, data: Dict[str, List[dict]], bucket_name: str, key: str) -> None:
+        """Upload the buses as a Parquet file with typed columns (requires pyarrow)."""
+        from src.scraper.normalize import ColumnBatch
+        path = os.path.join("/tmp", os.path.basename(key))
         try:
-            self.logger.info("Starting ETL pipeline.")
-            extracted_data = self.extract()
-            transformed_data = self.transform(extracted_data)
-            self.load(transformed_data)
-            self.load_to_s3(
-                data=transformed_data,
-                bucket_name=self.settings.S3_BUCKET_NAME,
-                key="scraped_data.json"
-            )
+            self.logger.info(f"Writing Parquet export to S3 bucket: {bucket_name}, key: {key}.")
+            ColumnBatch(data["buses"]).to_parquet(path)
+            self.s3_client.upload_file(path, bucket_name, key)
+            self.logger.info("Parquet export uploaded to S3.")
+        except Exception as e:
+            self.logger.error(f"Error exporting Parquet to S3: {e}")
+            raise
+
+    def write_output(self, data: Dict[str, List[dict]], directory: str) -> None:
+        """Write the transformed data (and, with EXPORT_PARQUET, the Parquet file) to a local directory."""
+        try:
+            os.makedirs(directory, exist_ok=True)
+            path = os.path.join(directory, "scraped_data.json")
+            self.logger.info(f"Writing data to {path}.")
+            with open(path, "w", encoding="utf-8") as output_file:
+                json.dump(data, output_file, indent=2)
+            if self.settings.EXPORT_PARQUET:
+                from src.scraper.normalize import ColumnBatch
+                ColumnBatch(data["buses"]).to_parquet(os.path.join(directory, "scraped_data.parquet"))
+            self.logger.info("Data successfully written.")
+        except Exception as e:
+            self.logger.error(f"Error writing data to {directory}: {e}")
+            raise
+
+    def run(self, data: Optional[Dict[str, List[dict]]] = None) -> Optional[Dict[str, List[dict]]]:
+        """
+        Execute the requested phases of the ETL pipeline.
+
+        Args:
+            data (Optional[Dict[str, List[dict]]]): Previously transformed data, required
+                when the load phase runs without extraction. An export without extraction
+                or data exports the buses stored in the database.
+
+        Returns:
+            Optional[Dict[str, List[dict]]]: The transformed data handled by this run.
+        """
+        self.profiler.start()
+        try:
+            self.logger.info(f"Starting ETL pipeline with phases: {', '.join(self.phases)} (run {self.manifest.run_id}).")
+            if "extract" in self.phases:
+                with self.manifest.stage("extract"):
+                    extracted_data = self.extract()
+                if not extracted_data:
+                    # Only reached when a breaker or the crawl budget stopped scraping; nothing to transform or load
+                    self.logger.warning(f"Stopping early ({self.stopped_early}): no bus was scraped.")
+                    self.manifest.finish(self.stopped_early)
+                    return None
+                if "transform" in self.phases:
+                    with self.manifest.stage("transform"):
+                        data = self.transform(extracted_data)
+                    if self.settings.IMAGE_PIPELINE_ENABLED:
+                        with self.manifest.stage("images"):
+                            data = self.store_images(data)
+            elif "transform" in self.phases:
+                raise ValueError("The transform phase requires the extract phase.")
+
+            if data is None and "export" in self.phases and not {"extract", "load"} & set(self.phases):
+                self.logger.info("No data given; exporting the buses stored in the database.")
+                with self.manifest.stage("transform"):
+                    data = self.transform(self.db_manager.iter_bus_records())
+
+            if ("load" in self.phases or "export" in self.phases) and data is None:
+                raise ValueError("No transformed data available for the load or export phases.")
+
+            if "load" in self.phases:
+                with self.manifest.stage("load"):
+                    self.load(data)
+            if "export" in self.phases:
+                with self.manifest.stage("export"):
+                    if self.settings.OUTPUT_DIR:
+                        self.write_output(data, self.settings.OUTPUT_DIR)
+                    else:
+                        self.load_to_s3(
+                            data=data,
+                            bucket_name=self.settings.S3_BUCKET_NAME,
+                            key="scraped_data.json"
+                        )
+                        if self.settings.EXPORT_PARQUET:
+                            self.export_parquet(data, self.settings.S3_BUCKET_NAME, "scraped_data.parquet")
+            if self.stopped_early:
+                self.manifest.finish(self.stopped_early)
+                self.logger.warning(f"ETL pipeline stopped early ({self.stopped_early}); scraped buses were loaded.")
+                return data
+            self.manifest.finish("succeeded")
             self.logger.info("ETL pipeline completed successfully.")
+            return data
         except Exception as e:
+            self.manifest.record_error(e)
+            self.manifest.finish("failed")
             self.logger.error(f"ETL pipeline failed: {e}")
-            raise
\ No newline at end of file
+            raise
+        finally:
+            self.profiler.stop()
+            self.persist_profiles()
+            self.persist_manifest()
+
+    def persist_profiles(self) -> None:
+        """Write the run's profiles locally and, unless PROFILE_OUTPUT_DIR is set, upload them to S3."""
+        if not self.profiler.enabled:
+            return
+        directory = os.path.join(self.settings.PROFILE_OUTPUT_DIR or "/tmp/profiles", self.manifest.run_id)
+        try:
+            paths = self.profiler.write(directory)
+            if self.settings.PROFILE_OUTPUT_DIR or not self.settings.S3_BUCKET_NAME:
+                return
+            for path in paths:
+                key = f"{self.settings.PROFILE_S3_PREFIX}{self.manifest.run_id}/{os.path.basename(path)}"
+                self.s3_client.upload_file(path, self.settings.S3_BUCKET_NAME, key)
+            self.logger.info(f"Uploaded {len(paths)} profile files to S3 under {self.settings.PROFILE_S3_PREFIX}.")
+        except Exception as e:
+            self.logger.warning(f"Could not store the run profiles: {e}")
+
+    def persist_manifest(self) -> None:
+        """
+        Store the run manifest in the database when this run loads, and next to the
+        export (in OUTPUT_DIR or S3) when it exports. A failure to store it never fails the run.
+        """
+        manifest = self.manifest.to_dict()
+        if "load" in self.phases:
+            try:
+                self.db_manager.record_run(manifest)
+            except Exception as e:
+                self.logger.warning(f"Could not record the run manifest in the database: {e}")
+        if "export" in self.phases and self.settings.OUTPUT_DIR:
+            path = os.path.join(self.settings.OUTPUT_DIR, "runs", f"{self.manifest.run_id}.json")
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "w", encoding="utf-8") as manifest_file:
+                    json.dump(manifest, manifest_file, indent=2)
+            except OSError as e:
+                self.logger.warning(f"Could not write the run manifest to {path}: {e}")
+        elif "export" in self.phases and self.settings.S3_BUCKET_NAME:
+            try:
+                self.s3_client.put_object(
+                    Bucket=self.settings.S3_BUCKET_NAME,
+                    Key=f"{self.settings.RUN_MANIFEST_S3_PREFIX}{self.manifest.run_id}.json",
+                    Body=json.dumps(manifest, indent=2),
+                    ContentType="application/json",
+                )
+            except Exception as e:
+                self.logger.warning(f"Could not upload the run manifest to S3: {e}")
@@ -0,0 +1,212 @@
+import argparse
+import json
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List, Optional, Sequence
+from src.scraper.stats import ScrapeStats
+
+# Metrics shown by the compare command, in order
+COMPARED_METRICS = (
+    "duration_seconds",
+    "pages_fetched",
+    "pages_failed",
+    "listings_discovered",
+    "listings_skipped",
+    "listings_deferred",
+    "details_fetched",
+    "details_cached",
+    "details_failed",
+    "records_failed",
+    "bytes_downloaded",
+    "rows_inserted",
+    "rows_updated",
+    "rows_unchanged",
+    "error_count",
+    "failure_rate",
+)
+
+class RunManifest:
+    """
+    What one ETL run did: per-source scrape counters, rows written, stage timings
+    and errors by type.
+
+    The manifest is stored in the ``scrape_runs`` table and next to the S3 export, so
+    runs can be compared over time.
+    """
+
+    def __init__(self, phases: Sequence[str], run_id: Optional[str] = None):
+        self.run_id = run_id or uuid.uuid4().hex
+        self.phases = list(phases)
+        self.started_at = datetime.utcnow()
+        self.finished_at = None
+        self.status = "running"
+        self.timings: Dict[str, float] = {}
+        self.sources: Dict[str, dict] = {}
+        self.rows: Dict[str, int] = {}
+        self.images: Dict[str, int] = {}
+        self.errors = Counter()
+
+    @contextmanager
+    def stage(self, name: str):
+        """Time a stage of the run, in seconds."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round(time.perf_counter() - start, 3)
+
+    def record_error(self, error: BaseException) -> None:
+        self.errors[type(error).__name__] += 1
+
+    def add_source(self, name: str, stats: ScrapeStats, status: str = "completed") -> None:
+        self.sources[name] = dict(stats.to_dict(), status=status)
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.finished_at = datetime.utcnow()
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        if self.finished_at is None:
+            return None
+        return round((self.finished_at - self.started_at).total_seconds(), 3)
+
+    def totals(self) -> dict:
+        """Counters summed over every source, plus row counts and error totals."""
+        totals = dict.fromkeys(ScrapeStats.COUNTERS, 0)
+        errors = Counter(self.errors)
+        for stats in self.sources.values():
+            for name in ScrapeStats.COUNTERS:
+                totals[name] += stats.get(name, 0)
+            errors.update(stats.get("errors", {}))
+        totals["bytes_downloaded"] += self.images.get("bytes_downloaded", 0)
+        for name in ("inserted", "updated", "unchanged"):
+            totals[f"rows_{name}"] = self.rows.get(name, 0)
+        attempted = totals["details_fetched"] + totals["details_cached"] + totals["details_failed"]
+        totals["failure_rate"] = round(totals["details_failed"] / attempted, 4) if attempted else 0.0
+        totals["error_count"] = sum(errors.values())
+        totals["errors"] = dict(errors)
+        return totals
+
+    def to_dict(self) -> dict:
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            "phases": self.phases,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": self.finished_at.isoformat() if self.finished_at else None,
+            "duration_seconds": self.duration_seconds,
+            "timings": self.timings,
+            "sources": self.sources,
+            "rows": self.rows,
+            "images": self.images,
+            "totals": self.totals(),
+        }
+
+    def summary(self) -> dict:
+        """Short form returned by the Lambda handler."""
+        totals = self.totals()
+        return {
+            "run_id": self.run_id,
+            "status": self.status,
+            "duration_seconds": self.duration_seconds,
+            "details_fetched": totals["details_fetched"],
+            "details_failed": totals["details_failed"],
+            "rows_inserted": totals["rows_inserted"],
+            "rows_updated": totals["rows_updated"],
+            "errors": totals["errors"],
+        }
+
+def run_metrics(manifest: dict) -> dict:
+    """Flatten a stored manifest into the metrics compared between runs."""
+    metrics = dict(manifest.get("totals", {}))
+    metrics["duration_seconds"] = manifest.get("duration_seconds")
+    return metrics
+
+def format_comparison(runs: List[dict]) -> str:
+    """Render stored manifests side by side, with the change from the first run."""
+    header = ["metric"] + [run["run_id"][:12] for run in runs] + (["change"] if len(runs) > 1 else [])
+    lines = [header]
+    metrics = [run_metrics(run) for run in runs]
+    for name in COMPARED_METRICS:
+        values = [metric.get(name) for metric in metrics]
+        line = [name] + ["-" if value is None else str(value) for value in values]
+        if len(runs) > 1:
+            first, last = values[0], values[-1]
+            if isinstance(first, (int, float)) and isinstance(last, (int, float)):
+                line.append(f"{last - first:+.4g}" if first == 0 else f"{last - first:+.4g} ({(last - first) / first:+.1%})")
+            else:
+                line.append("-")
+        lines.append(line)
+    timing_names = sorted({name for run in runs for name in run.get("timings", {})})
+    for name in timing_names:
+        lines.append([f"time_{name}"] + [str(run.get("timings", {}).get(name, "-")) for run in runs]
+                     + (["-"] if len(runs) > 1 else []))
+    widths = [max(len(line[column]) for line in lines) for column in range(len(header))]
+    return "\n".join("  ".join(cell.ljust(width) for cell, width in zip(line, widths)) for line in lines)
+
+def format_run_list(runs: List[dict]) -> str:
+    lines = []
+    for run in runs:
+        totals = run.get("totals", {})
+        lines.append(
+            f"{run['run_id']}  {run['started_at']}  {run['status']:<9}  "
+            f"{run.get('duration_seconds') or 0:>8.1f}s  fetched={totals.get('details_fetched', 0)}  "
+            f"failed={totals.get('details_failed', 0)}  failure_rate={totals.get('failure_rate', 0):.2%}  "
+            f"errors={totals.get('error_count', 0)}"
+        )
+    return "\n".join(lines)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Inspect stored run manifests.
+
+    Usage:
+        python -m src.database.manifest list [--limit 20]
+        python -m src.database.manifest show RUN_ID
+        python -m src.database.manifest compare RUN_ID [RUN_ID ...]   (default: the last two runs)
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.database.manifest", description="Inspect ETL run manifests.")
+    parser.add_argument("--database-url", help="SQLAlchemy URL; defaults to the configured database.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    list_parser = commands.add_parser("list", help="List recent runs.")
+    list_parser.add_argument("--limit", type=int, default=20)
+    show_parser = commands.add_parser("show", help="Print the manifest of a run.")
+    show_parser.add_argument("run_id")
+    compare_parser = commands.add_parser("compare", help="Compare runs side by side.")
+    compare_parser.add_argument("run_ids", nargs="*")
+    args = parser.parse_args(argv)
+
+    from src.database.db_manager import DatabaseManager
+    db_manager = DatabaseManager(args.database_url)
+    try:
+        if args.command == "list":
+            print(format_run_list(db_manager.get_runs(limit=args.limit)))
+        elif args.command == "show":
+            manifest = db_manager.get_run(args.run_id)
+            if manifest is None:
+                print(f"Unknown run: {args.run_id}")
+                return 1
+            print(json.dumps(manifest, indent=2))
+        else:
+            if args.run_ids:
+                runs = [db_manager.get_run(run_id) for run_id in args.run_ids]
+                missing = [run_id for run_id, run in zip(args.run_ids, runs) if run is None]
+                if missing:
+                    print(f"Unknown runs: {', '.join(missing)}")
+                    return 1
+            else:
+                runs = list(reversed(db_manager.get_runs(limit=2)))
+            if not runs:
+                print("No runs recorded.")
+                return 1
+            print(format_comparison(runs))
+        return 0
+    finally:
+        db_manager.engine.dispose()
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,4 +1,4 @@
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, Enum, Boolean, TIMESTAMP
+from sqlalchemy import create_engine, or_, Column, Integer, String, Text, ForeignKey, Enum, Boolean, Float, LargeBinary, Numeric, TIMESTAMP
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, relationship
 import enum
@@ -57,7 +57,8 @@ class Bus(Base):
     luggage = Column(Boolean, default=False, nullable=False)
     state_bus_standard = Column(String(25), nullable=True)
     airconditioning = Column(Enum(AirConditioningOptions), default=AirConditioningOptions.NONE, nullable=False)
-    location = Column(String(30), nullable=True)
+    location = Column(String(30), nullable=True)  # As scraped, e.g. "St. Louis, MO"
+    state = Column(String(30), nullable=True, index=True)  # US state parsed from the location
     brake = Column(String(30), nullable=True)
     contact_email = Column(String(100), nullable=True)
     contact_phone = Column(String(100), nullable=True)
@@ -65,10 +66,18 @@ class Bus(Base):
     description = Column(Text, nullable=True)
     score = Column(Boolean, default=False, nullable=False)
     category_id = Column(Integer, default=0, nullable=False)
+    cluster_id = Column(Integer, nullable=True, index=True)  # Id of the listing shown for a group of duplicates
+    # Typed copies of year and price for indexed range filters; filled from the text columns on write
+    year_number = Column(Integer, nullable=True, index=True)
+    price_amount = Column(Numeric(12, 2), nullable=True, index=True)
 
     overview = relationship("BusOverview", back_populates="bus", cascade="all, delete-orphan")
     images = relationship("BusImage", back_populates="bus", cascade="all, delete-orphan")
 
+def representative_listings():
+    """Filter for the buses shown by default: unclustered ones and the shown listing of each cluster."""
+    return or_(Bus.cluster_id.is_(None), Bus.cluster_id == Bus.id)
+
 class BusOverview(Base):
     __tablename__ = 'buses_overview'
 
@@ -77,8 +86,9 @@ class BusOverview(Base):
     mdesc = Column(Text, nullable=True)
     intdesc = Column(Text, nullable=True)
     extdesc = Column(Text, nullable=True)
-    features = Column(Text, nullable=True)
-    specs = Column(Text, nullable=True)
+    features = Column(Text, nullable=True)  # NULL when packed into specs_packed
+    specs = Column(Text, nullable=True)  # NULL when packed into specs_packed
+    specs_packed = Column(LargeBinary, nullable=True)  # See src/database/spec_storage.py
 
     bus = relationship("Bus", back_populates="overview")
 
@@ -90,10 +100,58 @@ class BusImage(Base):
     url = Column(String(1000), nullable=True)
     description = Column(Text, nullable=True)
     image_index = Column(Integer, default=0)
+    storage_key = Column(String(1000), nullable=True)  # S3 key when the image pipeline stored it
     bus_id = Column(Integer, ForeignKey('buses.id'), nullable=False)
 
     bus = relationship("Bus", back_populates="images")
 
+class BusChange(Base):
+    __tablename__ = 'bus_changes'
+
+    # Append-only history: one row per changed field of a bus per load
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    bus_id = Column(Integer, ForeignKey('buses.id'), nullable=False, index=True)
+    source_url = Column(String(1000), nullable=False)
+    field = Column(String(64), nullable=False, index=True)
+    old_value = Column(Text, nullable=True)
+    new_value = Column(Text, nullable=True)
+    changed_at = Column(TIMESTAMP, nullable=False, index=True)
+
+class BusSearchTerm(Base):
+    __tablename__ = 'bus_search_terms'
+
+    # Inverted index: one row per (term, bus); the primary key serves term lookups
+    term = Column(String(64), primary_key=True)
+    bus_id = Column(Integer, ForeignKey('buses.id'), primary_key=True, index=True)
+    weight = Column(Float, nullable=False)  # Field-weighted term frequency
+
+class BusFacetCount(Base):
+    __tablename__ = 'bus_facet_counts'
+
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    facet = Column(String(32), nullable=False, index=True)
+    value = Column(String(100), nullable=True)
+    count = Column(Integer, default=0, nullable=False)
+    computed_at = Column(TIMESTAMP, nullable=False, index=True)  # End of the ETL run that computed the counts
+    version = Column(Integer, nullable=True, index=True)  # Increases with every refresh; the cache key of readers
+
+class ScrapeRun(Base):
+    __tablename__ = 'scrape_runs'
+
+    # One row per ETL run; the full manifest is kept as JSON, the headline metrics as columns
+    id = Column(Integer, primary_key=True, autoincrement=True)
+    run_id = Column(String(32), unique=True, nullable=False)
+    started_at = Column(TIMESTAMP, nullable=False, index=True)
+    finished_at = Column(TIMESTAMP, nullable=True)
+    status = Column(String(16), nullable=False)
+    duration_seconds = Column(Float, nullable=True)
+    details_fetched = Column(Integer, default=0, nullable=False)
+    details_failed = Column(Integer, default=0, nullable=False)
+    rows_inserted = Column(Integer, default=0, nullable=False)
+    rows_updated = Column(Integer, default=0, nullable=False)
+    error_count = Column(Integer, default=0, nullable=False)
+    manifest = Column(Text, nullable=False)
+
 # Database setup
 def get_database_session(connection_string):
     engine = create_engine(connection_string, echo=False)
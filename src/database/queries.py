@@ -0,0 +1,341 @@
+import heapq
+import threading
+import time
+from datetime import datetime
+from decimal import Decimal, InvalidOperation
+from statistics import median
+from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, select
+from sqlalchemy.orm import selectinload
+from .models import AirConditioningOptions, Bus, BusChange, BusFacetCount, BusSearchTerm, USRegion, representative_listings
+from .search_index import query_terms, rank
+from src.scraper.records import BusRecord
+import logging
+
+# Period keys of price_trends()
+TREND_PERIODS = {
+    "day": "%Y-%m-%d",
+    "week": "%G-W%V",
+    "month": "%Y-%m",
+}
+
+def parse_history_price(value: Optional[str]) -> Optional[Decimal]:
+    """Read a price recorded in bus_changes; None for missing or zero prices."""
+    try:
+        price = Decimal(value)
+    except (TypeError, InvalidOperation):
+        return None
+    return price if price > 0 else None
+
+# Page size bounds of search()
+DEFAULT_PAGE_SIZE = 20
+MAX_PAGE_SIZE = 100
+
+class SearchPage:
+    """One page of search results and the cursor of the next page."""
+
+    __slots__ = ("buses", "next_cursor")
+
+    def __init__(self, buses: List[BusRecord], next_cursor: Optional[int]):
+        self.buses = buses
+        self.next_cursor = next_cursor
+
+    def __repr__(self):
+        return f"SearchPage(buses={len(self.buses)}, next_cursor={self.next_cursor})"
+
+class FacetCache:
+    """
+    In-memory facet counts per database, shared by every ``BusQueries`` of a process.
+
+    Cached counts are served for ``ttl`` seconds without touching the database. After
+    that, a single lookup of the latest ``version`` decides whether an ETL run has
+    stored new counts; only then are the counts reloaded.
+    """
+
+    def __init__(self):
+        self.entries = {}
+        self.lock = threading.Lock()
+
+    def get(self, key: str):
+        with self.lock:
+            return self.entries.get(key)
+
+    def put(self, key: str, version, counts: Dict[str, Dict[str, int]]) -> None:
+        with self.lock:
+            self.entries[key] = {"version": version, "counts": counts, "checked_at": time.monotonic()}
+
+    def touch(self, key: str) -> None:
+        with self.lock:
+            if key in self.entries:
+                self.entries[key]["checked_at"] = time.monotonic()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """Drop the counts of one database, or of every database when key is None."""
+        with self.lock:
+            if key is None:
+                self.entries.clear()
+            else:
+                self.entries.pop(key, None)
+
+FACET_CACHE = FacetCache()
+
+def invalidate_facet_cache(engine=None) -> None:
+    """Drop cached facet counts after an ETL run, for one engine's database or all of them."""
+    FACET_CACHE.invalidate(str(engine.url) if engine is not None else None)
+
+class BusQueries:
+    """
+    Read-side queries over the scraped buses.
+
+    Search results are paged with a keyset cursor (the last bus id) rather than
+    OFFSET, so every page costs the same however deep the client pages. Facet counts
+    come from the ``bus_facet_counts`` table written at the end of each ETL run.
+    """
+
+    def __init__(self, db_manager=None, cache: Optional[FacetCache] = None, ttl: Optional[float] = None):
+        if db_manager is None:
+            from .db_manager import DatabaseManager
+            db_manager = DatabaseManager()
+        if ttl is None:
+            from config.settings import Settings
+            ttl = Settings.FACET_CACHE_TTL
+        self.db_manager = db_manager
+        self.Session = db_manager.Session
+        self.cache = cache or FACET_CACHE
+        self.cache_key = str(db_manager.engine.url)
+        self.ttl = ttl
+        self.logger = logging.getLogger(__name__)
+
+    def search(self, make: Optional[str] = None, year_min: Optional[int] = None, year_max: Optional[int] = None,
+               price_min: Optional[float] = None, price_max: Optional[float] = None, region: Optional[str] = None,
+               wheelchair: Optional[str] = None, airconditioning: Optional[str] = None,
+               cursor: Optional[int] = None, limit: int = DEFAULT_PAGE_SIZE,
+               collapse_duplicates: bool = True) -> SearchPage:
+        """
+        Search buses by facet, newest first.
+
+        Args:
+            make (Optional[str]): Exact make, as listed in the ``make`` facet.
+            year_min (Optional[int]): Lowest model year, inclusive.
+            year_max (Optional[int]): Highest model year, inclusive.
+            price_min (Optional[float]): Lowest price, inclusive.
+            price_max (Optional[float]): Highest price, inclusive.
+            region (Optional[str]): US region name, e.g. ``MIDWEST``.
+            wheelchair (Optional[str]): Exact wheelchair value, as listed in its facet.
+            airconditioning (Optional[str]): Air conditioning option, e.g. ``REAR``.
+            cursor (Optional[int]): ``next_cursor`` of the previous page.
+            limit (int): Page size, capped at ``MAX_PAGE_SIZE``.
+            collapse_duplicates (bool): Show only one listing per cluster of duplicates.
+
+        Returns:
+            SearchPage: Matching buses with their overview and images, and the cursor
+                of the next page (None on the last page).
+        """
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        stmt = select(Bus).options(selectinload(Bus.overview), selectinload(Bus.images))
+        if make:
+            stmt = stmt.where(Bus.make == make)
+        # Range filters use the typed, indexed copies of year and price
+        if year_min is not None:
+            stmt = stmt.where(Bus.year_number >= year_min)
+        if year_max is not None:
+            stmt = stmt.where(Bus.year_number <= year_max)
+        if price_min is not None:
+            stmt = stmt.where(Bus.price_amount >= price_min)
+        if price_max is not None:
+            stmt = stmt.where(Bus.price_amount <= price_max)
+        if region:
+            stmt = stmt.where(Bus.us_region == self._enum_member(USRegion, region))
+        if wheelchair:
+            stmt = stmt.where(Bus.wheelchair == wheelchair)
+        if airconditioning:
+            stmt = stmt.where(Bus.airconditioning == self._enum_member(AirConditioningOptions, airconditioning))
+        if collapse_duplicates:
+            stmt = stmt.where(representative_listings())
+        if cursor is not None:
+            stmt = stmt.where(Bus.id < cursor)
+        # Fetch one extra row to know whether another page follows
+        stmt = stmt.order_by(Bus.id.desc()).limit(limit + 1)
+
+        session = self.Session()
+        try:
+            buses = session.scalars(stmt).all()
+            records = [BusRecord.from_model(bus) for bus in buses[:limit]]
+            next_cursor = buses[limit - 1].id if len(buses) > limit else None
+        finally:
+            session.close()
+        return SearchPage(records, next_cursor)
+
+    def search_text(self, query: str, limit: int = DEFAULT_PAGE_SIZE) -> List[Tuple[BusRecord, float]]:
+        """
+        Full-text search over titles, models, descriptions and specs, best match first.
+
+        Terms are looked up in the ``bus_search_terms`` inverted index by primary key,
+        so the cost grows with the number of matching postings, not with the catalogue.
+        ``key:value`` terms such as ``air_conditioning:rear`` match one spec field.
+
+        Args:
+            query (str): Free-text query.
+            limit (int): Maximum number of results, capped at ``MAX_PAGE_SIZE``.
+
+        Returns:
+            List[Tuple[BusRecord, float]]: Matching buses with their BM25 scores.
+        """
+        terms = query_terms(query)
+        if not terms:
+            return []
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+
+        session = self.Session()
+        try:
+            postings = session.execute(
+                select(BusSearchTerm.bus_id, BusSearchTerm.term, BusSearchTerm.weight)
+                .where(BusSearchTerm.term.in_(terms))
+            ).all()
+            if not postings:
+                return []
+            document_frequencies = {}
+            for _, term, _ in postings:
+                document_frequencies[term] = document_frequencies.get(term, 0) + 1
+            total_documents = session.scalar(select(func.count(Bus.id)))
+            scores = rank(postings, document_frequencies, total_documents)
+            top = heapq.nlargest(limit, scores.items(), key=lambda item: (item[1], item[0]))
+
+            buses = session.scalars(
+                select(Bus)
+                .options(selectinload(Bus.overview), selectinload(Bus.images))
+                .where(Bus.id.in_([bus_id for bus_id, _ in top]))
+            ).all()
+            records = {bus.id: BusRecord.from_model(bus) for bus in buses}
+        finally:
+            session.close()
+        return [(records[bus_id], score) for bus_id, score in top if bus_id in records]
+
+    def price_history(self, source_url: str) -> List[Tuple[datetime, Optional[Decimal]]]:
+        """
+        Prices a bus was listed at, oldest first.
+
+        Args:
+            source_url (str): The bus's listing URL.
+
+        Returns:
+            List[Tuple[datetime, Optional[Decimal]]]: Load time and price of every price
+                change, starting with the price of its first load.
+        """
+        session = self.Session()
+        try:
+            rows = session.execute(
+                select(BusChange.changed_at, BusChange.new_value)
+                .join(Bus, Bus.id == BusChange.bus_id)
+                .where(Bus.source_url == source_url)
+                .where(BusChange.field == "price")
+                .order_by(BusChange.changed_at, BusChange.id)
+            ).all()
+        finally:
+            session.close()
+        return [(changed_at, parse_history_price(value)) for changed_at, value in rows]
+
+    def price_trends(self, period: str = "month", make: Optional[str] = None,
+                     since: Optional[datetime] = None) -> List[dict]:
+        """
+        Market-level asking price trends from the price change history.
+
+        Args:
+            period (str): ``day``, ``week`` or ``month``.
+            make (Optional[str]): Only buses of this make.
+            since (Optional[datetime]): Only changes from this time on.
+
+        Returns:
+            List[dict]: One entry per period, oldest first, with ``period``, ``listings``
+                (distinct buses with a recorded price), ``changes`` (prices recorded),
+                ``median_price``, ``average_price``, ``drops`` and ``increases``.
+        """
+        if period not in TREND_PERIODS:
+            raise ValueError(f"Unknown period: {period}. Available periods: {', '.join(TREND_PERIODS)}")
+        stmt = (
+            select(BusChange.bus_id, BusChange.changed_at, BusChange.old_value, BusChange.new_value)
+            .where(BusChange.field == "price")
+            .order_by(BusChange.changed_at)
+        )
+        if make:
+            stmt = stmt.join(Bus, Bus.id == BusChange.bus_id).where(Bus.make == make)
+        if since is not None:
+            stmt = stmt.where(BusChange.changed_at >= since)
+
+        periods = {}
+        session = self.Session()
+        try:
+            for bus_id, changed_at, old_value, new_value in session.execute(stmt).yield_per(1000):
+                new_price = parse_history_price(new_value)
+                if new_price is None:
+                    continue
+                entry = periods.setdefault(
+                    changed_at.strftime(TREND_PERIODS[period]), {"buses": set(), "prices": [], "drops": 0, "increases": 0}
+                )
+                entry["buses"].add(bus_id)
+                entry["prices"].append(new_price)
+                old_price = parse_history_price(old_value)
+                # First prices and unchanged or unparseable old prices are neither
+                if old_price is not None and new_price != old_price:
+                    entry["drops" if new_price < old_price else "increases"] += 1
+        finally:
+            session.close()
+        return [
+            {
+                "period": key,
+                "listings": len(entry["buses"]),
+                "changes": len(entry["prices"]),
+                "median_price": median(entry["prices"]),
+                "average_price": (sum(entry["prices"]) / len(entry["prices"])).quantize(Decimal("0.01")),
+                "drops": entry["drops"],
+                "increases": entry["increases"],
+            }
+            for key, entry in periods.items()
+        ]
+
+    def facet_counts(self) -> Dict[str, Dict[str, int]]:
+        """
+        Bus counts per facet value over the whole table, as of the last ETL run.
+
+        Returns:
+            Dict[str, Dict[str, int]]: Counts per value of ``make``, ``year``,
+                ``us_region``, ``airconditioning``, ``wheelchair`` and ``price`` (buckets).
+        """
+        entry = self.cache.get(self.cache_key)
+        if entry is not None and time.monotonic() - entry["checked_at"] < self.ttl:
+            return entry["counts"]
+
+        session = self.Session()
+        try:
+            # Counts stored before the version column existed have no version; their
+            # computed_at still tells them apart
+            version = tuple(session.execute(
+                select(func.max(BusFacetCount.version), func.max(BusFacetCount.computed_at))
+            ).one())
+            if entry is not None and entry["version"] == version:
+                self.cache.touch(self.cache_key)
+                return entry["counts"]
+
+            if version == (None, None):
+                # No ETL run has stored counts yet
+                counts = self.db_manager.compute_facet_counts()
+            else:
+                counts = {}
+                rows = session.execute(
+                    select(BusFacetCount.facet, BusFacetCount.value, BusFacetCount.count)
+                    .order_by(BusFacetCount.facet, BusFacetCount.count.desc())
+                )
+                for facet, value, count in rows:
+                    counts.setdefault(facet, {})[value] = count
+        finally:
+            session.close()
+        self.cache.put(self.cache_key, version, counts)
+        self.logger.info(f"Loaded facet counts computed at {version}.")
+        return counts
+
+    @staticmethod
+    def _enum_member(enum_class, value: str):
+        member = enum_class.__members__.get(str(value).upper())
+        if member is None:
+            raise ValueError(f"Unknown {enum_class.__name__} value: {value}")
+        return member
@@ -44,14 +44,23 @@ CREATE TABLE `buses` (
   `description` LONGTEXT DEFAULT NULL,
   `score` TINYINT(1) DEFAULT 0,
   `category_id` INT DEFAULT 0,
+  `cluster_id` INT DEFAULT NULL,
+  `year_number` INT DEFAULT NULL,
+  `price_amount` DECIMAL(12,2) DEFAULT NULL,
+  `state` VARCHAR(30) DEFAULT NULL,
   PRIMARY KEY (`id`),
+  UNIQUE KEY `uq_bus_source_url` (`source_url`(768)),
   KEY `idx_bus_year` (`year`),
   KEY `idx_bus_make` (`make`),
   KEY `idx_bus_model` (`model`),
   KEY `idx_bus_price` (`price`),
   KEY `idx_bus_mileage` (`mileage`),
   KEY `idx_bus_location` (`location`),
-  KEY `idx_bus_us_region` (`us_region`)
+  KEY `idx_bus_us_region` (`us_region`),
+  KEY `idx_bus_cluster_id` (`cluster_id`),
+  KEY `idx_bus_year_number` (`year_number`),
+  KEY `idx_bus_price_amount` (`price_amount`),
+  KEY `idx_bus_state` (`state`)
 ) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
 
 -- Table: buses_overview (Additional Information)
@@ -63,6 +72,7 @@ CREATE TABLE `buses_overview` (
   `extdesc` LONGTEXT DEFAULT NULL,
   `features` LONGTEXT DEFAULT NULL,
   `specs` LONGTEXT DEFAULT NULL,
+  `specs_packed` BLOB DEFAULT NULL,
   PRIMARY KEY (`id`),
   KEY `busId` (`bus_id`),
   CONSTRAINT `buses_overview_ibfk_1` FOREIGN KEY (`bus_id`) REFERENCES `buses` (`id`)
@@ -75,8 +85,78 @@ CREATE TABLE `buses_images` (
   `url` VARCHAR(1000) DEFAULT NULL,
   `description` LONGTEXT DEFAULT NULL,
   `image_index` INT DEFAULT 0,
+  `storage_key` VARCHAR(1000) DEFAULT NULL,
   `bus_id` INT NOT NULL,
   PRIMARY KEY (`id`),
   KEY `busId` (`bus_id`) USING BTREE,
   CONSTRAINT `buses_images_ibfk_1` FOREIGN KEY (`bus_id`) REFERENCES `buses` (`id`)
-) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
\ No newline at end of file
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
+
+-- Table: bus_changes (Append-only history of changed bus fields)
+CREATE TABLE `bus_changes` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `bus_id` INT NOT NULL,
+  `source_url` VARCHAR(1000) NOT NULL,
+  `field` VARCHAR(64) NOT NULL,
+  `old_value` TEXT DEFAULT NULL,
+  `new_value` TEXT DEFAULT NULL,
+  `changed_at` TIMESTAMP NOT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_bus_changes_bus` (`bus_id`, `changed_at`),
+  KEY `idx_bus_changes_field` (`field`, `changed_at`),
+  CONSTRAINT `bus_changes_ibfk_1` FOREIGN KEY (`bus_id`) REFERENCES `buses` (`id`)
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
+
+-- Table: bus_search_terms (Inverted full-text index, updated by each ETL load)
+CREATE TABLE `bus_search_terms` (
+  `term` VARCHAR(64) NOT NULL,
+  `bus_id` INT NOT NULL,
+  `weight` FLOAT NOT NULL,
+  PRIMARY KEY (`term`, `bus_id`),
+  KEY `busId` (`bus_id`),
+  CONSTRAINT `bus_search_terms_ibfk_1` FOREIGN KEY (`bus_id`) REFERENCES `buses` (`id`)
+) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_bin;
+
+-- Table: bus_facet_counts (Search facet counts, recomputed by each ETL run)
+CREATE TABLE `bus_facet_counts` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `facet` VARCHAR(32) NOT NULL,
+  `value` VARCHAR(100) DEFAULT NULL,
+  `count` INT NOT NULL DEFAULT 0,
+  `computed_at` TIMESTAMP NOT NULL,
+  `version` INT DEFAULT NULL,
+  PRIMARY KEY (`id`),
+  KEY `idx_facet` (`facet`),
+  KEY `idx_facet_computed_at` (`computed_at`),
+  KEY `idx_facet_version` (`version`)
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
+
+-- Table: scrape_runs (Run manifest of each ETL run)
+CREATE TABLE `scrape_runs` (
+  `id` INT NOT NULL AUTO_INCREMENT,
+  `run_id` VARCHAR(32) NOT NULL,
+  `started_at` TIMESTAMP NOT NULL,
+  `finished_at` TIMESTAMP NULL DEFAULT NULL,
+  `status` VARCHAR(16) NOT NULL,
+  `duration_seconds` FLOAT DEFAULT NULL,
+  `details_fetched` INT NOT NULL DEFAULT 0,
+  `details_failed` INT NOT NULL DEFAULT 0,
+  `rows_inserted` INT NOT NULL DEFAULT 0,
+  `rows_updated` INT NOT NULL DEFAULT 0,
+  `error_count` INT NOT NULL DEFAULT 0,
+  `manifest` MEDIUMTEXT NOT NULL,
+  PRIMARY KEY (`id`),
+  UNIQUE KEY `run_id` (`run_id`),
+  KEY `idx_scrape_runs_started_at` (`started_at`)
+) ENGINE=InnoDB AUTO_INCREMENT=1 DEFAULT CHARSET=utf8mb4;
+
+-- Upgrading a database created before these columns existed (DatabaseManager also
+-- adds missing nullable columns on startup):
+-- ALTER TABLE `buses` ADD COLUMN `cluster_id` INT DEFAULT NULL, ADD KEY `idx_bus_cluster_id` (`cluster_id`);
+-- ALTER TABLE `buses` ADD COLUMN `year_number` INT DEFAULT NULL, ADD KEY `idx_bus_year_number` (`year_number`);
+-- ALTER TABLE `buses` ADD COLUMN `price_amount` DECIMAL(12,2) DEFAULT NULL, ADD KEY `idx_bus_price_amount` (`price_amount`);
+-- ALTER TABLE `buses` ADD COLUMN `state` VARCHAR(30) DEFAULT NULL, ADD KEY `idx_bus_state` (`state`);
+-- (then run DatabaseManager().fill_derived_bus_columns() to fill them for stored rows)
+-- ALTER TABLE `buses_overview` ADD COLUMN `specs_packed` BLOB DEFAULT NULL;
+-- ALTER TABLE `bus_facet_counts` ADD COLUMN `version` INT DEFAULT NULL, ADD KEY `idx_facet_version` (`version`);
+-- ALTER TABLE `buses_images` ADD COLUMN `storage_key` VARCHAR(1000) DEFAULT NULL;
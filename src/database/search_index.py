@@ -0,0 +1,137 @@
+import json
+import math
+import re
+from collections import Counter
+from typing import Dict, Iterable, List, Optional
+
+# Lowercase words and numbers; decimals like "6.7" stay one token
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:\.[0-9]+)?")
+# "key:value" query terms target one spec field, e.g. "capacity:14"
+FIELD_TERM_PATTERN = re.compile(r"([a-z0-9_]+):([a-z0-9.]+)")
+STOPWORDS = frozenset((
+    "a", "an", "and", "are", "as", "at", "be", "by", "for", "from", "in", "is", "it", "of", "on", "or",
+    "the", "this", "to", "with",
+))
+# Longest term stored in bus_search_terms.term
+MAX_TERM_LENGTH = 64
+
+# Relative weight of a term occurrence per indexed field
+FIELD_WEIGHTS = {
+    "title": 3.0,
+    "model": 2.0,
+    "specs": 1.5,
+    "mdesc": 1.0,
+    "features": 1.0,
+}
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Split text into lowercase search terms, without stopwords.
+
+    Args:
+        text (Optional[str]): Free text.
+
+    Returns:
+        List[str]: Terms in text order, repeated terms included.
+    """
+    if not text:
+        return []
+    return [
+        token for token in TOKEN_PATTERN.findall(text.lower())
+        if token not in STOPWORDS and len(token) <= MAX_TERM_LENGTH
+    ]
+
+def spec_terms(specs_json: Optional[str]) -> List[str]:
+    """
+    Tokenize a spec JSON object.
+
+    Keys and values are tokenized like free text. Each value term is also indexed as
+    ``key:value`` (key words joined by underscores), so queries can target one spec,
+    e.g. ``air_conditioning:rear``.
+
+    Args:
+        specs_json (Optional[str]): JSON object as stored in buses_overview.specs.
+
+    Returns:
+        List[str]: Terms of the keys, the values and the key:value pairs.
+    """
+    if not specs_json:
+        return []
+    try:
+        specs = json.loads(specs_json)
+    except ValueError:
+        return tokenize(specs_json)
+    if not isinstance(specs, dict):
+        return tokenize(str(specs))
+
+    terms = []
+    for key, value in specs.items():
+        key_terms = tokenize(str(key))
+        value_terms = tokenize(str(value)) if value is not None else []
+        terms.extend(key_terms)
+        terms.extend(value_terms)
+        field = "_".join(key_terms)
+        if field:
+            terms.extend(
+                f"{field}:{term}" for term in value_terms if len(field) + len(term) < MAX_TERM_LENGTH
+            )
+    return terms
+
+def document_terms(title: Optional[str], model: Optional[str], mdesc: Optional[str] = None,
+                   specs: Optional[str] = None, features: Optional[str] = None) -> Dict[str, float]:
+    """
+    Weighted term frequencies of one bus.
+
+    Args:
+        title, model (Optional[str]): Bus columns.
+        mdesc, specs, features (Optional[str]): Overview columns; specs and features hold JSON.
+
+    Returns:
+        Dict[str, float]: Sum of field weights over every occurrence of each term.
+    """
+    weights = Counter()
+    fields = [("title", tokenize(title)), ("model", tokenize(model)), ("mdesc", tokenize(mdesc)),
+              ("specs", spec_terms(specs))]
+    # Features usually repeat the specs JSON; only index them when they differ
+    if features and features != specs:
+        fields.append(("features", spec_terms(features)))
+    for field, terms in fields:
+        for term in terms:
+            weights[term] += FIELD_WEIGHTS[field]
+    return dict(weights)
+
+def query_terms(query: str) -> List[str]:
+    """
+    Parse a search query into distinct index terms.
+
+    ``key:value`` pairs are kept whole; everything else is tokenized like indexed text.
+    """
+    query = query.lower()
+    terms = [f"{key}:{value}" for key, value in FIELD_TERM_PATTERN.findall(query)]
+    terms.extend(tokenize(FIELD_TERM_PATTERN.sub(" ", query)))
+    return list(dict.fromkeys(terms))
+
+def bm25_weight(weight: float, k1: float = 1.2) -> float:
+    """Saturate a weighted term frequency so repeated terms add diminishing score."""
+    return weight * (k1 + 1) / (weight + k1)
+
+def rank(postings: Iterable, document_frequencies: Dict[str, int], total_documents: int) -> Dict[int, float]:
+    """
+    Score documents with BM25 (without length normalization).
+
+    Args:
+        postings (Iterable): ``(bus_id, term, weight)`` rows of the query terms.
+        document_frequencies (Dict[str, int]): Number of buses containing each term.
+        total_documents (int): Number of indexed buses.
+
+    Returns:
+        Dict[int, float]: Score per bus id.
+    """
+    idf = {
+        term: math.log(1 + (total_documents - df + 0.5) / (df + 0.5))
+        for term, df in document_frequencies.items()
+    }
+    scores = {}
+    for bus_id, term, weight in postings:
+        scores[bus_id] = scores.get(bus_id, 0.0) + idf.get(term, 0.0) * bm25_weight(weight)
+    return scores
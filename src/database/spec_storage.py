@@ -0,0 +1,137 @@
+import argparse
+import json
+import sys
+import zlib
+from typing import List, Optional, Tuple
+
+# Packed blobs start with the format version; the shared dictionary of a version must
+# never change, since stored rows can only be inflated with the dictionary they used.
+FORMAT_VERSION = 1
+# Flag set when the features JSON equals the specs JSON and is stored once
+FEATURES_SAME_AS_SPECS = 1
+# Strings longer than this are not interned when specs are read back
+MAX_INTERNED_LENGTH = 64
+
+# Spec keys and frequent values of the listings, in the JSON layout written by the
+# source adapters. zlib references earlier text of the dictionary like earlier text of
+# the blob itself, so each row only stores what is specific to it. The most frequent
+# substrings come last, where back references are shortest.
+SPEC_DICTIONARIES = {
+    1: (
+        '"manufacturer_warranty_remaining": false, "brake": "Hydraulic", "brake": "Air", '
+        '"gvwr": "14,500 lbs", "gvwr": "26,000 lbs", "interior_color": "Gray", "exterior_color": "White", '
+        '"color": "Yellow", "color": "White", "body": "ElDorado", "body": "Glaval", "body": "Champion", '
+        '"body": "StarTrans", "body": "Turtle Top", "body": "Blue Bird", "body": "Thomas", "body": "IC Bus", '
+        '"chassis": "Freightliner", "chassis": "International", "chassis": "Chevrolet", "chassis": "Ford", '
+        '"transmission": "Allison", "transmission": "Automatic", "fuel_type": "Gas", "fuel_type": "Diesel", '
+        '"location": "Texas", "location": "California", "location": "Florida", "location": "Missouri", '
+        '"model": "E450", "model": "F550", "model": "Express 4500", "model": "Transit", "model": "M2", '
+        '"make": "Chevrolet", "make": "Freightliner", "make": "International", "make": "Ford", '
+        '"engine": "6.8L", "engine": "6.7L", "engine": "6.6L", "price": , "year": "20", '
+        '"wheel_chair_accessible": true, "wheel_chair_accessible": false, '
+        '"air_conditioning": true, "air_conditioning": false, "capacity": , "mileage": , '
+        '{"make": "Ford", "model": "'
+    ).encode("utf-8"),
+}
+
+def pack_specs(specs: Optional[str], features: Optional[str]) -> Optional[bytes]:
+    """
+    Pack the specs and features JSON of an overview into one compressed blob.
+
+    Args:
+        specs (Optional[str]): Specs JSON as produced by the source adapter.
+        features (Optional[str]): Features JSON; usually the same text as ``specs``.
+
+    Returns:
+        Optional[bytes]: ``version, flags, zlib stream``, or None when both are None.
+    """
+    if specs is None and features is None:
+        return None
+    if features == specs:
+        flags, text = FEATURES_SAME_AS_SPECS, specs
+    else:
+        flags, text = 0, json.dumps([specs, features])
+    compressor = zlib.compressobj(level=9, zdict=SPEC_DICTIONARIES[FORMAT_VERSION])
+    return bytes((FORMAT_VERSION, flags)) + compressor.compress(text.encode("utf-8")) + compressor.flush()
+
+def unpack_specs(blob: bytes) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Reconstruct the specs and features JSON of a packed blob.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: ``(specs, features)`` as they were packed.
+    """
+    version, flags = blob[0], blob[1]
+    dictionary = SPEC_DICTIONARIES.get(version)
+    if dictionary is None:
+        raise ValueError(f"Unknown packed specs format version: {version}")
+    decompressor = zlib.decompressobj(zdict=dictionary)
+    text = (decompressor.decompress(blob[2:]) + decompressor.flush()).decode("utf-8")
+    if flags & FEATURES_SAME_AS_SPECS:
+        return text, text
+    specs, features = json.loads(text)
+    return specs, features
+
+def pack_overview_row(row: dict) -> dict:
+    """Copy of a buses_overview row with specs and features moved into ``specs_packed``."""
+    packed = dict(row)
+    packed["specs_packed"] = pack_specs(packed.pop("specs", None), packed.pop("features", None))
+    packed["specs"] = packed["features"] = None
+    return packed
+
+def overview_specs(overview) -> Tuple[Optional[str], Optional[str]]:
+    """
+    Specs and features JSON of a ``BusOverview``, whether it is packed or a legacy JSON row.
+
+    Returns:
+        Tuple[Optional[str], Optional[str]]: ``(specs, features)``.
+    """
+    packed = getattr(overview, "specs_packed", None)
+    if packed is not None:
+        return unpack_specs(packed)
+    return overview.specs, overview.features
+
+def _intern_pairs(pairs):
+    return {
+        sys.intern(key): sys.intern(value) if isinstance(value, str) and len(value) <= MAX_INTERNED_LENGTH else value
+        for key, value in pairs
+    }
+
+def load_specs(specs_json: Optional[str]) -> dict:
+    """
+    Parse specs JSON into a dict whose keys and short values are interned.
+
+    Thousands of listings share the same keys and values like ``Ford`` or ``Diesel``;
+    interning keeps one string object per distinct value when many rows are read.
+    """
+    if not specs_json:
+        return {}
+    specs = json.loads(specs_json, object_pairs_hook=_intern_pairs)
+    return specs if isinstance(specs, dict) else {}
+
+def read_specs(overview) -> dict:
+    """Specs of a ``BusOverview`` (packed or legacy) as a dict."""
+    return load_specs(overview_specs(overview)[0])
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """
+    Pack the overview rows loaded before packed specs were enabled.
+
+    Usage:
+        python -m src.database.spec_storage [--database-url URL]
+    """
+    parser = argparse.ArgumentParser(prog="python -m src.database.spec_storage",
+                                     description="Pack the specs of overview rows stored as JSON.")
+    parser.add_argument("--database-url", help="SQLAlchemy URL; defaults to the configured database.")
+    args = parser.parse_args(argv)
+
+    from src.database.db_manager import DatabaseManager
+    db_manager = DatabaseManager(args.database_url)
+    try:
+        print(f"Packed {db_manager.pack_stored_overviews()} overview rows.")
+    finally:
+        db_manager.engine.dispose()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,198 @@
+import cProfile
+import heapq
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+# Slowest calls kept per timed operation, and allocation sites written
+TOP_SLOWEST = 25
+TOP_ALLOCATIONS = 50
+
+class StackSampler(threading.Thread):
+    """
+    Wall-clock sampling profiler covering every thread.
+
+    Every ``interval`` seconds the stack of each thread is recorded, so worker pool
+    threads (where detail pages are fetched and parsed) show up alongside the main
+    thread. Stacks are kept in the collapsed format read by flamegraph.pl and speedscope.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        super().__init__(name="stack-sampler", daemon=True)
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self) -> None:
+        own_id = threading.get_ident()
+        while not self.stopped.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                self.stacks[";".join(reversed(stack))] += 1
+
+    def stop(self) -> None:
+        self.stopped.set()
+        self.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+class NullProfiler:
+    """Profiler used when profiling is off; every hook is a no-op."""
+
+    enabled = False
+
+    @contextmanager
+    def section(self, name: str):
+        yield
+
+    @contextmanager
+    def timed(self, name: str, label: str, size: Optional[int] = None):
+        yield
+
+    def start(self) -> None:
+        pass
+
+    def stop(self) -> None:
+        pass
+
+NULL_PROFILER = NullProfiler()
+
+class RunProfiler:
+    """
+    Opt-in profiling of one ETL run.
+
+    - ``section(name)`` runs a named stage under cProfile; calls of the same section
+      accumulate into one ``<name>.pstats`` file. Only one section is profiled at a
+      time, since cProfile cannot run in several threads at once on every Python
+      version; concurrent sections are still covered by the sampler.
+    - ``timed(name, label)`` keeps the slowest calls of a hot operation with a label
+      (e.g. the URL of a slow detail page).
+    - A StackSampler records flamegraph-ready stacks of all threads, and tracemalloc
+      the top allocation sites, between ``start()`` and ``stop()``.
+    """
+
+    enabled = True
+
+    def __init__(self, sample_interval: float = 0.01, trace_allocations: bool = True):
+        self.sample_interval = sample_interval
+        self.trace_allocations = trace_allocations
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.timings: Dict[str, dict] = {}
+        self.sampler = None
+        self.allocations = None
+        self.peak_memory = None
+        self.profiling = False
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def start(self) -> None:
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        self.sampler = StackSampler(self.sample_interval)
+        self.sampler.start()
+
+    def stop(self) -> None:
+        if self.sampler is not None and self.sampler.is_alive():
+            self.sampler.stop()
+        if self.trace_allocations and tracemalloc.is_tracing():
+            self.allocations = tracemalloc.take_snapshot().statistics("lineno")[:TOP_ALLOCATIONS]
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+
+    @contextmanager
+    def section(self, name: str):
+        with self.lock:
+            profile = None
+            if not self.profiling:
+                self.profiling = True
+                profile = self.profiles.setdefault(name, cProfile.Profile())
+        if profile is None:
+            yield
+            return
+        profile.enable()
+        try:
+            yield
+        finally:
+            profile.disable()
+            with self.lock:
+                self.profiling = False
+
+    @contextmanager
+    def timed(self, name: str, label: str, size: Optional[int] = None):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self.lock:
+                timing = self.timings.setdefault(name, {"calls": 0, "total_seconds": 0.0, "slowest": []})
+                timing["calls"] += 1
+                timing["total_seconds"] += elapsed
+                # The call number breaks ties so labels and sizes are never compared
+                call = (elapsed, timing["calls"], label, size)
+                if len(timing["slowest"]) < TOP_SLOWEST:
+                    heapq.heappush(timing["slowest"], call)
+                elif call > timing["slowest"][0]:
+                    heapq.heapreplace(timing["slowest"], call)
+
+    def write(self, directory: str) -> List[str]:
+        """
+        Write the collected profiles to a directory.
+
+        Returns:
+            List[str]: Paths of the written files: ``<section>.pstats``, ``stacks.collapsed``,
+                ``allocations.txt`` and ``timings.json``.
+        """
+        os.makedirs(directory, exist_ok=True)
+        paths = []
+        for name, profile in self.profiles.items():
+            path = os.path.join(directory, f"{name}.pstats")
+            profile.dump_stats(path)
+            paths.append(path)
+
+        if self.sampler is not None:
+            path = os.path.join(directory, "stacks.collapsed")
+            with open(path, "w", encoding="utf-8") as stacks_file:
+                stacks_file.write(self.sampler.collapsed())
+            paths.append(path)
+
+        if self.allocations is not None:
+            path = os.path.join(directory, "allocations.txt")
+            with open(path, "w", encoding="utf-8") as allocations_file:
+                allocations_file.write(f"Peak traced memory: {self.peak_memory} bytes\n")
+                for statistic in self.allocations:
+                    allocations_file.write(f"{statistic}\n")
+            paths.append(path)
+
+        if self.timings:
+            path = os.path.join(directory, "timings.json")
+            timings = {
+                name: {
+                    "calls": timing["calls"],
+                    "total_seconds": round(timing["total_seconds"], 6),
+                    "slowest": [
+                        {"seconds": round(elapsed, 6), "label": label, "size": size}
+                        for elapsed, _, label, size in sorted(timing["slowest"], reverse=True)
+                    ],
+                }
+                for name, timing in self.timings.items()
+            }
+            with open(path, "w", encoding="utf-8") as timings_file:
+                json.dump(timings, timings_file, indent=2)
+            paths.append(path)
+        self.logger.info(f"Wrote {len(paths)} profile files to {directory}.")
+        return paths
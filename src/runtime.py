@@ -0,0 +1,69 @@
+import logging
+import threading
+from typing import Dict
+
+class RuntimeContext:
+    """
+    Clients that live as long as the process and are reused across warm invocations.
+
+    A Lambda container serves many invocations; creating the database engine (and
+    running ``create_all``), the boto3 client and the HTTP connection pools once per
+    container instead of once per invocation leaves only the run itself per call.
+    ``check_health()`` runs at the start of each invocation and resets only the
+    clients that stopped working, e.g. after the database closed idle connections.
+    """
+
+    def __init__(self):
+        self.db_managers: Dict[str, object] = {}
+        self.s3_clients: Dict[str, object] = {}
+        # host -> pooled requests.Session, shared by the per-run schedulers
+        self.http_sessions: Dict[str, object] = {}
+        self.invocations = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    def db_manager(self, database_url: str):
+        """Database manager of a URL, created on first use."""
+        with self.lock:
+            if database_url not in self.db_managers:
+                from src.database.db_manager import DatabaseManager
+                self.db_managers[database_url] = DatabaseManager(database_url)
+            return self.db_managers[database_url]
+
+    def s3_client(self, region: str):
+        """S3 client of a region, created on first use."""
+        with self.lock:
+            if region not in self.s3_clients:
+                import boto3
+                self.s3_clients[region] = boto3.client("s3", region_name=region)
+            return self.s3_clients[region]
+
+    def check_health(self) -> Dict[str, str]:
+        """
+        Ping the reused database engines and reset the broken ones.
+
+        A failing engine first drops its pooled connections and is pinged again; only
+        if that fails too is the manager discarded, so the next use creates a new one.
+
+        Returns:
+            Dict[str, str]: ``ok``, ``reconnected`` or ``reset`` per database, by URL
+                with the password hidden.
+        """
+        from sqlalchemy.engine import make_url
+        self.invocations += 1
+        health = {}
+        with self.lock:
+            for database_url, db_manager in list(self.db_managers.items()):
+                name = make_url(database_url).render_as_string(hide_password=True)
+                if db_manager.ping():
+                    health[name] = "ok"
+                    continue
+                db_manager.engine.dispose()
+                if db_manager.ping():
+                    health[name] = "reconnected"
+                    self.logger.warning(f"Dropped stale connections of {name}.")
+                    continue
+                del self.db_managers[database_url]
+                health[name] = "reset"
+                self.logger.warning(f"Discarded the database manager of {name}; it is recreated on next use.")
+        return health
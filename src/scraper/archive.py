@@ -0,0 +1,98 @@
+import gzip
+import hashlib
+import json
+import logging
+import os
+from datetime import datetime
+from typing import Iterator, Optional
+
+# Snapshot keys: <source>/<sha1 of the URL>/<fetch time>.json.gz, so the latest fetch
+# of a URL sorts last among its snapshots
+TIMESTAMP_FORMAT = "%Y%m%dT%H%M%S%fZ"
+SNAPSHOT_SUFFIX = ".json.gz"
+
+def snapshot_key(source: str, url: str, fetched_at: datetime) -> str:
+    url_hash = hashlib.sha1(url.encode("utf-8")).hexdigest()
+    return f"{source}/{url_hash}/{fetched_at.strftime(TIMESTAMP_FORMAT)}{SNAPSHOT_SUFFIX}"
+
+def encode_snapshot(source: str, entry: dict, html: str, fetched_at: datetime) -> bytes:
+    """Gzip a detail page together with the listing entry it was fetched for."""
+    snapshot = {
+        "source": source,
+        "url": entry["source_url"],
+        "fetched_at": fetched_at.isoformat(),
+        "entry": entry,
+        "html": html,
+    }
+    return gzip.compress(json.dumps(snapshot, default=str).encode("utf-8"))
+
+def decode_snapshot(payload: bytes) -> dict:
+    return json.loads(gzip.decompress(payload))
+
+def latest_keys(keys: Iterator[str]) -> list:
+    """Keep the newest snapshot key of each URL."""
+    latest = {}
+    for key in keys:
+        url_prefix = key.rsplit("/", 1)[0]
+        if key > latest.get(url_prefix, ""):
+            latest[url_prefix] = key
+    return sorted(latest.values())
+
+class LocalRawArchive:
+    """Raw detail pages stored as gzipped snapshots under a local directory."""
+
+    def __init__(self, root: str):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+    def put(self, source: str, entry: dict, html: str, fetched_at: Optional[datetime] = None) -> str:
+        fetched_at = fetched_at or datetime.utcnow()
+        key = snapshot_key(source, entry["source_url"], fetched_at)
+        path = os.path.join(self.root, key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "wb") as snapshot_file:
+            snapshot_file.write(encode_snapshot(source, entry, html, fetched_at))
+        return key
+
+    def keys(self, source: str) -> Iterator[str]:
+        source_root = os.path.join(self.root, source)
+        for directory, _, filenames in os.walk(source_root):
+            for filename in filenames:
+                if filename.endswith(SNAPSHOT_SUFFIX):
+                    yield os.path.relpath(os.path.join(directory, filename), self.root).replace(os.sep, "/")
+
+    def get(self, key: str) -> dict:
+        with open(os.path.join(self.root, key), "rb") as snapshot_file:
+            return decode_snapshot(snapshot_file.read())
+
+class S3RawArchive:
+    """Raw detail pages stored as gzipped snapshots under an S3 prefix."""
+
+    def __init__(self, s3_client, bucket_name: str, prefix: str = "raw/"):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.logger = logging.getLogger(__name__)
+
+    def put(self, source: str, entry: dict, html: str, fetched_at: Optional[datetime] = None) -> str:
+        fetched_at = fetched_at or datetime.utcnow()
+        key = snapshot_key(source, entry["source_url"], fetched_at)
+        self.s3_client.put_object(
+            Bucket=self.bucket_name,
+            Key=f"{self.prefix}{key}",
+            Body=encode_snapshot(source, entry, html, fetched_at),
+            ContentType="application/json",
+            ContentEncoding="gzip",
+        )
+        return key
+
+    def keys(self, source: str) -> Iterator[str]:
+        paginator = self.s3_client.get_paginator("list_objects_v2")
+        for page in paginator.paginate(Bucket=self.bucket_name, Prefix=f"{self.prefix}{source}/"):
+            for item in page.get("Contents", []):
+                if item["Key"].endswith(SNAPSHOT_SUFFIX):
+                    yield item["Key"][len(self.prefix):]
+
+    def get(self, key: str) -> dict:
+        response = self.s3_client.get_object(Bucket=self.bucket_name, Key=f"{self.prefix}{key}")
+        return decode_snapshot(response["Body"].read())
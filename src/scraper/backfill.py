@@ -0,0 +1,110 @@
+import logging
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from typing import List, Optional, Tuple
+from bs4 import BeautifulSoup
+from src.scraper.archive import latest_keys
+from src.scraper.stats import ScrapeStats
+
+# Snapshots handed to a worker process at a time
+BACKFILL_CHUNK_SIZE = 50
+# Chunks read and queued per worker process; bounds the snapshots held in memory
+BACKFILL_CHUNKS_IN_FLIGHT = 2
+
+def reextract_snapshots(source: str, base_url: Optional[str], parser: str, snapshots: List[dict]) -> List[Tuple]:
+    """
+    Run a source's current extraction over stored snapshots.
+
+    Module-level so it can run in worker processes; the adapter is rebuilt in the worker.
+
+    Returns:
+        List[Tuple]: ``(url, record or None, exception or None)`` per snapshot.
+    """
+    from src.scraper.scheduler import get_source_adapter
+    adapter = get_source_adapter(source, base_url)
+    results = []
+    for snapshot in snapshots:
+        url = snapshot["url"]
+        try:
+            details = adapter.extract_details(BeautifulSoup(snapshot["html"], parser))
+            if not details:
+                results.append((url, None, None))
+                continue
+            bus = adapter.build_record(snapshot["entry"], details)
+            bus.source = adapter.name
+            results.append((url, bus, None))
+        except Exception as e:
+            results.append((url, None, e))
+    return results
+
+class Backfill:
+    """
+    Re-extracts records from a source's archived detail pages, without refetching.
+
+    Snapshots are read with a thread pool (archive reads are I/O) and parsed in
+    ``processes`` worker processes (extraction is CPU-bound). Only the latest snapshot
+    of each URL is used. At most ``processes * BACKFILL_CHUNKS_IN_FLIGHT`` chunks are
+    read ahead of the workers, and results are collected as chunks complete.
+    """
+
+    def __init__(self, adapter, archive, processes: int = 4, read_workers: int = 16, parser: str = "html.parser"):
+        self.adapter = adapter
+        self.archive = archive
+        self.processes = processes
+        self.read_workers = read_workers
+        self.parser = parser
+        self.stats = ScrapeStats()
+        self.logger = logging.getLogger(__name__)
+
+    def run(self) -> list:
+        """
+        Re-extract every archived listing of the source.
+
+        Returns:
+            list: BusRecord instances for the snapshots that still extract.
+        """
+        keys = latest_keys(self.archive.keys(self.adapter.name))
+        self.logger.info(f"Backfilling {len(keys)} archived listings of source {self.adapter.name}.")
+        chunks = [keys[start:start + BACKFILL_CHUNK_SIZE] for start in range(0, len(keys), BACKFILL_CHUNK_SIZE)]
+
+        buses = []
+        with ThreadPoolExecutor(max_workers=self.read_workers) as readers:
+            if self.processes > 1:
+                with ProcessPoolExecutor(max_workers=self.processes) as executor:
+                    pending = set()
+                    for chunk in chunks:
+                        # Wait for a slot before reading the next chunk
+                        if len(pending) >= self.processes * BACKFILL_CHUNKS_IN_FLIGHT:
+                            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                            for future in done:
+                                buses.extend(self.collect(future.result()))
+                        snapshots = list(readers.map(self.archive.get, chunk))
+                        pending.add(executor.submit(reextract_snapshots, self.adapter.name, self.adapter.base_url,
+                                                    self.parser, snapshots))
+                    while pending:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            buses.extend(self.collect(future.result()))
+            else:
+                for chunk in chunks:
+                    snapshots = list(readers.map(self.archive.get, chunk))
+                    buses.extend(self.collect(reextract_snapshots(
+                        self.adapter.name, self.adapter.base_url, self.parser, snapshots
+                    )))
+        self.stats.increment("listings_discovered", len(keys))
+        self.logger.info(f"Backfill re-extracted {len(buses)} of {len(keys)} listings of source {self.adapter.name}.")
+        return buses
+
+    def collect(self, results: List[Tuple]) -> list:
+        buses = []
+        for url, bus, error in results:
+            if bus is not None:
+                self.stats.increment("details_fetched")
+                buses.append(bus)
+            elif error is not None:
+                self.stats.increment("records_failed")
+                self.stats.record_error(error)
+                self.logger.warning(f"Error re-extracting {url}: {error}")
+            else:
+                self.stats.increment("details_failed")
+                self.logger.warning(f"No details extracted from archived page of {url}.")
+        return buses
@@ -0,0 +1,123 @@
+import threading
+from typing import Optional
+import requests
+
+# Status codes that mean the origin is struggling, as opposed to a missing listing
+FAILURE_STATUS_CODES = frozenset({429, 500, 502, 503, 504})
+
+class CircuitOpenError(Exception):
+    """Raised instead of issuing a request once a host's breaker or the run's failure budget trips."""
+
+def is_origin_failure(error: BaseException) -> bool:
+    """
+    Whether a request error counts against the breaker.
+
+    Connection errors, timeouts, throttling and 5xx responses do; other HTTP errors
+    (a 404 for a sold listing) say nothing about the health of the site.
+    """
+    if isinstance(error, requests.exceptions.HTTPError) and error.response is not None:
+        return error.response.status_code in FAILURE_STATUS_CODES
+    return isinstance(error, requests.exceptions.RequestException)
+
+class FailureBudget:
+    """Failed requests allowed in one run, shared by every host; 0 means unlimited."""
+
+    def __init__(self, max_failures: int = 0):
+        self.max_failures = max_failures
+        self.failures = 0
+        self.lock = threading.Lock()
+
+    def spend(self) -> None:
+        with self.lock:
+            self.failures += 1
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(self.max_failures) and self.failures >= self.max_failures
+
+class CircuitBreaker:
+    """
+    Stops requests to one host after ``max_consecutive_failures`` failures in a row, or
+    once more than ``max_error_rate`` of at least ``min_requests`` requests failed.
+
+    An open breaker stays open for the rest of the run: the remaining URLs are
+    checkpointed and retried by the next run instead of being sent to a struggling
+    origin.
+    """
+
+    def __init__(self, max_consecutive_failures: int = 5, max_error_rate: float = 0.5, min_requests: int = 20,
+                 failure_budget: Optional[FailureBudget] = None):
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_error_rate = max_error_rate
+        self.min_requests = min_requests
+        self.failure_budget = failure_budget
+        self.requests = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.reason = None
+        self.lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self.reason is not None
+
+    def check(self) -> None:
+        """Raise CircuitOpenError if no more requests may be issued."""
+        if self.failure_budget is not None and self.failure_budget.exhausted:
+            with self.lock:
+                self.reason = self.reason or f"run failure budget of {self.failure_budget.max_failures} exhausted"
+        if self.reason is not None:
+            raise CircuitOpenError(self.reason)
+
+    def record_success(self) -> None:
+        with self.lock:
+            self.requests += 1
+            self.consecutive_failures = 0
+
+    def record_failure(self) -> None:
+        with self.lock:
+            self.requests += 1
+            self.failures += 1
+            self.consecutive_failures += 1
+            if self.reason is None:
+                if self.max_consecutive_failures and self.consecutive_failures >= self.max_consecutive_failures:
+                    self.reason = f"{self.consecutive_failures} consecutive failures"
+                elif self.requests >= self.min_requests and self.failures / self.requests > self.max_error_rate:
+                    self.reason = f"error rate {self.failures / self.requests:.0%} over {self.requests} requests"
+        if self.failure_budget is not None:
+            self.failure_budget.spend()
+
+def guarded_get(http, url: str, rate_limiter=None, breaker: Optional[CircuitBreaker] = None, **kwargs):
+    """
+    Issue a GET request through a host's session, rate limiter and circuit breaker.
+
+    Args:
+        http: Session (or anything with a requests-style ``get``) used for the request.
+        url (str): URL to fetch.
+        rate_limiter (Optional[RateLimiter]): Limiter waited on before the request.
+        breaker (Optional[CircuitBreaker]): Breaker checked before and updated after the request.
+        **kwargs: Passed on to ``http.get``.
+
+    Returns:
+        requests.Response: The successful response.
+
+    Raises:
+        CircuitOpenError: Without a request, once the breaker is open.
+    """
+    if breaker is not None:
+        breaker.check()
+    if rate_limiter is not None:
+        rate_limiter.wait()
+    try:
+        response = http.get(url, **kwargs)
+        response.raise_for_status()
+    except requests.exceptions.RequestException as e:
+        if breaker is not None:
+            if is_origin_failure(e):
+                breaker.record_failure()
+            else:
+                breaker.record_success()
+        raise
+    if breaker is not None:
+        breaker.record_success()
+    return response
@@ -0,0 +1,118 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+class DetailCache:
+    """
+    Size-bounded LRU cache of ``extract_details`` outputs keyed by a hash of the page body.
+
+    Entries are stored as JSON strings, so every hit returns a fresh copy. The cache is
+    persisted to a JSON file together with the extraction version it was built with; a
+    file written by a different extraction version is discarded on load.
+    """
+
+    def __init__(self, version: str, path: Optional[str] = None, max_entries: int = 5000):
+        self.version = version
+        self.path = path
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def hash_content(content: bytes) -> str:
+        """
+        Hash a response body.
+
+        Args:
+            content (bytes): Raw response body.
+
+        Returns:
+            str: Hex SHA-256 digest of the body.
+        """
+        return hashlib.sha256(content).hexdigest()
+
+    def get(self, key: str) -> Optional[dict]:
+        """
+        Get the cached details for a content hash and mark them as recently used.
+
+        Args:
+            key (str): Content hash of the page body.
+
+        Returns:
+            Optional[dict]: A copy of the cached details, or None on a miss.
+        """
+        with self.lock:
+            serialized = self.entries.get(key)
+            if serialized is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+        return json.loads(serialized)
+
+    def put(self, key: str, details: dict) -> None:
+        """
+        Store the details extracted from a page, evicting the least recently used entries.
+
+        Args:
+            key (str): Content hash of the page body.
+            details (dict): Output of ``extract_details``.
+        """
+        serialized = json.dumps(details)
+        with self.lock:
+            self.entries[key] = serialized
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+    def load(self) -> None:
+        """Load entries from the cache file, ignoring missing files and other versions."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as cache_file:
+                payload = json.load(cache_file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read detail cache {self.path}: {e}")
+            return
+
+        if payload.get("version") != self.version:
+            self.logger.info(
+                f"Discarding detail cache built with extraction version {payload.get('version')} "
+                f"(current: {self.version})."
+            )
+            return
+
+        with self.lock:
+            # Entries are saved from least to most recently used
+            for key, serialized in payload.get("entries", [])[-self.max_entries:]:
+                self.entries[key] = serialized
+        self.logger.info(f"Loaded {len(self.entries)} detail cache entries from {self.path}.")
+
+    def save(self) -> None:
+        """Write the entries to the cache file, replacing it atomically."""
+        if not self.path:
+            return
+        with self.lock:
+            payload = {"version": self.version, "entries": list(self.entries.items())}
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as cache_file:
+                json.dump(payload, cache_file)
+            os.replace(tmp_path, self.path)
+            self.logger.info(
+                f"Saved {len(payload['entries'])} detail cache entries to {self.path} "
+                f"(hits: {self.hits}, misses: {self.misses})."
+            )
+        except OSError as e:
+            self.logger.warning(f"Failed to write detail cache {self.path}: {e}")
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,58 @@
+import json
+import logging
+import os
+from datetime import datetime
+from typing import List, Optional
+
+class FrontierCheckpoint:
+    """
+    Listing entries a run discovered but could not fetch, saved for the next run.
+
+    Entries are written to a JSON file when a circuit breaker stops a source early or
+    the crawl budget runs out.
+    The next run scrapes them first and removes the file once nothing is left over.
+    """
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+
+    def load(self) -> List[dict]:
+        """Read the checkpointed entries; a missing or unreadable file means none."""
+        if not self.path or not os.path.exists(self.path):
+            return []
+        try:
+            with open(self.path, "r", encoding="utf-8") as checkpoint_file:
+                entries = json.load(checkpoint_file)
+        except (OSError, ValueError) as e:
+            self.logger.warning(f"Failed to read frontier checkpoint {self.path}: {e}")
+            return []
+        for entry in entries:
+            if entry.get("lastmod"):
+                entry["lastmod"] = datetime.fromisoformat(entry["lastmod"])
+        self.logger.info(f"Loaded {len(entries)} checkpointed listings from {self.path}.")
+        return entries
+
+    def save(self, entries: List[dict]) -> None:
+        """Write the entries, replacing the file atomically, or remove the file when there are none."""
+        if not self.path:
+            return
+        if not entries:
+            self.clear()
+            return
+        serialized = [
+            dict(entry, lastmod=entry["lastmod"].isoformat()) if entry.get("lastmod") else entry
+            for entry in entries
+        ]
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as checkpoint_file:
+                json.dump(serialized, checkpoint_file)
+            os.replace(tmp_path, self.path)
+            self.logger.info(f"Checkpointed {len(entries)} unfetched listings to {self.path}.")
+        except OSError as e:
+            self.logger.warning(f"Failed to write frontier checkpoint {self.path}: {e}")
+
+    def clear(self) -> None:
+        if self.path and os.path.exists(self.path):
+            os.remove(self.path)
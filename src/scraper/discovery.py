@@ -0,0 +1,132 @@
+import gzip
+import logging
+from datetime import datetime, timezone
+from typing import Iterator, List, Optional, Tuple
+from xml.etree import ElementTree
+import requests
+
+SITEMAP_NAMESPACE = "{http://www.sitemaps.org/schemas/sitemap/0.9}"
+
+def parse_lastmod(value: Optional[str]) -> Optional[datetime]:
+    """
+    Parse a sitemap or feed timestamp into a naive UTC datetime.
+
+    Args:
+        value (Optional[str]): W3C datetime, e.g. ``2024-11-02T14:05:00+00:00`` or ``2024-11-02``.
+
+    Returns:
+        Optional[datetime]: The timestamp in UTC, or None if missing or malformed.
+    """
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+def iter_sitemap(stream) -> Iterator[Tuple[str, str, Optional[datetime]]]:
+    """
+    Stream the entries of a sitemap or sitemap index.
+
+    Elements are cleared as soon as they are read, so memory stays flat however
+    large the sitemap is.
+
+    Args:
+        stream: Binary file-like object with the sitemap XML.
+
+    Yields:
+        Tuple[str, str, Optional[datetime]]: ``("sitemap" | "url", loc, lastmod)``.
+    """
+    for _, element in ElementTree.iterparse(stream, events=("end",)):
+        tag = element.tag.replace(SITEMAP_NAMESPACE, "")
+        if tag in ("sitemap", "url"):
+            loc = element.findtext(f"{SITEMAP_NAMESPACE}loc") or element.findtext("loc")
+            lastmod = element.findtext(f"{SITEMAP_NAMESPACE}lastmod") or element.findtext("lastmod")
+            if loc:
+                yield tag, loc.strip(), parse_lastmod(lastmod)
+            element.clear()
+
+class SitemapDiscovery:
+    """
+    Discover the detail URLs of a source from its sitemaps or listing feed.
+
+    Requests go through the scraper's pooled session and rate limiter. Both readers
+    return None when the source does not offer them, so the caller can fall back to
+    paginated listing pages.
+    """
+
+    def __init__(self, scraper):
+        self.scraper = scraper
+        self.adapter = scraper.adapter
+        self.logger = logging.getLogger("BusScraper.discovery")
+
+    def discover(self) -> Optional[List[dict]]:
+        """
+        Discover listing entries from the sitemap, then the feed.
+
+        Returns:
+            Optional[List[dict]]: Entries with ``source_url`` and ``lastmod``, or None if
+                neither the sitemap nor the feed yielded any listing URLs.
+        """
+        entries = self.discover_from_sitemap()
+        if entries is None:
+            entries = self.discover_from_feed()
+        return entries
+
+    def discover_from_sitemap(self) -> Optional[List[dict]]:
+        for sitemap_url in self.adapter.sitemap_urls():
+            try:
+                entries = self.read_sitemap(sitemap_url)
+            except (requests.exceptions.RequestException, ElementTree.ParseError) as e:
+                self.logger.debug(f"No usable sitemap at {sitemap_url}: {e}")
+                continue
+            if entries:
+                self.logger.info(f"Discovered {len(entries)} listing URLs from sitemap {sitemap_url}.")
+                return entries
+        return None
+
+    def read_sitemap(self, sitemap_url: str, depth: int = 0) -> List[dict]:
+        entries = []
+        nested_sitemaps = []
+        with self.scraper.get(sitemap_url, stream=True) as response:
+            response.raw.decode_content = True
+            stream = gzip.GzipFile(fileobj=response.raw) if sitemap_url.endswith(".gz") else response.raw
+            for kind, loc, lastmod in iter_sitemap(stream):
+                if kind == "sitemap":
+                    if self.adapter.is_listing_sitemap(loc):
+                        nested_sitemaps.append(loc)
+                elif self.adapter.is_listing_url(loc):
+                    entries.append({"source_url": loc, "lastmod": lastmod})
+
+        # Sitemap indexes only nest one level deep in practice; guard against loops anyway
+        if depth < 2:
+            for nested_url in nested_sitemaps:
+                entries.extend(self.read_sitemap(nested_url, depth + 1))
+        return entries
+
+    def discover_from_feed(self) -> Optional[List[dict]]:
+        entries = []
+        page = 1
+        total_pages = 1
+        while page <= total_pages:
+            feed_url = self.adapter.feed_url(page)
+            if not feed_url:
+                return None
+            try:
+                response = self.scraper.get(feed_url)
+                items = response.json()
+            except (requests.exceptions.RequestException, ValueError) as e:
+                self.logger.debug(f"No usable listing feed at {feed_url}: {e}")
+                return entries or None
+            total_pages = int(response.headers.get("X-WP-TotalPages", 1))
+            for item in items:
+                entry = self.adapter.parse_feed_item(item)
+                if entry:
+                    entries.append(entry)
+            page += 1
+        if entries:
+            self.logger.info(f"Discovered {len(entries)} listing URLs from the listing feed.")
+        return entries or None
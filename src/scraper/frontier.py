@@ -0,0 +1,96 @@
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+from src.scraper.normalize import parse_price
+
+# Score of each signal; the highest scoring detail URLs are fetched first
+NEW_LISTING_SCORE = 100.0
+PRICE_CHANGED_SCORE = 80.0
+MODIFIED_SCORE = 60.0
+# Grows with the days since the last successful fetch, up to the cap
+STALENESS_SCORE_PER_DAY = 2.0
+MAX_STALENESS_SCORE = 40.0
+# Grows with the recorded changes per 30 days of a listing's life, up to the cap
+CHANGE_RATE_SCORE = 10.0
+MAX_CHANGE_RATE_SCORE = 30.0
+
+class CrawlBudget:
+    """
+    Detail fetches allowed in one run, by count and/or wall-clock seconds; 0 means unlimited.
+
+    The clock starts with ``start()``, when the scrape begins.
+    """
+
+    def __init__(self, max_requests: int = 0, max_seconds: float = 0):
+        self.max_requests = max_requests
+        self.max_seconds = max_seconds
+        self.requests = 0
+        self.deadline = None
+        self.lock = threading.Lock()
+
+    def start(self) -> None:
+        if self.max_seconds:
+            self.deadline = time.monotonic() + self.max_seconds
+
+    def spend(self) -> bool:
+        """Take one request from the budget; False once the budget is exhausted."""
+        with self.lock:
+            if self.max_requests and self.requests >= self.max_requests:
+                return False
+            if self.deadline is not None and time.monotonic() >= self.deadline:
+                return False
+            self.requests += 1
+            return True
+
+    @property
+    def exhausted(self) -> bool:
+        return bool(
+            (self.max_requests and self.requests >= self.max_requests)
+            or (self.deadline is not None and time.monotonic() >= self.deadline)
+        )
+
+class PriorityFrontier:
+    """
+    Orders detail URLs by how likely their listing changed since it was last loaded.
+
+    ``history`` maps source_url to what the database knows about the listing
+    (``updated_at``, ``created_at``, ``price`` and ``changes``, the number of recorded
+    field changes), as returned by ``DatabaseManager.get_crawl_history``. Without
+    history every URL is new and the discovery order is kept.
+    """
+
+    def __init__(self, history: Optional[Dict[str, dict]] = None, now: Optional[datetime] = None):
+        self.history = history or {}
+        self.now = now or datetime.utcnow()
+
+    def score(self, entry: dict) -> float:
+        known = self.history.get(entry["source_url"])
+        if known is None:
+            return NEW_LISTING_SCORE
+
+        score = 0.0
+        card_price = parse_price(entry.get("price"))
+        if card_price is not None and card_price != parse_price(known.get("price")):
+            score += PRICE_CHANGED_SCORE
+
+        updated_at = known.get("updated_at")
+        lastmod = entry.get("lastmod")
+        if lastmod is not None and updated_at is not None and lastmod > updated_at:
+            score += MODIFIED_SCORE
+        if updated_at is not None:
+            days_since_fetch = (self.now - updated_at).total_seconds() / 86400
+            score += min(MAX_STALENESS_SCORE, max(0.0, days_since_fetch) * STALENESS_SCORE_PER_DAY)
+
+        created_at = known.get("created_at") or updated_at
+        if known.get("changes") and created_at is not None:
+            age_days = max(1.0, (self.now - created_at).total_seconds() / 86400)
+            changes_per_month = known["changes"] * 30 / age_days
+            score += min(MAX_CHANGE_RATE_SCORE, changes_per_month * CHANGE_RATE_SCORE)
+        return score
+
+    def order(self, entries: List[dict]) -> List[dict]:
+        """Entries by descending score; ties keep their discovery order."""
+        if not self.history:
+            return list(entries)
+        return sorted(entries, key=self.score, reverse=True)
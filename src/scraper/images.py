@@ -0,0 +1,234 @@
+import hashlib
+import json
+import logging
+import mimetypes
+import posixpath
+import shutil
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional
+from urllib.parse import urlsplit, urlunsplit
+import requests
+from requests.adapters import HTTPAdapter
+from src.urls import canonicalize_image_url
+
+# Object under the image prefix mapping asset URLs to the keys of their content
+INDEX_KEY = "index.json"
+# Downloads larger than this are spooled to disk instead of memory while hashed
+SPOOL_MAX_BYTES = 8 * 1024 * 1024
+
+def select_largest_variants(images: List[dict]) -> List[dict]:
+    """
+    Keep only the largest variant of each image per bus.
+
+    Originals count as larger than any resized variant. The first occurrence keeps
+    its position, and ``image_index`` is renumbered per bus.
+
+    Args:
+        images (List[dict]): Image rows with ``url`` and ``source_url`` (or ``bus_id``).
+
+    Returns:
+        List[dict]: Image rows with one entry per bus and canonical image.
+    """
+    selected = {}
+    for image in images:
+        canonical, area = canonicalize_image_url(image["url"])
+        group = (image.get("source_url", image.get("bus_id")), canonical)
+        rank = float("inf") if area is None else area
+        if group not in selected:
+            selected[group] = [image, rank]
+        elif rank > selected[group][1]:
+            # Replace in place so the image keeps the position of its first variant
+            selected[group] = [image, rank]
+    return reindex_images([image for image, _ in selected.values()])
+
+def reindex_images(images: List[dict]) -> List[dict]:
+    """Renumber ``image_index`` per bus in list order."""
+    counters = {}
+    reindexed = []
+    for image in images:
+        owner = image.get("source_url", image.get("bus_id"))
+        image = dict(image, image_index=counters.get(owner, 0))
+        counters[owner] = image["image_index"] + 1
+        reindexed.append(image)
+    return reindexed
+
+class HashingReader:
+    """File-like wrapper that hashes a stream while it is read."""
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def read(self, size=-1):
+        chunk = self.stream.read(size)
+        self.digest.update(chunk)
+        self.size += len(chunk)
+        return chunk
+
+class ImagePipeline:
+    """
+    Download gallery images concurrently and store them in S3.
+
+    Objects are addressed by content: the key is the SHA-256 of the image bytes, so
+    identical images share one object and stored objects are never deleted or
+    overwritten with other content. Variants of the same asset are collapsed to the
+    largest one (unless ``keep_largest`` is off). A persisted index maps each asset URL
+    (the canonical URL, or the URL without its query string when variants are kept) to
+    its key, so an asset is downloaded once across runs, not once per run. Downloads
+    are spooled to a temporary file while they are hashed, so whole images are not
+    held in memory.
+
+    Downloads go through ``http``, anything with a requests-style ``get``. The ETL passes
+    its ``SourceScheduler`` so images share the pooled session, rate limiter and circuit
+    breaker of their host with the scrapers; by default the pipeline pools its own session.
+    """
+
+    def __init__(self, s3_client, bucket_name: str, prefix: str = "images/", max_workers: int = 8,
+                 keep_largest: bool = True, headers: Optional[dict] = None, timeout: int = 30, http=None):
+        self.s3_client = s3_client
+        self.bucket_name = bucket_name
+        self.prefix = prefix
+        self.max_workers = max_workers
+        self.keep_largest = keep_largest
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.http = http or self.pooled_session(max_workers)
+        # asset URL -> content-addressed key, loaded from and saved to INDEX_KEY
+        self.index = {}
+        self.index_lock = threading.Lock()
+        self.index_changed = False
+        self.bytes_downloaded = 0
+        self.logger = logging.getLogger(__name__)
+
+    @staticmethod
+    def pooled_session(max_workers: int) -> requests.Session:
+        session = requests.Session()
+        http_adapter = HTTPAdapter(pool_maxsize=max_workers)
+        session.mount("https://", http_adapter)
+        session.mount("http://", http_adapter)
+        return session
+
+    @property
+    def index_key(self) -> str:
+        return f"{self.prefix}{INDEX_KEY}"
+
+    def asset_url(self, url: str) -> str:
+        """URL identifying the stored asset of an image URL."""
+        canonical, _ = canonicalize_image_url(url)
+        if self.keep_largest:
+            return canonical
+        parts = urlsplit(url.strip())
+        return urlunsplit(("https", parts.netloc.lower(), parts.path, "", ""))
+
+    def load_index(self) -> None:
+        """Read the asset index; a missing or unreadable index means nothing is known yet."""
+        try:
+            response = self.s3_client.get_object(Bucket=self.bucket_name, Key=self.index_key)
+            self.index = json.loads(response["Body"].read())
+        except Exception as e:
+            self.logger.info(f"No image index loaded from {self.index_key}: {e}")
+            self.index = {}
+        self.index_changed = False
+
+    def save_index(self) -> None:
+        if not self.index_changed:
+            return
+        try:
+            self.s3_client.put_object(
+                Bucket=self.bucket_name, Key=self.index_key,
+                Body=json.dumps(self.index).encode("utf-8"), ContentType="application/json",
+            )
+            self.index_changed = False
+        except Exception as e:
+            self.logger.warning(f"Failed to save the image index {self.index_key}: {e}")
+
+    def store(self, images: List[dict]) -> List[dict]:
+        """
+        Store the images of the transformed data and record their S3 keys.
+
+        Args:
+            images (List[dict]): Image rows from the transform phase.
+
+        Returns:
+            List[dict]: Image rows with ``storage_key`` set, without duplicate variants
+                or duplicate content for the same bus.
+        """
+        if self.keep_largest:
+            images = select_largest_variants(images)
+
+        self.load_index()
+        # One download per asset: the first URL kept for it
+        download_urls = {}
+        for image in images:
+            download_urls.setdefault(self.asset_url(image["url"]), image["url"])
+        self.logger.info(f"Storing {len(download_urls)} distinct images with {self.max_workers} workers.")
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            asset_keys = dict(zip(download_urls, executor.map(self.store_image, download_urls.values())))
+        self.save_index()
+
+        stored = []
+        seen = set()
+        for image in images:
+            storage_key = asset_keys.get(self.asset_url(image["url"]))
+            owner = image.get("source_url", image.get("bus_id"))
+            if storage_key and (owner, storage_key) in seen:
+                continue
+            seen.add((owner, storage_key))
+            stored.append(dict(image, storage_key=storage_key))
+        self.logger.info(
+            f"Stored images: {sum(1 for key in asset_keys.values() if key)}/{len(download_urls)} "
+            f"({self.bytes_downloaded} bytes downloaded)."
+        )
+        return reindex_images(stored)
+
+    def store_image(self, url: str) -> Optional[str]:
+        """
+        Store one image in S3 under the hash of its content, unless its asset is indexed.
+
+        Args:
+            url (str): Image URL.
+
+        Returns:
+            Optional[str]: S3 key of the stored image, or None if it could not be stored.
+        """
+        asset = self.asset_url(url)
+        with self.index_lock:
+            known_key = self.index.get(asset)
+        if known_key:
+            return known_key
+
+        canonical, _ = canonicalize_image_url(url)
+        extension = posixpath.splitext(urlsplit(canonical).path)[1].lower() or ".jpg"
+        try:
+            with self.http.get(url, headers=self.headers, stream=True, timeout=self.timeout) as response, \
+                    tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_BYTES) as spool:
+                response.raise_for_status()
+                response.raw.decode_content = True
+                reader = HashingReader(response.raw)
+                shutil.copyfileobj(reader, spool)
+                key = f"{self.prefix}{reader.digest.hexdigest()}{extension}"
+                # Identical content is already stored under the same key
+                if not self.object_exists(key):
+                    spool.seek(0)
+                    content_type = response.headers.get("Content-Type") or mimetypes.guess_type(canonical)[0]
+                    extra_args = {"ContentType": content_type} if content_type else None
+                    self.s3_client.upload_fileobj(spool, self.bucket_name, key, ExtraArgs=extra_args)
+
+            with self.index_lock:
+                self.bytes_downloaded += reader.size
+                self.index[asset] = key
+                self.index_changed = True
+            return key
+        except Exception as e:
+            self.logger.warning(f"Failed to store image {url}: {e}")
+            return None
+
+    def object_exists(self, key: str) -> bool:
+        try:
+            self.s3_client.head_object(Bucket=self.bucket_name, Key=key)
+            return True
+        except Exception:
+            return False
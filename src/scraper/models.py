@@ -66,4 +66,5 @@ class BusImage(BaseModel):
     url: Optional[str] = Field(None, max_length=1000, description="URL of the image")
     description: Optional[str] = Field(None, description="Description of the image")
     image_index: Optional[int] = Field(0, description="Index of the image")
+    storage_key: Optional[str] = Field(None, max_length=1000, description="S3 key of the stored image")
     bus_id: Optional[int] = Field(None, description="Foreign key to Bus")
\ No newline at end of file
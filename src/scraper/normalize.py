@@ -0,0 +1,254 @@
+import re
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Dict, List, Optional
+
+YEAR_PATTERN = re.compile(r"\b(?:19|20)\d{2}\b")
+NON_DIGIT_PATTERN = re.compile(r"[^\d]")
+PRICE_PATTERN = re.compile(r"\d[\d,]*(?:\.\d+)?")
+# "St. Louis, MO" / "Springfield, MO 65802"
+STATE_CODE_PATTERN = re.compile(r",\s*([A-Za-z]{2})(?:\s+\d{5}(?:-\d{4})?)?\s*$")
+AC_REAR_PATTERN = re.compile(r"\brear\b", re.IGNORECASE)
+AC_DASH_PATTERN = re.compile(r"\b(?:dash|front)\b", re.IGNORECASE)
+AC_BOTH_PATTERN = re.compile(r"\bboth\b", re.IGNORECASE)
+
+# Every state (and DC) by name and USPS code, mapped to the USRegion enum members
+STATE_REGIONS = {
+    "Connecticut": "NORTHEAST", "Maine": "NORTHEAST", "Massachusetts": "NORTHEAST",
+    "New Hampshire": "NORTHEAST", "Rhode Island": "NORTHEAST", "Vermont": "NORTHEAST",
+    "New Jersey": "NORTHEAST", "New York": "NORTHEAST", "Pennsylvania": "NORTHEAST",
+    "Illinois": "MIDWEST", "Indiana": "MIDWEST", "Michigan": "MIDWEST", "Ohio": "MIDWEST",
+    "Wisconsin": "MIDWEST", "Iowa": "MIDWEST", "Kansas": "MIDWEST", "Minnesota": "MIDWEST",
+    "Missouri": "MIDWEST", "Nebraska": "MIDWEST", "North Dakota": "MIDWEST", "South Dakota": "MIDWEST",
+    "Delaware": "SOUTHEAST", "District of Columbia": "SOUTHEAST", "Florida": "SOUTHEAST",
+    "Georgia": "SOUTHEAST", "Maryland": "SOUTHEAST", "North Carolina": "SOUTHEAST",
+    "South Carolina": "SOUTHEAST", "Virginia": "SOUTHEAST", "West Virginia": "SOUTHEAST",
+    "Alabama": "SOUTHEAST", "Kentucky": "SOUTHEAST", "Mississippi": "SOUTHEAST", "Tennessee": "SOUTHEAST",
+    "Arkansas": "SOUTHEAST", "Louisiana": "SOUTHEAST",
+    "Arizona": "SOUTHWEST", "New Mexico": "SOUTHWEST", "Oklahoma": "SOUTHWEST", "Texas": "SOUTHWEST",
+    "Alaska": "WEST", "California": "WEST", "Colorado": "WEST", "Hawaii": "WEST", "Idaho": "WEST",
+    "Montana": "WEST", "Nevada": "WEST", "Oregon": "WEST", "Utah": "WEST", "Washington": "WEST",
+    "Wyoming": "WEST",
+}
+STATE_CODES = {
+    "CT": "Connecticut", "ME": "Maine", "MA": "Massachusetts", "NH": "New Hampshire", "RI": "Rhode Island",
+    "VT": "Vermont", "NJ": "New Jersey", "NY": "New York", "PA": "Pennsylvania", "IL": "Illinois",
+    "IN": "Indiana", "MI": "Michigan", "OH": "Ohio", "WI": "Wisconsin", "IA": "Iowa", "KS": "Kansas",
+    "MN": "Minnesota", "MO": "Missouri", "NE": "Nebraska", "ND": "North Dakota", "SD": "South Dakota",
+    "DE": "Delaware", "DC": "District of Columbia", "FL": "Florida", "GA": "Georgia", "MD": "Maryland",
+    "NC": "North Carolina", "SC": "South Carolina", "VA": "Virginia", "WV": "West Virginia",
+    "AL": "Alabama", "KY": "Kentucky", "MS": "Mississippi", "TN": "Tennessee", "AR": "Arkansas",
+    "LA": "Louisiana", "AZ": "Arizona", "NM": "New Mexico", "OK": "Oklahoma", "TX": "Texas", "AK": "Alaska",
+    "CA": "California", "CO": "Colorado", "HI": "Hawaii", "ID": "Idaho", "MT": "Montana", "NV": "Nevada",
+    "OR": "Oregon", "UT": "Utah", "WA": "Washington", "WY": "Wyoming",
+}
+STATE_NAMES = {name.lower(): name for name in STATE_REGIONS}
+# Longest names first so "West Virginia" is not read as "Virginia"
+STATE_NAME_PATTERN = re.compile(
+    r"\b(" + "|".join(re.escape(name) for name in sorted(STATE_NAMES, key=len, reverse=True)) + r")\b",
+    re.IGNORECASE,
+)
+
+# Distinct raw values remembered per parser; the same few hundred values repeat every run.
+# Typed caches keep True and 1 apart.
+PARSER_CACHE_SIZE = 4096
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE, typed=True)
+def parse_year(value) -> Optional[int]:
+    """``"2019 Ford E450"`` -> 2019."""
+    if value is None:
+        return None
+    match = YEAR_PATTERN.search(str(value))
+    return int(match.group()) if match else None
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE, typed=True)
+def parse_integer(value) -> Optional[int]:
+    """``"85,000 mi"`` -> 85000; booleans and values without digits -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, int):
+        return value
+    if isinstance(value, float):
+        return int(value)
+    digits = NON_DIGIT_PATTERN.sub("", str(value))
+    return int(digits) if digits else None
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE, typed=True)
+def parse_price(value) -> Optional[Decimal]:
+    """``"$45,000"``, ``45000.0`` or ``"45000.0"`` -> Decimal("45000"); zero or unparseable -> None."""
+    if value is None or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        text = repr(value)
+    else:
+        match = PRICE_PATTERN.search(str(value))
+        if not match:
+            return None
+        text = match.group().replace(",", "")
+    try:
+        price = Decimal(text)
+    except InvalidOperation:
+        return None
+    if price <= 0:
+        return None
+    # Drop the float's ".0" so 45000.0 is stored as "45000", keeping real cents
+    return price.quantize(Decimal(1)) if price == price.to_integral_value() else price.quantize(Decimal("0.01"))
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE, typed=True)
+def parse_state(location) -> Optional[str]:
+    """
+    Find the US state of a location.
+
+    Accepts a state name (``"missouri"``), a trailing USPS code (``"St. Louis, MO"``)
+    or a name inside longer text (``"Nashville Tennessee"``).
+
+    Returns:
+        Optional[str]: Canonical state name, or None if no state is recognized.
+    """
+    if not location:
+        return None
+    text = str(location).strip()
+    name = STATE_NAMES.get(text.lower())
+    if name:
+        return name
+    if text.upper() in STATE_CODES:
+        return STATE_CODES[text.upper()]
+    match = STATE_CODE_PATTERN.search(text)
+    if match and match.group(1).upper() in STATE_CODES:
+        return STATE_CODES[match.group(1).upper()]
+    match = STATE_NAME_PATTERN.search(text)
+    return STATE_NAMES[match.group(1).lower()] if match else None
+
+def region_for_location(location) -> str:
+    """USRegion name of a location, ``OTHER`` when the state is unknown."""
+    state = parse_state(location)
+    return STATE_REGIONS[state] if state else "OTHER"
+
+@lru_cache(maxsize=PARSER_CACHE_SIZE, typed=True)
+def airconditioning_option(value) -> str:
+    """
+    Map an air conditioning spec to an AirConditioningOptions name.
+
+    ``True``/``"Yes"`` mean factory dash air (the only kind the listings flag); text
+    naming rear and dash/front units, or "both", maps to ``BOTH``.
+    """
+    if value is None or value is False:
+        return "NONE"
+    if value is True:
+        return "DASH"
+    text = str(value).strip()
+    if text.upper() in ("REAR", "DASH", "BOTH", "OTHER", "NONE"):
+        return text.upper()
+    lowered = text.lower()
+    if lowered in ("yes", "true", "y", "1"):
+        return "DASH"
+    if lowered in ("", "no", "false", "n", "0", "none"):
+        return "NONE"
+    rear = bool(AC_REAR_PATTERN.search(text))
+    dash = bool(AC_DASH_PATTERN.search(text))
+    if AC_BOTH_PATTERN.search(text) or (rear and dash):
+        return "BOTH"
+    if rear:
+        return "REAR"
+    if dash:
+        return "DASH"
+    return "OTHER"
+
+def format_decimal(value: Optional[Decimal]) -> Optional[str]:
+    """Decimal -> its exact string form (``"45000"``, ``"45000.50"``)."""
+    return None if value is None else format(value, "f")
+
+class ColumnBatch:
+    """
+    Bus rows of one run, normalized column by column.
+
+    This is not vectorized: every value still goes through a Python parser call, but
+    the parsers above are ``lru_cache``-memoized, so each distinct raw value is parsed
+    once and repeats are a cache lookup. ``columns`` holds the typed values (ints,
+    Decimals, enum names) for columnar consumers such as Parquet; ``db_rows`` renders
+    them into the string columns of the buses table.
+    """
+
+    def __init__(self, rows: List[dict]):
+        self.rows = rows
+        self.columns: Dict[str, list] = {}
+        self.normalize()
+
+    def column(self, name: str) -> list:
+        return [row.get(name) for row in self.rows]
+
+    def normalize(self) -> None:
+        locations = self.column("location")
+        self.columns["year"] = list(map(parse_year, self.column("year")))
+        self.columns["mileage"] = list(map(parse_integer, self.column("mileage")))
+        self.columns["passengers"] = list(map(parse_integer, self.column("passengers")))
+        self.columns["price"] = list(map(parse_price, self.column("price")))
+        states = list(map(parse_state, locations))
+        # The location is kept as scraped; the recognized state has its own column
+        self.columns["state"] = states
+        self.columns["us_region"] = [STATE_REGIONS[state] if state else "OTHER" for state in states]
+        self.columns["airconditioning"] = list(map(airconditioning_option, self.column("airconditioning")))
+
+    def db_rows(self) -> List[dict]:
+        """
+        Rows with the normalized values, as stored in the buses table.
+
+        Numbers become their exact decimal strings; a missing price is stored as ``"0"``
+        like before.
+        """
+        rendered = {
+            "year": [None if year is None else str(year) for year in self.columns["year"]],
+            "mileage": [None if value is None else str(value) for value in self.columns["mileage"]],
+            "passengers": [None if value is None else str(value) for value in self.columns["passengers"]],
+            "price": [format_decimal(price) or "0" for price in self.columns["price"]],
+            "state": self.columns["state"],
+            "us_region": self.columns["us_region"],
+            "airconditioning": self.columns["airconditioning"],
+        }
+        rows = []
+        for index, row in enumerate(self.rows):
+            row = dict(row)
+            for name, values in rendered.items():
+                row[name] = values[index]
+            rows.append(row)
+        return rows
+
+    def to_columns(self) -> Dict[str, list]:
+        """Every bus column, typed where the normalization stage knows the type."""
+        names = list(dict.fromkeys([name for row in self.rows for name in row] + list(self.columns)))
+        return {name: self.columns[name] if name in self.columns else self.column(name) for name in names}
+
+    def to_parquet(self, path: str) -> None:
+        """
+        Write the typed columns to a Parquet file.
+
+        pyarrow is listed in requirements.txt but imported lazily, so the scraper and
+        the other export formats keep working in bundles built without it.
+
+        Raises:
+            RuntimeError: If pyarrow is not installed.
+        """
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError(
+                "Parquet export (EXPORT_PARQUET=true) requires pyarrow; install it with pip install pyarrow."
+            ) from e
+
+        types = {
+            "year": pa.int32(),
+            "mileage": pa.int64(),
+            "passengers": pa.int32(),
+            "price": pa.decimal128(12, 2),
+        }
+        columns = self.to_columns()
+        arrays = {}
+        for name, values in columns.items():
+            if name in types:
+                arrays[name] = pa.array(values, type=types[name])
+            else:
+                arrays[name] = pa.array(
+                    [value.isoformat() if hasattr(value, "isoformat") else value for value in values]
+                )
+        pq.write_table(pa.table(arrays), path)
@@ -0,0 +1,118 @@
+import enum
+from typing import Optional, List
+
+# Columns of the buses table filled in by the scraper
+BUS_FIELDS = (
+    "title", "year", "make", "model", "body", "chassis", "engine", "transmission",
+    "mileage", "passengers", "wheelchair", "color", "interior_color", "exterior_color",
+    "gvwr", "dimensions", "luggage", "state_bus_standard", "airconditioning", "location",
+    "brake", "price", "vin", "description", "source", "source_url", "contact_email",
+    "contact_phone", "us_region",
+)
+
+OVERVIEW_FIELDS = ("mdesc", "intdesc", "extdesc", "features", "specs")
+
+IMAGE_FIELDS = ("name", "url", "description", "image_index", "storage_key")
+
+class Record:
+    """
+    Base class for the plain records passed through the scrape -> transform -> load flow.
+
+    Records use ``__slots__`` so they carry no per-instance ``__dict__`` and, unlike
+    ORM objects, no session state or lazy relationships. ORM or Core objects are only
+    created at the database boundary.
+    """
+
+    __slots__ = ()
+    fields = ()
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            setattr(self, field, values.pop(field, None))
+        if values:
+            raise TypeError(f"Unknown fields for {type(self).__name__}: {', '.join(values)}")
+
+    def to_dict(self) -> dict:
+        """
+        Convert the record's column fields to a dictionary.
+
+        Returns:
+            dict: Mapping of column name to value.
+        """
+        return {field: getattr(self, field) for field in self.fields}
+
+    @classmethod
+    def from_model(cls, obj):
+        """
+        Build a record from an ORM object, converting enum members to their values.
+
+        Args:
+            obj: SQLAlchemy model instance with the record's column attributes.
+
+        Returns:
+            Record: A detached record holding the column values.
+        """
+        values = {}
+        for field in cls.fields:
+            value = getattr(obj, field)
+            values[field] = value.value if isinstance(value, enum.Enum) else value
+        return cls(**values)
+
+    def __eq__(self, other):
+        if type(other) is not type(self):
+            return NotImplemented
+        return all(getattr(self, field) == getattr(other, field) for field in self.__slots__)
+
+    def __repr__(self):
+        values = ", ".join(f"{field}={getattr(self, field)!r}" for field in self.fields[:3])
+        return f"{type(self).__name__}({values}, ...)"
+
+class OverviewRecord(Record):
+    """Descriptions and specifications of a bus (buses_overview row)."""
+
+    __slots__ = OVERVIEW_FIELDS
+    fields = OVERVIEW_FIELDS
+
+    @classmethod
+    def from_model(cls, overview):
+        """Build a record from a ``BusOverview``, unpacking packed specs and features."""
+        from src.database.spec_storage import overview_specs
+        record = super().from_model(overview)
+        record.specs, record.features = overview_specs(overview)
+        return record
+
+class ImageRecord(Record):
+    """Image metadata of a bus (buses_images row)."""
+
+    __slots__ = IMAGE_FIELDS
+    fields = IMAGE_FIELDS
+
+class BusRecord(Record):
+    """A scraped bus listing (buses row) with its overview and images."""
+
+    __slots__ = BUS_FIELDS + ("overview", "images")
+    fields = BUS_FIELDS
+
+    overview: Optional[OverviewRecord]
+    images: List[ImageRecord]
+
+    def __init__(self, **values):
+        super().__init__(**values)
+        if self.images is None:
+            self.images = []
+
+    @classmethod
+    def from_model(cls, bus):
+        """
+        Build a record from a ``Bus`` model, including its first overview and its images.
+
+        The ``overview`` and ``images`` relationships should be eager loaded; otherwise
+        each access issues its own SELECT.
+        """
+        record = super().from_model(bus)
+        if bus.overview:
+            record.overview = OverviewRecord.from_model(bus.overview[0])
+        record.images = [
+            ImageRecord.from_model(image) for image in sorted(bus.images, key=lambda image: image.image_index or 0)
+        ]
+        return record
@@ -0,0 +1,201 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+import requests
+from requests.adapters import HTTPAdapter
+from src.scraper.breaker import CircuitBreaker, FailureBudget, guarded_get
+from src.scraper.frontier import CrawlBudget
+from src.scraper.main_scraper import BusScraper
+from src.scraper.sources.base import SourceAdapter
+from src.scraper.sources.central_states import CentralStatesBusAdapter
+
+# Source adapters by the name used in the SOURCES setting
+SOURCE_ADAPTERS = {
+    CentralStatesBusAdapter.name: CentralStatesBusAdapter,
+}
+
+def get_source_adapter(name: str, base_url: Optional[str] = None) -> SourceAdapter:
+    """
+    Instantiate a registered source adapter.
+
+    Args:
+        name (str): Registered adapter name, e.g. ``central_states``.
+        base_url (Optional[str]): Overrides the adapter's default base URL.
+
+    Returns:
+        SourceAdapter: The adapter instance.
+    """
+    adapter_class = SOURCE_ADAPTERS.get(name)
+    if adapter_class is None:
+        raise ValueError(f"Unknown source: {name}. Available sources: {', '.join(SOURCE_ADAPTERS)}")
+    return adapter_class(base_url)
+
+class SourcesFailedError(Exception):
+    """Raised when every source of a run failed, so the run has nothing to load."""
+
+class RateLimiter:
+    """Spaces requests to one host at least ``1 / requests_per_second`` apart, across threads."""
+
+    def __init__(self, requests_per_second: float):
+        self.interval = 1.0 / requests_per_second if requests_per_second > 0 else 0.0
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self) -> None:
+        if not self.interval:
+            return
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+class SourceScheduler:
+    """
+    Runs the scrapers of several sources concurrently into one result list.
+
+    Each host gets one pooled ``requests.Session``, one rate limiter and one circuit
+    breaker, shared by every source served from that host, so concurrency and failures
+    are bounded per site rather than per run. Sessions may come from a longer-lived
+    ``sessions`` dict so warm invocations reuse open connections. All breakers draw on one run-level
+    failure budget, and all scrapers on one crawl budget of detail fetches.
+    """
+
+    def __init__(self, max_workers: int = 5, requests_per_second: float = 5.0, max_retries: int = 3,
+                 discovery_mode: str = "pagination", max_consecutive_failures: int = 5,
+                 max_error_rate: float = 0.5, min_requests: int = 20, max_failed_requests: int = 0,
+                 parser: str = "html.parser", max_detail_requests: int = 0, max_seconds: float = 0,
+                 sessions: Optional[Dict[str, requests.Session]] = None):
+        self.max_workers = max_workers
+        self.requests_per_second = requests_per_second
+        self.max_retries = max_retries
+        self.discovery_mode = discovery_mode
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_error_rate = max_error_rate
+        self.min_requests = min_requests
+        self.failure_budget = FailureBudget(max_failed_requests)
+        self.parser = parser
+        self.crawl_budget = CrawlBudget(max_detail_requests, max_seconds)
+        self.scrapers: List[BusScraper] = []
+        self.sessions: Dict[str, requests.Session] = sessions if sessions is not None else {}
+        self.rate_limiters: Dict[str, RateLimiter] = {}
+        self.breakers: Dict[str, CircuitBreaker] = {}
+        self.lock = threading.Lock()
+        # Source name -> exception that stopped it in the last run
+        self.failures: Dict[str, Exception] = {}
+        self.logger = logging.getLogger(__name__)
+
+    def add_source(self, adapter: SourceAdapter, detail_cache=None) -> BusScraper:
+        """
+        Register a source and build its scraper.
+
+        Args:
+            adapter (SourceAdapter): The source's adapter.
+            detail_cache (Optional[DetailCache]): Cache of extracted details for this source.
+
+        Returns:
+            BusScraper: The scraper that will run for this source.
+        """
+        max_workers = adapter.max_workers or self.max_workers
+        requests_per_second = adapter.requests_per_second or self.requests_per_second
+        session, rate_limiter, breaker = self.host_clients(adapter.host, max_workers, requests_per_second)
+
+        scraper = BusScraper(
+            adapter=adapter,
+            max_retries=self.max_retries,
+            detail_cache=detail_cache,
+            http_session=session,
+            rate_limiter=rate_limiter,
+            max_workers=max_workers,
+            discovery_mode=self.discovery_mode,
+            breaker=breaker,
+            parser=self.parser,
+            budget=self.crawl_budget,
+        )
+        self.scrapers.append(scraper)
+        return scraper
+
+    def host_clients(self, host: str, max_workers: Optional[int] = None,
+                     requests_per_second: Optional[float] = None) -> Tuple[requests.Session, RateLimiter, CircuitBreaker]:
+        """
+        Get the session, rate limiter and circuit breaker of a host, creating them on first use.
+
+        Args:
+            host (str): Host name, e.g. ``www.example.com``.
+            max_workers (Optional[int]): Connection pool size of a new session; defaults to ``max_workers``.
+            requests_per_second (Optional[float]): Rate of a new limiter; defaults to ``requests_per_second``.
+
+        Returns:
+            Tuple[requests.Session, RateLimiter, CircuitBreaker]: The host's shared clients.
+        """
+        with self.lock:
+            if host not in self.sessions:
+                session = requests.Session()
+                http_adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_workers or self.max_workers)
+                session.mount("https://", http_adapter)
+                session.mount("http://", http_adapter)
+                self.sessions[host] = session
+            if host not in self.rate_limiters:
+                self.rate_limiters[host] = RateLimiter(requests_per_second or self.requests_per_second)
+                self.breakers[host] = CircuitBreaker(
+                    max_consecutive_failures=self.max_consecutive_failures,
+                    max_error_rate=self.max_error_rate,
+                    min_requests=self.min_requests,
+                    failure_budget=self.failure_budget,
+                )
+            return self.sessions[host], self.rate_limiters[host], self.breakers[host]
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        """
+        Issue a GET request through the session, rate limiter and circuit breaker of the URL's host.
+
+        Requests made outside the scrapers (image downloads) thereby share the limits of
+        the source they are served from.
+
+        Raises:
+            CircuitOpenError: Without a request, once the host's breaker is open.
+        """
+        session, rate_limiter, breaker = self.host_clients(urlsplit(url).netloc)
+        return guarded_get(session, url, rate_limiter=rate_limiter, breaker=breaker, **kwargs)
+
+    def run(self) -> list:
+        """
+        Scrape every registered source concurrently.
+
+        A failing source does not stop the others: its exception is kept in ``failures``
+        and on its scraper, whose status becomes ``failed``, so the run can be reported
+        as partial.
+
+        Returns:
+            list: BusRecord instances from all sources.
+
+        Raises:
+            SourcesFailedError: If every source failed.
+        """
+        if not self.scrapers:
+            self.logger.warning("No sources registered. Nothing to scrape.")
+            return []
+
+        all_buses = []
+        self.failures = {}
+        self.crawl_budget.start()
+        with ThreadPoolExecutor(max_workers=len(self.scrapers)) as executor:
+            futures = {executor.submit(scraper.scrape_all_pages): scraper for scraper in self.scrapers}
+            for future, scraper in futures.items():
+                try:
+                    buses = future.result()
+                    all_buses.extend(buses)
+                    self.logger.info(f"Source {scraper.adapter.name} returned {len(buses)} buses.")
+                except Exception as e:
+                    self.logger.error(f"Error scraping source {scraper.adapter.name}: {e}")
+                    scraper.error = e
+                    self.failures[scraper.adapter.name] = e
+        if len(self.failures) == len(self.scrapers):
+            raise SourcesFailedError(
+                "Every source failed: " + "; ".join(f"{name}: {error}" for name, error in self.failures.items())
+            )
+        return all_buses
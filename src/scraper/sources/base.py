@@ -0,0 +1,137 @@
+import abc
+import logging
+from typing import List, Optional
+from urllib.parse import urlsplit
+from src.scraper.records import BusRecord
+
+class SourceAdapter(abc.ABC):
+    """
+    Site-specific scraping logic for one dealer site.
+
+    An adapter knows how to discover listing pages, parse listing cards and extract
+    the details of a listing. Fetching, retries, caching and concurrency are handled
+    by ``BusScraper``, so adding a dealer only means implementing this interface.
+    """
+
+    # Identifier stored in the buses.source column
+    name = None
+    default_base_url = None
+    # Bump whenever extract_details or the helpers it calls change, so cached
+    # details built by the previous logic are discarded.
+    EXTRACTION_VERSION = "1"
+    # Politeness overrides for this site; Settings defaults apply when None
+    max_workers = None
+    requests_per_second = None
+
+    def __init__(self, base_url: Optional[str] = None):
+        self.base_url = (base_url or self.default_base_url).rstrip("/")
+        self.logger = logging.getLogger(f"BusScraper.{self.name}")
+
+    @property
+    def host(self) -> str:
+        """Host name requests to this source are pooled and rate limited by."""
+        return urlsplit(self.base_url).netloc
+
+    @abc.abstractmethod
+    def listing_url(self, page_number: int) -> str:
+        """
+        Build the URL of a listing page.
+
+        Args:
+            page_number (int): 1-based page number.
+
+        Returns:
+            str: Absolute URL of the page.
+        """
+
+    @abc.abstractmethod
+    def parse_total_pages(self, soup) -> int:
+        """
+        Read the number of listing pages from the first listing page.
+
+        Args:
+            soup (BeautifulSoup): Parsed first listing page.
+
+        Returns:
+            int: Total number of listing pages.
+        """
+
+    @abc.abstractmethod
+    def parse_listing(self, soup) -> List[dict]:
+        """
+        Parse the listing cards of a listing page.
+
+        Args:
+            soup (BeautifulSoup): Parsed listing page.
+
+        Returns:
+            List[dict]: One entry per listing with at least ``title``, ``price`` and
+                ``source_url``.
+        """
+
+    @abc.abstractmethod
+    def extract_details(self, soup) -> Optional[dict]:
+        """
+        Extract the details of a listing from its detail page.
+
+        Args:
+            soup (BeautifulSoup): Parsed detail page.
+
+        Returns:
+            Optional[dict]: JSON-serializable details, or None if extraction failed.
+        """
+
+    @abc.abstractmethod
+    def build_record(self, entry: dict, details: dict) -> BusRecord:
+        """
+        Combine a listing entry and its details into a record.
+
+        Args:
+            entry (dict): Listing entry returned by ``parse_listing``.
+            details (dict): Details returned by ``extract_details``.
+
+        Returns:
+            BusRecord: The scraped bus with its overview and images.
+        """
+
+    def sitemap_urls(self) -> List[str]:
+        """
+        Candidate sitemap URLs tried by sitemap discovery, in order.
+
+        Returns:
+            List[str]: WordPress core, Yoast and plain sitemap locations.
+        """
+        return [
+            f"{self.base_url}/wp-sitemap.xml",
+            f"{self.base_url}/sitemap_index.xml",
+            f"{self.base_url}/sitemap.xml",
+        ]
+
+    def is_listing_sitemap(self, url: str) -> bool:
+        """Whether a nested sitemap of a sitemap index can contain listing URLs."""
+        return True
+
+    def is_listing_url(self, url: str) -> bool:
+        """
+        Whether a sitemap or feed URL is a listing detail page.
+
+        Sources support sitemap discovery by overriding this; the default accepts nothing,
+        which makes discovery fall back to listing pages.
+        """
+        return False
+
+    def feed_url(self, page_number: int) -> Optional[str]:
+        """URL of a page of the source's listing feed, or None if the source has no feed."""
+        return None
+
+    def parse_feed_item(self, item: dict) -> Optional[dict]:
+        """
+        Convert a listing feed item into an entry with ``source_url`` and ``lastmod``.
+
+        Returns:
+            Optional[dict]: The entry, or None if the item is not a listing.
+        """
+        return None
+
+    def __repr__(self):
+        return f"{type(self).__name__}(name={self.name}, base_url={self.base_url})"
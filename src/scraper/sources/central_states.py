@@ -0,0 +1,326 @@
+import hashlib
+import json
+import re
+import threading
+from typing import List, Optional
+from urllib.parse import urlsplit
+import soupsieve
+from config.settings import Settings
+from src.scraper.discovery import parse_lastmod
+from src.scraper.normalize import (
+    airconditioning_option, parse_integer, parse_price, parse_year, region_for_location,
+)
+from src.scraper.records import BusRecord, OverviewRecord, ImageRecord
+from src.scraper.sources.base import SourceAdapter
+
+TEL_HREF_PATTERN = re.compile(r"tel:")
+PHONE_STRIP_PATTERN = re.compile(r"[^0-9\-]")
+ENGINE_PATTERN = re.compile(r"(Diesel|Gasoline|Electric)\s+([A-Za-z0-9\.\-]+)")
+
+# CSS selectors are compiled once per process instead of on every call
+PAGINATION_SELECTOR = soupsieve.compile(".stm_ajax_pagination .page-numbers")
+LISTING_SELECTOR = soupsieve.compile(".listing-list-loop.stm-listing-directory-list-loop")
+LISTING_TITLE_SELECTOR = soupsieve.compile(".title.heading-font a")
+LISTING_PRICE_SELECTOR = soupsieve.compile(".price .heading-font")
+TITLE_SELECTOR = soupsieve.compile("h1")
+MAIN_DESCRIPTION_SELECTOR = soupsieve.compile(".wpb_wrapper > p")
+GALLERY_IMAGE_SELECTOR = soupsieve.compile(".stm-big-car-gallery img, .stm-thumbs-car-gallery img")
+
+class CentralStatesBusAdapter(SourceAdapter):
+    """Adapter for the Central States Bus inventory (centralstatesbus.com)."""
+
+    name = "central_states"
+    default_base_url = Settings.BASE_URL
+    EXTRACTION_VERSION = "2"
+
+    def __init__(self, base_url: Optional[str] = None):
+        super().__init__(base_url)
+        # location (lowercase) -> phone, built from the site-wide contact widgets
+        self.contact_directory = {}
+        self.contact_directory_hash = None
+        self.contact_directory_lock = threading.Lock()
+
+    def listing_url(self, page_number: int) -> str:
+        if page_number > 1:
+            return f"{self.base_url}/inventory/bus-for-sale/page/{page_number}/?posts_per_page=10"
+        return f"{self.base_url}/inventory/bus-for-sale/?posts_per_page=10"
+
+    def parse_total_pages(self, soup) -> int:
+        pagination = PAGINATION_SELECTOR.select(soup)
+        page_numbers = [int(link.get_text()) for link in pagination if link.get_text().isdigit()]
+        return max(page_numbers) if page_numbers else 1
+
+    def parse_listing(self, soup) -> List[dict]:
+        entries = []
+        for item in LISTING_SELECTOR.select(soup):
+            try:
+                title_tag = LISTING_TITLE_SELECTOR.select_one(item)
+                title = title_tag.get_text(strip=True) if title_tag else None
+                source_url = title_tag["href"] if title_tag and title_tag.has_attr("href") else None
+
+                price_tag = LISTING_PRICE_SELECTOR.select_one(item)
+                price_text = price_tag.get_text(strip=True) if price_tag else "0"
+                price = self.format_price(price_text)
+
+                self.logger.debug(f"Extracted title: {title}, price: {price}, URL: {source_url}")
+
+                if not title or not price or not source_url:
+                    self.logger.warning(f"Missing title, price, or source URL for item: {item}")
+                    continue
+                entries.append({"title": title, "price": price, "source_url": source_url})
+            except Exception as e:
+                self.logger.warning(f"Error parsing item: {e}")
+        return entries
+
+    def is_listing_sitemap(self, url: str) -> bool:
+        # wp-sitemap-posts-listings-1.xml (WordPress core) or listings-sitemap.xml (Yoast)
+        return "listings" in url
+
+    def is_listing_url(self, url: str) -> bool:
+        return urlsplit(url).path.startswith("/listings/")
+
+    def feed_url(self, page_number: int) -> Optional[str]:
+        return f"{self.base_url}/wp-json/wp/v2/listings?per_page=100&page={page_number}&_fields=link,modified_gmt"
+
+    def parse_feed_item(self, item: dict) -> Optional[dict]:
+        link = item.get("link")
+        if not link or not self.is_listing_url(link):
+            return None
+        return {"source_url": link, "lastmod": parse_lastmod(item.get("modified_gmt"))}
+
+    def build_record(self, entry: dict, details: dict) -> BusRecord:
+        specs = details.get("specs") or {}
+        # Entries discovered from sitemaps carry no listing card, so fall back to the detail page
+        title = entry.get("title") or details.get("title")
+        price = entry.get("price") or specs.get("price") or 0
+        if not title:
+            raise ValueError("Missing title on listing card and detail page")
+        bus = BusRecord(
+            title=title,
+            price=str(price),  # Asegurar que price es una cadena
+            source_url=entry["source_url"],
+            vin=details.get("vin"),
+            dimensions=details.get("dimensions"),
+            luggage=details.get("luggage"),
+            state_bus_standard=details.get("state_bus_standard"),
+            contact_email=details.get("contact_email"),
+            contact_phone=details.get("contact_phone"),
+            make=specs.get("make"),
+            model=specs.get("model"),
+            body=specs.get("body"),
+            chassis=specs.get("chassis"),
+            engine=specs.get("engine"),
+            transmission=specs.get("transmission"),
+            mileage=specs.get("mileage"),
+            passengers=specs.get("capacity"),
+            wheelchair="Yes" if specs.get("wheel_chair_accessible") else "No",
+            color=specs.get("color"),
+            interior_color=specs.get("interior_color"),
+            exterior_color=specs.get("exterior_color"),
+            gvwr=specs.get("gvwr"),
+            brake=specs.get("brake"),
+            airconditioning=details.get("airconditioning"),  # Usar el campo mapeado
+            location=specs.get("location"),
+            us_region=self.map_us_region(specs.get("location")),
+            year=details.get("year"),  # Asegurar que 'year' está asignado correctamente
+        )
+
+        specs_json = json.dumps(specs)
+        bus.overview = OverviewRecord(
+            mdesc=details.get("mdesc"),
+            features=specs_json,
+            specs=specs_json,
+        )
+        bus.images = [
+            ImageRecord(
+                name=f"{title} Image {idx + 1}",
+                url=img["url"],
+                description=img["description"],
+                image_index=idx,
+            )
+            for idx, img in enumerate(details.get("images", []))
+        ]
+        return bus
+
+    def extract_details(self, soup):
+        try:
+            specs = self.extract_table_data(soup)
+            details = {
+                "title": self.extract_text(soup, TITLE_SELECTOR),
+                "mdesc": self.extract_main_description(soup),
+                "specs": specs,
+                "vin": None,
+                "dimensions": None,
+                "luggage": None,
+                "state_bus_standard": None,
+                "contact_email": None,
+                "contact_phone": None,
+                "images": self.extract_all_images(soup),
+                "year": specs.get("year")  # Asignar directamente el year desde specs
+            }
+            location = specs.get("location")
+            contact_phone = self.extract_contact_phone(soup, location)
+            details["contact_phone"] = contact_phone
+            details = self.enhance_details(details)
+            self.logger.debug(f"Extracted details: {json.dumps(details, indent=2)}")
+            return details
+        except Exception as e:
+            self.logger.error(f"Error extracting details: {e}")
+            return None
+
+    def extract_main_description(self, soup):
+        description = None
+        options_tab = soup.find("div", class_="vc_tta-panel", id=lambda x: x and "Options" in x)
+        if options_tab:
+            paragraph = options_tab.find("p")
+            if paragraph:
+                description = paragraph.get_text(strip=True)
+        else:
+            self.logger.debug("No Options tab found, attempting alternative selectors for main description.")
+            description = self.extract_text(soup, MAIN_DESCRIPTION_SELECTOR)
+        return description
+
+    def extract_text(self, soup, selector):
+        """Stripped text of the first element matching a compiled selector, or None."""
+        element = selector.select_one(soup)
+        return element.get_text(strip=True) if element else None
+
+    def extract_table_data(self, soup):
+        specs = {}
+        tables = soup.find_all("table")
+        for table in tables:
+            if table.find("td", class_="t-label") and table.find("td", class_="t-value"):
+                rows = table.find_all("tr")
+                self.logger.debug(f"Number of table rows found: {len(rows)} in table: {table}")
+                for row in rows:
+                    key_td = row.find("td", class_="t-label")
+                    value_td = row.find("td", class_="t-value")
+                    if key_td and value_td:
+                        key_text = key_td.get_text(strip=True).lower().replace(" ", "_")
+                        value_text = value_td.get_text(strip=True)
+                        if key_text in ["wheel_chair_accessible", "air_conditioning", "manufacturer_warranty_remaining"]:
+                            specs[key_text] = True if value_text.lower() == "yes" else False
+                        elif key_text in ["price", "mileage", "capacity"]:
+                            specs[key_text] = self.format_numeric(value_text)
+                        elif key_text == "year":
+                            specs[key_text] = self.format_year(value_text)
+                        else:
+                            specs[key_text] = value_text
+                    else:
+                        if key_td:
+                            key_text = key_td.get_text(strip=True).lower().replace(" ", "_")
+                            specs[key_text] = None
+        if not specs:
+            self.logger.warning("No specs found in any tables.")
+        else:
+            self.logger.debug(f"Extracted specs: {specs}")
+        return specs
+
+    def extract_contact_phone(self, soup, location):
+        try:
+            widgets_div = soup.find("div", class_="widgets cols_3 clearfix")
+            if not widgets_div:
+                self.logger.warning("No widgets section found for contact information.")
+                return None
+            if not location:
+                self.logger.warning("No location available to look up a contact phone.")
+                return None
+
+            phone_number = self.get_contact_directory(widgets_div).get(location.strip().lower())
+            if phone_number:
+                self.logger.debug(f"Found phone number for {location}: {phone_number}")
+                return phone_number
+            self.logger.warning(f"No phone number found for location: {location}")
+            return None
+        except Exception as e:
+            self.logger.warning(f"Failed to extract contact phone for location {location}: {e}")
+            return None
+
+    def get_contact_directory(self, widgets_div):
+        """
+        Get the location -> phone index for the contact widgets of a page.
+
+        The widget block is the same on every page, so the index is built once and only
+        rebuilt when the hash of the block's text changes.
+        """
+        block_hash = hashlib.sha1(widgets_div.get_text("|", strip=True).encode("utf-8")).hexdigest()
+        with self.contact_directory_lock:
+            if block_hash != self.contact_directory_hash:
+                self.contact_directory = self.build_contact_directory(widgets_div)
+                self.contact_directory_hash = block_hash
+                self.logger.info(f"Contact directory refreshed with {len(self.contact_directory)} locations.")
+            return self.contact_directory
+
+    def build_contact_directory(self, widgets_div):
+        directory = {}
+        for aside in widgets_div.find_all("aside", class_="extendedwopts-md-center widget widget_text"):
+            title_div = aside.find("div", class_="widget-title")
+            state_header = title_div.find("h6") if title_div else None
+            phone_link = aside.find("a", href=TEL_HREF_PATTERN)
+            if state_header and phone_link:
+                state = state_header.get_text(strip=True).lower()
+                directory.setdefault(state, PHONE_STRIP_PATTERN.sub("", phone_link.get_text(strip=True)))
+        return directory
+
+    def extract_all_images(self, soup):
+        images = []
+        for img_tag in GALLERY_IMAGE_SELECTOR.select(soup):
+            url = img_tag.get("src")
+            description = img_tag.get("alt", "")
+            if url:
+                images.append({"url": url, "description": description})
+        self.logger.debug(f"Number of images extracted: {len(images)}")
+        return images
+
+    def enhance_details(self, details):
+        model = details.get("specs", {}).get("model")
+        if not model:
+            self.logger.warning("No model information available to enhance details.")
+            return details
+        
+        try:
+            # Solo extraer año si no está presente
+            if not details.get("year"):
+                year = self.format_year(model)
+                details["year"] = year if year else details.get("year")
+            
+            engine_match = ENGINE_PATTERN.search(model)
+            if engine_match:
+                fuel_type = engine_match.group(1)
+                engine_info = engine_match.group(2)
+                details["specs"]["fuel_type"] = fuel_type
+                details["specs"]["engine"] = engine_info
+            
+            details["vin"] = "UNKNOWN"
+            details["dimensions"] = "UNKNOWN"
+            details["state_bus_standard"] = "STANDARD"
+            
+            # Mapear air_conditioning a los valores del Enum
+            is_air_conditioning = details.get("specs", {}).get("air_conditioning")
+            details["airconditioning"] = self.map_airconditioning_option(is_air_conditioning)
+            
+            self.logger.debug(f"Enhanced details: {json.dumps(details, indent=2)}")
+        except Exception as e:
+            self.logger.warning(f"Failed to enhance details based on model: {e}")
+        
+        return details
+
+    def map_us_region(self, location):
+        return region_for_location(location)
+
+    def map_airconditioning_option(self, is_air_conditioning):
+        return airconditioning_option(is_air_conditioning)
+
+    @staticmethod
+    def format_price(price_str):
+        price = parse_price(price_str)
+        return float(price) if price is not None else 0.0
+
+    @staticmethod
+    def format_numeric(value_str):
+        return parse_integer(value_str)
+
+    @staticmethod
+    def format_year(year_str):
+        year = parse_year(year_str)
+        return str(year) if year else None  # Devuelve una cadena
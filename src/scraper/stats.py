@@ -0,0 +1,36 @@
+import threading
+from collections import Counter
+
+class ScrapeStats:
+    """Thread-safe counters of one source's scrape, reported in the run manifest."""
+
+    COUNTERS = (
+        "pages_fetched",
+        "pages_failed",
+        "listings_discovered",
+        "listings_skipped",
+        "listings_deferred",
+        "details_fetched",
+        "details_cached",
+        "details_failed",
+        "records_failed",
+        "bytes_downloaded",
+    )
+
+    def __init__(self):
+        self.counts = dict.fromkeys(self.COUNTERS, 0)
+        self.errors = Counter()
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, amount: int = 1) -> None:
+        with self.lock:
+            self.counts[name] += amount
+
+    def record_error(self, error: BaseException) -> None:
+        """Count an error by its exception type."""
+        with self.lock:
+            self.errors[type(error).__name__] += 1
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            return dict(self.counts, errors=dict(self.errors))
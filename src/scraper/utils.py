@@ -1,6 +1,17 @@
 import re
 from typing import Optional
 
+PRICE_STRIP_PATTERN = re.compile(r"[^\d.]")
+URL_PATTERN = re.compile(
+    r'^(https?:\/\/)?'  # http:// or https://
+    r'(([\da-z.-]+)\.([a-z.]{2,6})|'  # domain...
+    r'(([0-9]{1,3}\.){3}[0-9]{1,3}))'  # ...or IPv4
+    r'(\:[0-9]{1,5})?'  # optional port
+    r'(\/[-a-z\d%_.~+]*)*'  # path
+    r'(\?[;&a-z\d%_.~+=-]*)?'  # query string
+    r'(\#[-a-z\d_]*)?$', re.IGNORECASE)  # fragment locator
+YEAR_PATTERN = re.compile(r"\b(19|20)\d{2}\b")
+
 def format_price(price_str: str) -> Optional[str]:
     """
     Format a price string by removing non-numeric characters.
@@ -14,7 +25,7 @@ def format_price(price_str: str) -> Optional[str]:
     try:
         if not price_str:
             return None
-        formatted_price = re.sub(r"[^\d.]", "", price_str)
+        formatted_price = PRICE_STRIP_PATTERN.sub("", price_str)
         return formatted_price
     except Exception as e:
         print(f"Error formatting price: {e}")
@@ -30,15 +41,7 @@ def validate_url(url: str) -> bool:
     Returns:
         bool: True if the URL is valid, False otherwise.
     """
-    regex = re.compile(
-        r'^(https?:\/\/)?'  # http:// or https://
-        r'(([\da-z.-]+)\.([a-z.]{2,6})|'  # domain...
-        r'(([0-9]{1,3}\.){3}[0-9]{1,3}))'  # ...or IPv4
-        r'(\:[0-9]{1,5})?'  # optional port
-        r'(\/[-a-z\d%_.~+]*)*'  # path
-        r'(\?[;&a-z\d%_.~+=-]*)?'  # query string
-        r'(\#[-a-z\d_]*)?$', re.IGNORECASE)  # fragment locator
-    return re.match(regex, url) is not None
+    return URL_PATTERN.match(url) is not None
 
 def parse_integer(value: str) -> Optional[int]:
     """
@@ -65,5 +68,5 @@ def extract_year(text: str) -> Optional[int]:
     Returns:
         Optional[int]: Extracted year as an integer or None if not found.
     """
-    match = re.search(r"\b(19|20)\d{2}\b", text)
+    match = YEAR_PATTERN.search(text)
     return int(match.group()) if match else None
\ No newline at end of file
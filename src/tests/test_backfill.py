@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock, patch
+from src.scraper.archive import LocalRawArchive, latest_keys, snapshot_key
+from src.scraper.backfill import Backfill
+from src.scraper.main_scraper import BusScraper
+from src.scraper.sources.central_states import CentralStatesBusAdapter
+from src.tests.test_discovery import mock_response
+from src.tests.test_scraper import DETAIL_HTML
+
+BASE_URL = "https://www.centralstatesbus.com"
+
+class TestRawArchive(unittest.TestCase):
+    def test_latest_snapshot_per_url(self):
+        url = f"{BASE_URL}/listings/1/"
+        old = snapshot_key("central_states", url, datetime(2024, 1, 1))
+        new = snapshot_key("central_states", url, datetime(2024, 6, 1))
+        other = snapshot_key("central_states", f"{BASE_URL}/listings/2/", datetime(2024, 1, 1))
+        self.assertEqual(latest_keys([new, old, other]), sorted([new, other]))
+
+    def test_scraper_archives_pages_and_backfill_reextracts(self):
+        url = f"{BASE_URL}/listings/2019-ford-e450/"
+        entry = {"title": "2019 Ford E450", "price": "45000", "source_url": url}
+        with tempfile.TemporaryDirectory() as directory:
+            archive = LocalRawArchive(directory)
+            session = MagicMock()
+            session.get.return_value = mock_response(DETAIL_HTML)
+            scraper = BusScraper(http_session=session, max_workers=1)
+            scraper.archive = archive
+            scraped = scraper.scrape_entries([entry])
+
+            # A second fetch adds a snapshot; the backfill uses only the latest one
+            scraper.scrape_entries([entry])
+            self.assertEqual(len(list(archive.keys("central_states"))), 2)
+            self.assertTrue(all(key.endswith(".json.gz") for key in archive.keys("central_states")))
+            self.assertEqual(archive.get(next(archive.keys("central_states")))["entry"], entry)
+
+            backfill = Backfill(CentralStatesBusAdapter(), archive, processes=1)
+            buses = backfill.run()
+
+        self.assertEqual(len(buses), 1)
+        self.assertEqual(buses[0].to_dict(), scraped[0].to_dict())
+        self.assertEqual(buses[0].overview.to_dict(), scraped[0].overview.to_dict())
+        self.assertEqual(backfill.stats.to_dict()["details_fetched"], 1)
+        self.assertEqual(session.get.call_count, 2)
+
+    def test_backfill_in_worker_processes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            archive = LocalRawArchive(directory)
+            for i in range(3):
+                archive.put("central_states", {"title": f"Bus {i}", "price": "1000",
+                                               "source_url": f"{BASE_URL}/listings/{i}/"}, DETAIL_HTML)
+            buses = Backfill(CentralStatesBusAdapter(), archive, processes=2).run()
+        self.assertEqual(sorted(bus.title for bus in buses), ["Bus 0", "Bus 1", "Bus 2"])
+
+    def test_backfill_bounds_chunks_in_flight(self):
+        with tempfile.TemporaryDirectory() as directory:
+            archive = LocalRawArchive(directory)
+            for i in range(10):
+                archive.put("central_states", {"title": f"Bus {i}", "price": "1000",
+                                               "source_url": f"{BASE_URL}/listings/{i}/"}, DETAIL_HTML)
+            backfill = Backfill(CentralStatesBusAdapter(), archive, processes=2, read_workers=1)
+            read, collected, in_flight = [0], [0], []
+            archive_get, collect = archive.get, backfill.collect
+
+            def counting_get(key):
+                read[0] += 1
+                return archive_get(key)
+
+            def counting_collect(results):
+                in_flight.append(read[0] - collected[0])
+                collected[0] += len(results)
+                return collect(results)
+
+            archive.get, backfill.collect = counting_get, counting_collect
+            # One snapshot per chunk, with threads standing in for the worker processes
+            with patch("src.scraper.backfill.BACKFILL_CHUNK_SIZE", 1), \
+                    patch("src.scraper.backfill.ProcessPoolExecutor", ThreadPoolExecutor):
+                buses = backfill.run()
+
+        self.assertEqual(len(buses), 10)
+        self.assertLessEqual(max(in_flight), 4)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+import requests
+from src.scraper.breaker import CircuitBreaker, CircuitOpenError, FailureBudget, is_origin_failure
+from src.scraper.checkpoint import FrontierCheckpoint
+from src.scraper.main_scraper import BusScraper
+from src.tests.test_discovery import mock_response
+from src.tests.test_scraper import DETAIL_HTML
+
+BASE_URL = "https://www.centralstatesbus.com"
+
+def http_error(status):
+    response = MagicMock()
+    response.status_code = status
+    return requests.exceptions.HTTPError(f"{status} error", response=response)
+
+class TestCircuitBreaker(unittest.TestCase):
+    def test_opens_after_consecutive_failures(self):
+        breaker = CircuitBreaker(max_consecutive_failures=3)
+        for _ in range(2):
+            breaker.record_failure()
+        breaker.record_success()
+        breaker.record_failure()
+        breaker.check()
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertTrue(breaker.is_open)
+        with self.assertRaises(CircuitOpenError):
+            breaker.check()
+
+    def test_opens_above_error_rate(self):
+        breaker = CircuitBreaker(max_consecutive_failures=0, max_error_rate=0.5, min_requests=10)
+        for _ in range(4):
+            breaker.record_success()
+            breaker.record_failure()
+        self.assertFalse(breaker.is_open)
+        breaker.record_failure()
+        breaker.record_failure()
+        self.assertIn("error rate", breaker.reason)
+
+    def test_failure_budget_is_shared(self):
+        budget = FailureBudget(max_failures=3)
+        first = CircuitBreaker(max_consecutive_failures=0, failure_budget=budget)
+        second = CircuitBreaker(max_consecutive_failures=0, failure_budget=budget)
+        first.record_failure()
+        second.record_failure()
+        second.check()
+        first.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            second.check()
+
+    def test_missing_listings_are_not_origin_failures(self):
+        self.assertFalse(is_origin_failure(http_error(404)))
+        self.assertTrue(is_origin_failure(http_error(503)))
+        self.assertTrue(is_origin_failure(requests.exceptions.ConnectTimeout()))
+
+    def test_scraper_stops_and_keeps_frontier(self):
+        """Once the site fails, the remaining entries are deferred without further requests."""
+        session = MagicMock()
+        session.get.side_effect = requests.exceptions.ConnectionError("down")
+        scraper = BusScraper(http_session=session, max_workers=1, max_retries=3,
+                             breaker=CircuitBreaker(max_consecutive_failures=4))
+        entries = [{"title": f"Bus {i}", "price": "1", "source_url": f"{BASE_URL}/listings/{i}/"} for i in range(20)]
+
+        self.assertEqual(scraper.scrape_entries(entries), [])
+        self.assertEqual(session.get.call_count, 4)
+        self.assertEqual(scraper.status, "circuit_open")
+        self.assertEqual([entry["source_url"] for entry in scraper.frontier],
+                         [entry["source_url"] for entry in entries[1:]])
+        self.assertEqual(scraper.stats.to_dict()["listings_deferred"], 19)
+
+    def test_resumed_entries_are_scraped_first(self):
+        url = f"{BASE_URL}/listings/2019-ford-e450/"
+        session = MagicMock()
+        session.get.side_effect = lambda request_url, **kwargs: (
+            mock_response(DETAIL_HTML) if request_url == url else mock_response("", status=404)
+        )
+        scraper = BusScraper(http_session=session, max_workers=1, breaker=CircuitBreaker())
+        scraper.resume_entries = [{"title": "2019 Ford E450", "price": "45000", "source_url": url}]
+
+        buses = scraper.scrape_all_pages()
+
+        self.assertEqual([bus.source_url for bus in buses], [url])
+        self.assertEqual(scraper.frontier, [])
+
+class TestFrontierCheckpoint(unittest.TestCase):
+    def test_round_trip_and_clear(self):
+        with tempfile.TemporaryDirectory() as directory:
+            checkpoint = FrontierCheckpoint(os.path.join(directory, "frontier.json"))
+            entries = [{"source_url": f"{BASE_URL}/listings/1/", "lastmod": datetime(2024, 11, 2, 14, 5)},
+                       {"source_url": f"{BASE_URL}/listings/2/", "title": "Bus"}]
+            checkpoint.save(entries)
+            self.assertEqual(checkpoint.load(), entries)
+            checkpoint.save([])
+            self.assertFalse(os.path.exists(checkpoint.path))
+            self.assertEqual(checkpoint.load(), [])
+
+if __name__ == "__main__":
+    unittest.main()
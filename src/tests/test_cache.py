@@ -0,0 +1,64 @@
+import os
+import tempfile
+import unittest
+from unittest.mock import MagicMock, patch
+from src.scraper.cache import DetailCache
+from src.scraper.main_scraper import BusScraper
+from src.tests.test_scraper import DETAIL_HTML, mock_response
+
+class TestDetailCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "detail_cache.json")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_get_returns_copy(self):
+        """Test that hits return an independent copy of the stored details."""
+        cache = DetailCache(version="1")
+        cache.put("a", {"specs": {"make": "Ford"}})
+        details = cache.get("a")
+        details["specs"]["make"] = "Blue Bird"
+        self.assertEqual(cache.get("a"), {"specs": {"make": "Ford"}})
+        self.assertEqual((cache.hits, cache.misses), (2, 0))
+
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when the cache is full."""
+        cache = DetailCache(version="1", max_entries=2)
+        cache.put("a", {})
+        cache.put("b", {})
+        cache.get("a")
+        cache.put("c", {})
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(cache.get("a"), {})
+        self.assertEqual(len(cache), 2)
+
+    def test_version_invalidates_saved_entries(self):
+        """Test that a cache file written by another extraction version is discarded."""
+        cache = DetailCache(version="1", path=self.path)
+        cache.put("a", {"year": "2019"})
+        cache.save()
+
+        same_version = DetailCache(version="1", path=self.path)
+        same_version.load()
+        self.assertEqual(same_version.get("a"), {"year": "2019"})
+
+        new_version = DetailCache(version="2", path=self.path)
+        new_version.load()
+        self.assertEqual(len(new_version), 0)
+
+    def test_fetch_details_skips_extraction_on_hit(self):
+        """Test that an identical page body is served from the cache without parsing."""
+        http_session = MagicMock()
+        http_session.get.return_value = mock_response(DETAIL_HTML)
+        scraper = BusScraper(detail_cache=DetailCache(version="1"), http_session=http_session)
+        first = scraper.fetch_details("https://www.centralstatesbus.com/listings/a/")
+
+        with patch.object(scraper.adapter, "extract_details") as extract_mock:
+            second = scraper.fetch_details("https://www.centralstatesbus.com/listings/b/")
+            extract_mock.assert_not_called()
+        self.assertEqual(first, second)
+
+if __name__ == "__main__":
+    unittest.main()
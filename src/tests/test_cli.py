@@ -0,0 +1,71 @@
+import contextlib
+import io
+import json
+import os
+import tempfile
+import unittest
+from unittest.mock import patch
+from src.cli import main
+from config.settings import Settings
+
+SAMPLE_DATA = {
+    "buses": [{"title": "2019 Ford E450", "make": "Ford", "year": "2019", "price": "45000",
+               "source_url": "http://example.com/bus/1"}],
+    "overview": [{"mdesc": "Clean bus", "source_url": "http://example.com/bus/1"}],
+    "images": [],
+}
+
+class TestCLI(unittest.TestCase):
+    def run_cli(self, argv):
+        output = io.StringIO()
+        with patch.dict(os.environ), contextlib.redirect_stdout(output):
+            code = main(argv)
+        return code, output.getvalue()
+
+    def test_load_and_export_to_directory(self):
+        with tempfile.TemporaryDirectory() as directory:
+            input_path = os.path.join(directory, "input.json")
+            with open(input_path, "w", encoding="utf-8") as input_file:
+                json.dump(SAMPLE_DATA, input_file)
+            output_dir = os.path.join(directory, "out")
+
+            code, output = self.run_cli([
+                "--phases", "load", "export", "--input", input_path,
+                "--database-url", "sqlite://", "--output-dir", output_dir,
+            ])
+
+            summary = json.loads(output)
+            self.assertEqual(code, 0)
+            self.assertEqual(summary["status"], "succeeded")
+            self.assertEqual(summary["rows_inserted"], 1)
+            with open(os.path.join(output_dir, "scraped_data.json"), encoding="utf-8") as export_file:
+                self.assertEqual(json.load(export_file)["buses"][0]["source_url"], "http://example.com/bus/1")
+            self.assertTrue(os.path.exists(os.path.join(output_dir, "runs", f"{summary['run_id']}.json")))
+
+    def test_rejects_unknown_parser(self):
+        with self.assertRaises(SystemExit) as raised, contextlib.redirect_stderr(io.StringIO()):
+            self.run_cli(["--parser", "no-such-parser"])
+        self.assertEqual(raised.exception.code, 2)
+
+    def test_dry_run_needs_a_read_phase(self):
+        with self.assertRaises(SystemExit), contextlib.redirect_stderr(io.StringIO()):
+            self.run_cli(["--dry-run", "--phases", "load"])
+
+    def test_dry_run_without_s3_settings(self):
+        """A dry run turns the image pipeline off, so it needs no bucket even when the pipeline is enabled."""
+        with patch.dict(os.environ, {}, clear=True), patch.object(Settings, "IMAGE_PIPELINE_ENABLED", True), \
+                patch("src.database.etl.ETL") as etl_class:
+            etl = etl_class.return_value
+            etl.run.return_value = SAMPLE_DATA
+            etl.manifest.summary.return_value = {"status": "succeeded"}
+            etl.manifest.status = "succeeded"
+            code, output = self.run_cli(["--dry-run", "--phases", "extract", "transform"])
+
+        self.assertEqual(code, 0)
+        self.assertEqual(json.loads(output)["would_write"], {"buses": 1, "overview": 1, "images": 0})
+        settings = etl_class.call_args[0][0]
+        self.assertFalse(settings.IMAGE_PIPELINE_ENABLED)
+        self.assertTrue(settings.DRY_RUN)
+
+if __name__ == "__main__":
+    unittest.main()
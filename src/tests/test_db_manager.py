@@ -1,34 +1,227 @@
+import os
+import tempfile
 import unittest
-from unittest.mock import MagicMock
+from decimal import Decimal
+from sqlalchemy import event, inspect
+from src.database.connection import create_db_engine
 from src.database.db_manager import DatabaseManager
+from src.database.models import Base, Bus, BusChange, BusImage, BusOverview, AirConditioningOptions, USRegion
+from src.database.spec_storage import read_specs
 
 class TestDatabaseManager(unittest.TestCase):
     def setUp(self):
-        """Set up the test case with a mocked database manager."""
-        self.db_manager = DatabaseManager()
-        self.db_manager.engine = MagicMock()
-        self.db_manager.Session = MagicMock()
+        """Set up the test case with an in-memory SQLite database manager."""
+        self.db_manager = DatabaseManager("sqlite://")
 
-    def test_insert_data(self):
-        """Test the insertion of data into a mocked database table."""
-        session_mock = MagicMock()
-        self.db_manager.Session.return_value = session_mock
+    def tearDown(self):
+        self.db_manager.engine.dispose()
 
-        sample_data = [{"title": "Test Bus", "year": "2020", "make": "Ford"}]
+    def test_insert_data(self):
+        """Test the insertion of data into the buses table."""
+        sample_data = [{"title": "Test Bus", "year": "2020", "make": "Ford", "source_url": "http://example.com/1"}]
         self.db_manager.insert_data("buses", sample_data)
 
-        session_mock.bulk_save_objects.assert_called_once()
-        session_mock.commit.assert_called_once()
+        session = self.db_manager.Session()
+        buses = session.query(Bus).all()
+        self.assertEqual(len(buses), 1)
+        self.assertEqual(buses[0].make, "Ford")
+        self.assertIsNotNone(buses[0].created_at)
+        session.close()
+
+    def test_adds_columns_missing_from_older_tables(self):
+        with tempfile.TemporaryDirectory() as directory:
+            url = f"sqlite:///{os.path.join(directory, 'buses.db')}"
+            engine = create_db_engine(url)
+            Base.metadata.create_all(engine)
+            with engine.begin() as connection:
+                # Drop the columns added since the tables were first created
+                for column in ("cluster_id", "year_number", "price_amount", "state"):
+                    connection.exec_driver_sql(f"DROP INDEX ix_buses_{column}")
+                    connection.exec_driver_sql(f"ALTER TABLE buses DROP COLUMN {column}")
+                connection.exec_driver_sql("ALTER TABLE buses_overview DROP COLUMN specs_packed")
+                connection.exec_driver_sql("ALTER TABLE buses_images DROP COLUMN storage_key")
+                connection.exec_driver_sql(
+                    "INSERT INTO buses (id, title, year, price, location, source_url, published, featured, sold, scraped, "
+                    "draft, luggage, airconditioning, us_region, score, category_id) "
+                    "VALUES (1, 'Old Bus', '2019', '45000.0', 'Missouri', 'http://example.com/1', 0, 0, 0, 0, 0, 0, "
+                    "'NONE', 'OTHER', 0, 0)"
+                )
+            engine.dispose()
+
+            db_manager = DatabaseManager(url)
+            try:
+                columns = inspect(db_manager.engine)
+                self.assertIn("cluster_id", [column["name"] for column in columns.get_columns("buses")])
+                self.assertIn("specs_packed", [column["name"] for column in columns.get_columns("buses_overview")])
+                self.assertIn("storage_key", [column["name"] for column in columns.get_columns("buses_images")])
+                self.assertIn(["cluster_id"], [index["column_names"] for index in columns.get_indexes("buses")])
+
+                db_manager.replace_bus_children(
+                    [{"bus_id": 1, "specs": '{"make": "Ford"}', "features": '{"make": "Ford"}'}],
+                    [{"bus_id": 1, "url": "http://example.com/1.jpg", "storage_key": "images/abc.jpg"}],
+                )
+                session = db_manager.Session()
+                self.assertEqual(read_specs(session.query(BusOverview).one()), {"make": "Ford"})
+                self.assertEqual(session.query(BusImage).one().storage_key, "images/abc.jpg")
+                bus = session.query(Bus).one()
+                self.assertIsNone(bus.cluster_id)
+                # Derived columns of rows stored before the columns existed are filled in
+                self.assertEqual((bus.year_number, bus.price_amount, bus.state), (2019, Decimal("45000"), "Missouri"))
+                session.close()
+
+                # Nothing is left to add on the next start
+                self.assertEqual(db_manager.add_missing_columns(), [])
+            finally:
+                db_manager.engine.dispose()
 
     def test_insert_no_data(self):
         """Test insertion with no data provided."""
-        session_mock = MagicMock()
-        self.db_manager.Session.return_value = session_mock
-
         self.db_manager.insert_data("buses", [])
 
-        session_mock.bulk_save_objects.assert_not_called()
-        session_mock.commit.assert_not_called()
+        session = self.db_manager.Session()
+        self.assertEqual(session.query(Bus).count(), 0)
+        session.close()
+
+    def test_upsert_updates_existing_bus(self):
+        """Test that buses are matched on source_url and updated in place."""
+        url = "http://example.com/1"
+        self.assertEqual(self.db_manager.upsert_buses([{"title": "Test Bus", "price": "100", "source_url": url}]),
+                         {"inserted": 1, "updated": 0, "unchanged": 0})
+        self.assertEqual(self.db_manager.upsert_buses([{"title": "Test Bus", "price": "90", "source_url": url}]),
+                         {"inserted": 0, "updated": 1, "unchanged": 0})
+        self.assertEqual(self.db_manager.upsert_buses([{"title": "Test Bus", "price": "90", "source_url": url}]),
+                         {"inserted": 0, "updated": 0, "unchanged": 1})
+
+        session = self.db_manager.Session()
+        buses = session.query(Bus).all()
+        self.assertEqual(len(buses), 1)
+        self.assertEqual(buses[0].price, "90")
+        session.close()
+
+    def test_upsert_coerces_enums(self):
+        """Test that enum columns accept names and fall back to defaults for unknown values."""
+        self.db_manager.upsert_buses([
+            {"title": "A", "source_url": "http://example.com/a", "airconditioning": "DASH", "us_region": "SOUTH"},
+            {"title": "B", "source_url": "http://example.com/b", "airconditioning": None, "us_region": "MIDWEST"},
+        ])
+
+        session = self.db_manager.Session()
+        bus_a = session.query(Bus).filter_by(source_url="http://example.com/a").one()
+        bus_b = session.query(Bus).filter_by(source_url="http://example.com/b").one()
+        self.assertEqual(bus_a.airconditioning, AirConditioningOptions.DASH)
+        self.assertEqual(bus_a.us_region, USRegion.OTHER)
+        self.assertEqual(bus_b.airconditioning, AirConditioningOptions.NONE)
+        self.assertEqual(bus_b.us_region, USRegion.MIDWEST)
+        session.close()
+
+    def test_insert_overviews(self):
+        """Test the bulk insertion of child rows."""
+        self.db_manager.upsert_buses([{"title": "Test Bus", "source_url": "http://example.com/1"}])
+        session = self.db_manager.Session()
+        bus_id = session.query(Bus.id).scalar()
+        session.close()
+
+        self.db_manager.insert_overviews([{"bus_id": bus_id, "mdesc": "Clean bus", "specs": "{}"}])
+
+        session = self.db_manager.Session()
+        self.assertEqual(session.query(BusOverview).filter_by(bus_id=bus_id).count(), 1)
+        session.close()
+
+    def test_iter_bus_records_eager_loads_children(self):
+        """Test that reading buses back issues a constant number of queries per batch."""
+        self.db_manager.upsert_buses(
+            [{"title": f"Bus {i}", "source_url": f"http://example.com/{i}"} for i in range(10)]
+        )
+        bus_ids = self.db_manager.get_bus_ids([f"http://example.com/{i}" for i in range(10)])
+        self.db_manager.replace_bus_children(
+            overviews=[{"bus_id": bus_id, "mdesc": "Clean bus"} for bus_id in bus_ids.values()],
+            images=[{"bus_id": bus_id, "url": f"{url}.jpg", "image_index": 0} for url, bus_id in bus_ids.items()],
+        )
+
+        statements = []
+        event.listen(self.db_manager.engine, "before_cursor_execute",
+                     lambda *args: statements.append(args[2]))
+        records = list(self.db_manager.iter_bus_records(batch_size=5))
+
+        self.assertEqual(len(records), 10)
+        self.assertTrue(all(record.overview.mdesc == "Clean bus" for record in records))
+        self.assertTrue(all(len(record.images) == 1 for record in records))
+        # Two full batches and one empty batch: buses + overviews + images per full batch
+        self.assertEqual(len(statements), 3 + 3 + 1)
+
+    def test_overview_specs_are_packed(self):
+        """Test that with PACK_OVERVIEW_SPECS every write path stores specs once, compressed."""
+        specs = '{"make": "Ford", "model": "E450", "fuel_type": "Diesel", "capacity": 14}'
+        self.db_manager.upsert_buses([{"title": "Bus", "source_url": "http://example.com/1"}])
+        bus_id = self.db_manager.get_bus_ids(["http://example.com/1"])["http://example.com/1"]
+
+        # Off by default, so SQL readers of the JSON columns keep working
+        self.db_manager.insert_overviews([{"bus_id": bus_id, "specs": specs, "features": specs}])
+        session = self.db_manager.Session()
+        self.assertEqual(session.query(BusOverview.specs).scalar(), specs)
+        session.close()
+
+        self.db_manager.pack_overview_specs = True
+        self.db_manager.replace_bus_children(
+            overviews=[{"bus_id": bus_id, "mdesc": "Clean bus", "specs": specs, "features": specs}], images=[]
+        )
+        self.db_manager.insert_overviews([{"bus_id": bus_id, "mdesc": "Second", "specs": specs, "features": specs}])
+
+        session = self.db_manager.Session()
+        overviews = session.query(BusOverview).order_by(BusOverview.id).all()
+        self.assertEqual(len(overviews), 2)
+        for overview in overviews:
+            self.assertIsNone(overview.specs)
+            self.assertLess(len(overview.specs_packed), len(specs))
+            self.assertEqual(read_specs(overview)["make"], "Ford")
+        session.close()
+        record = next(self.db_manager.iter_bus_records())
+        self.assertEqual((record.overview.specs, record.overview.features), (specs, specs))
+
+    def test_pack_stored_overviews(self):
+        """Test that overview rows stored as JSON are packed in place."""
+        self.db_manager.upsert_buses([{"title": "Bus", "source_url": "http://example.com/1"}])
+        bus_id = self.db_manager.get_bus_ids(["http://example.com/1"])["http://example.com/1"]
+        self.db_manager.insert_overviews([
+            {"bus_id": bus_id, "specs": '{"make": "Ford"}', "features": '{"wifi": true}'},
+            {"bus_id": bus_id, "mdesc": "No specs"},
+        ])
+
+        self.assertEqual(self.db_manager.pack_stored_overviews(), 1)
+        self.assertEqual(self.db_manager.pack_stored_overviews(), 0)
+        record = next(self.db_manager.iter_bus_records())
+        self.assertEqual((record.overview.specs, record.overview.features), ('{"make": "Ford"}', '{"wifi": true}'))
+
+    def test_upsert_records_only_changed_fields(self):
+        """Test that the change history holds the first price and later changed fields only."""
+        url = "http://example.com/1"
+        bus = {"title": "Test Bus", "price": "50000", "mileage": "20000", "sold": False, "source_url": url}
+        self.db_manager.upsert_buses([bus])
+        self.db_manager.upsert_buses([bus])
+        self.db_manager.upsert_buses([dict(bus, price="45000", sold=True)])
+
+        session = self.db_manager.Session()
+        changes = session.query(BusChange).order_by(BusChange.id).all()
+        self.assertEqual(
+            [(change.field, change.old_value, change.new_value) for change in changes],
+            [("price", None, "50000"), ("price", "50000", "45000"), ("sold", "0", "1")],
+        )
+        self.assertEqual({change.bus_id for change in changes}, {session.query(Bus.id).scalar()})
+        session.close()
+
+    def test_upsert_ignores_normalized_formatting(self):
+        """Test that values stored before normalization are not recorded as changed."""
+        url = "http://example.com/1"
+        self.db_manager.upsert_buses([{"title": "Test Bus", "price": "45000.0", "year": "2019 Ford",
+                                       "mileage": "85,000 mi", "source_url": url}])
+        self.db_manager.upsert_buses([{"title": "Test Bus", "price": "45000", "year": "2019",
+                                       "mileage": "85000", "source_url": url}])
+
+        session = self.db_manager.Session()
+        changes = session.query(BusChange).order_by(BusChange.id).all()
+        self.assertEqual([(change.field, change.new_value) for change in changes], [("price", "45000.0")])
+        self.assertEqual(session.query(Bus).one().price, "45000")
+        session.close()
 
 if __name__ == "__main__":
     unittest.main()
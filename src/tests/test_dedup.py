@@ -0,0 +1,73 @@
+import unittest
+from src.database.db_manager import DatabaseManager
+from src.database.dedup import Listing, candidate_pairs, cluster_listings, similarity
+from src.database.queries import BusQueries, FacetCache
+
+class TestDuplicateDetection(unittest.TestCase):
+    def test_similarity(self):
+        original = Listing(1, make="Ford", model="E450 Diesel", year="2019", mileage="85000", price="45000.0",
+                           location="Missouri")
+        relisted = Listing(2, make="ford", model="E450 Diesel 6.7L", year="2019", mileage="85,400 mi",
+                           price="43000.0", location="Missouri")
+        other_year = Listing(3, make="Ford", model="E450 Diesel", year="2018", mileage="85000", price="45000.0")
+        other_unit = Listing(4, make="Ford", model="E450 Diesel", year="2019", mileage="150000", price="30000.0",
+                             location="Texas")
+
+        self.assertGreaterEqual(similarity(original, relisted), 0.85)
+        self.assertEqual(similarity(original, other_year), 0.0)
+        self.assertLess(similarity(original, other_unit), 0.85)
+
+    def test_shared_images_link_listings_across_blocks(self):
+        a = Listing(1, make="Blue Bird", year="2021", price="100000", image_hashes=["h1", "h2"])
+        b = Listing(2, make=None, year="2021", price="99000", image_hashes=["h1", "h2", "h3"])
+        self.assertIn((0, 1), candidate_pairs([a, b]))
+        self.assertEqual(cluster_listings([a, b]), {1: 2, 2: 2})
+
+    def test_candidate_pairs_are_subquadratic(self):
+        listings = [Listing(i, make="Ford", year="2019", mileage=str(1000 * i)) for i in range(1, 501)]
+        self.assertLess(len(candidate_pairs(listings)), 500 * 11)
+
+    def test_cluster_ids_stored_and_collapsed(self):
+        db_manager = DatabaseManager("sqlite://")
+        try:
+            base = {"make": "Ford", "model": "E450", "year": "2019", "mileage": "85000", "location": "Missouri"}
+            db_manager.upsert_buses([
+                dict(base, title="2019 Ford E450", price="45000.0", source_url="http://a.example.com/1"),
+                dict(base, title="2019 Ford E-450", price="44500.0", source_url="http://b.example.com/9"),
+                dict(base, title="2019 Ford E450", mileage="20000", price="70000.0",
+                     source_url="http://a.example.com/2"),
+            ])
+            self.assertEqual(db_manager.assign_duplicate_clusters(), 2)
+
+            bus_ids = db_manager.get_bus_ids(["http://a.example.com/1", "http://b.example.com/9"])
+            self.assertEqual(db_manager.get_duplicate_source_urls(), ["http://a.example.com/1"])
+            page = BusQueries(db_manager, cache=FacetCache(), ttl=0).search()
+            self.assertEqual(sorted(bus.source_url for bus in page.buses),
+                             ["http://a.example.com/2", "http://b.example.com/9"])
+            self.assertLess(bus_ids["http://a.example.com/1"], bus_ids["http://b.example.com/9"])
+        finally:
+            db_manager.engine.dispose()
+
+    def test_shared_photo_groups_stored_and_unstored_images(self):
+        """The same photo links two listings whether or not the image pipeline stored it."""
+        db_manager = DatabaseManager("sqlite://")
+        try:
+            db_manager.upsert_buses([
+                {"title": "2021 Blue Bird Vision", "make": "Blue Bird", "year": "2021", "price": "100000",
+                 "source_url": "http://a.example.com/1"},
+                {"title": "Vision school bus", "year": "2021", "price": "99000",
+                 "source_url": "http://b.example.com/7"},
+            ])
+            bus_ids = db_manager.get_bus_ids(["http://a.example.com/1", "http://b.example.com/7"])
+            photo = "https://cdn.example.com/uploads/bus-front"
+            db_manager.replace_bus_children([], [
+                {"bus_id": bus_ids["http://a.example.com/1"], "url": f"{photo}-1024x768.jpg",
+                 "storage_key": "images/3f2a.jpg"},
+                {"bus_id": bus_ids["http://b.example.com/7"], "url": f"{photo}.jpg"},
+            ])
+            self.assertEqual(db_manager.assign_duplicate_clusters(), 2)
+        finally:
+            db_manager.engine.dispose()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import io
+import unittest
+from datetime import datetime
+from unittest.mock import MagicMock
+import requests
+from src.scraper.discovery import iter_sitemap, parse_lastmod
+from src.scraper.main_scraper import BusScraper
+from src.tests.test_scraper import DETAIL_HTML, LISTING_HTML
+
+BASE_URL = "https://www.centralstatesbus.com"
+
+SITEMAP_INDEX = f"""<?xml version="1.0" encoding="UTF-8"?>
+<sitemapindex xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <sitemap><loc>{BASE_URL}/wp-sitemap-posts-page-1.xml</loc></sitemap>
+  <sitemap><loc>{BASE_URL}/wp-sitemap-posts-listings-1.xml</loc></sitemap>
+</sitemapindex>
+"""
+
+LISTINGS_SITEMAP = f"""<?xml version="1.0" encoding="UTF-8"?>
+<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9">
+  <url><loc>{BASE_URL}/listings/2019-ford-e450/</loc><lastmod>2024-11-02T14:05:00+00:00</lastmod></url>
+  <url><loc>{BASE_URL}/listings/2018-ford-e350/</loc><lastmod>2024-10-01T09:00:00+00:00</lastmod></url>
+  <url><loc>{BASE_URL}/about-us/</loc></url>
+</urlset>
+"""
+
+def mock_response(body, status=200):
+    response = MagicMock()
+    response.text = body
+    response.content = body.encode()
+    response.raw = io.BytesIO(body.encode())
+    response.__enter__.return_value = response
+    if status >= 400:
+        response.raise_for_status.side_effect = requests.exceptions.HTTPError(f"{status} error")
+    else:
+        response.raise_for_status.return_value = None
+    return response
+
+def mock_session(pages):
+    """Session whose GETs serve ``pages`` by URL and 404 everything else."""
+    session = MagicMock()
+    session.get.side_effect = lambda url, **kwargs: (
+        mock_response(pages[url]) if url in pages else mock_response("", status=404)
+    )
+    return session
+
+class TestSitemapParsing(unittest.TestCase):
+    def test_iter_sitemap_reads_index_and_urlset(self):
+        index = list(iter_sitemap(io.BytesIO(SITEMAP_INDEX.encode())))
+        self.assertEqual([kind for kind, _, _ in index], ["sitemap", "sitemap"])
+
+        urls = list(iter_sitemap(io.BytesIO(LISTINGS_SITEMAP.encode())))
+        self.assertEqual(len(urls), 3)
+        self.assertEqual(urls[0], ("url", f"{BASE_URL}/listings/2019-ford-e450/", datetime(2024, 11, 2, 14, 5)))
+        self.assertIsNone(urls[2][2])
+
+    def test_parse_lastmod_normalizes_to_utc(self):
+        self.assertEqual(parse_lastmod("2024-11-02T09:05:00-05:00"), datetime(2024, 11, 2, 14, 5))
+        self.assertEqual(parse_lastmod("2024-11-02"), datetime(2024, 11, 2))
+        self.assertIsNone(parse_lastmod("yesterday"))
+
+class TestSitemapDiscovery(unittest.TestCase):
+    def test_sitemap_discovery_skips_unchanged_listings(self):
+        session = mock_session({
+            f"{BASE_URL}/wp-sitemap.xml": SITEMAP_INDEX,
+            f"{BASE_URL}/wp-sitemap-posts-listings-1.xml": LISTINGS_SITEMAP,
+            f"{BASE_URL}/listings/2019-ford-e450/": DETAIL_HTML.replace(
+                "<table>", "<h1>2019 Ford E450</h1><table>"
+            ),
+        })
+        scraper = BusScraper(http_session=session, max_workers=1, discovery_mode="sitemap")
+        scraper.last_fetched = {
+            f"{BASE_URL}/listings/2019-ford-e450/": datetime(2024, 11, 1),
+            f"{BASE_URL}/listings/2018-ford-e350/": datetime(2024, 10, 15),
+        }
+
+        buses = scraper.scrape_all_pages()
+
+        self.assertEqual([bus.source_url for bus in buses], [f"{BASE_URL}/listings/2019-ford-e450/"])
+        self.assertEqual(buses[0].title, "2019 Ford E450")
+        requested = [call.args[0] for call in session.get.call_args_list]
+        self.assertNotIn(f"{BASE_URL}/listings/2018-ford-e350/", requested)
+        self.assertNotIn(f"{BASE_URL}/wp-sitemap-posts-page-1.xml", requested)
+        stats = scraper.stats.to_dict()
+        self.assertEqual(stats["listings_skipped"], stats["listings_discovered"] - 1)
+        self.assertEqual(stats["details_fetched"], 1)
+
+    def test_falls_back_to_listing_pages_without_sitemap(self):
+        scraper = BusScraper(max_workers=1, discovery_mode="sitemap")
+        session = mock_session({
+            scraper.adapter.listing_url(1): LISTING_HTML,
+            f"{BASE_URL}/listings/2019-ford-e450/": DETAIL_HTML,
+        })
+        scraper.http = session
+
+        buses = scraper.scrape_all_pages()
+
+        self.assertEqual(len(buses), 1)
+        self.assertEqual(buses[0].title, "2019 Ford E450")
+        self.assertEqual(buses[0].price, "45000.0")
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,32 +1,39 @@
+import os
+import tempfile
 import unittest
 from unittest.mock import MagicMock
 from src.database.etl import ETL
-from src.scraper.models import Bus
+from src.database.db_manager import DatabaseManager
+from src.database.models import Bus, BusOverview, BusImage
+from src.scraper.records import BusRecord, OverviewRecord, ImageRecord
+from src.scraper.stats import ScrapeStats
 from config.settings import Settings
 
 class TestETL(unittest.TestCase):
     def setUp(self):
-        """Set up the test case with mocked ETL and settings."""
+        """Set up the test case with an ETL instance and sample records."""
         self.settings = Settings()
         self.etl = ETL(self.settings)
-        self.sample_data = [
-            Bus(
-                name="Test Bus",
-                price=50000,
-                year="2020",
-                make="Ford",
-                model="E450",
-                vin="1HGBH41JXMN109186",
-                mileage=20000,
-                passengers=52,
-                wheelchair_accessible=True,
-                location="Florida, USA",
-                description="Well-maintained bus with low mileage.",
-                features=["GPS", "ABS Brakes"],
-                specifications={"Engine": "V8", "Transmission": "Automatic"},
-                images=[{"url": "http://example.com/image1.jpg", "description": "Front view", "index": 0}]
-            )
-        ]
+        bus = BusRecord(
+            title="Test Bus",
+            price="50000",
+            year="2020",
+            make="Ford",
+            model="E450",
+            vin="1HGBH41JXMN109186",
+            mileage=20000,
+            passengers=52,
+            wheelchair="Yes",
+            location="Missouri",
+            airconditioning="DASH",
+            us_region="MIDWEST",
+            description="Well-maintained bus with low mileage.",
+            source_url="http://example.com/bus/1",
+        )
+        bus.overview = OverviewRecord(mdesc="Clean bus", features="{}", specs="{}")
+        bus.images = [ImageRecord(name="Test Bus Image 1", url="http://example.com/image1.jpg",
+                                  description="Front view", image_index=0)]
+        self.sample_data = [bus]
 
     def test_transform(self):
         """Test the transformation step of ETL."""
@@ -36,15 +43,173 @@ class TestETL(unittest.TestCase):
         self.assertIn("images", transformed)
         self.assertEqual(len(transformed["buses"]), 1)
         self.assertEqual(len(transformed["images"]), 1)
+        self.assertEqual(transformed["images"][0]["source_url"], "http://example.com/bus/1")
 
     def test_load(self):
-        """Test the load step of ETL with mocked DB manager."""
-        self.etl.db_manager.insert_data = MagicMock()
+        """Test the load step of ETL against an in-memory database."""
+        self.etl.db_manager = DatabaseManager("sqlite://")
         transformed = self.etl.transform(self.sample_data)
+        # Loading twice must update the bus and replace, not duplicate, its children
         self.etl.load(transformed)
-        self.etl.db_manager.insert_data.assert_any_call("buses", transformed["buses"])
-        self.etl.db_manager.insert_data.assert_any_call("buses_overview", transformed["overview"])
-        self.etl.db_manager.insert_data.assert_any_call("buses_images", transformed["images"])
+        self.etl.load(transformed)
+
+        session = self.etl.db_manager.Session()
+        bus = session.query(Bus).one()
+        self.assertEqual(bus.make, "Ford")
+        self.assertEqual(session.query(BusOverview).filter_by(bus_id=bus.id).count(), 1)
+        self.assertEqual(session.query(BusImage).filter_by(bus_id=bus.id).count(), 1)
+        session.close()
+
+    def test_run_records_manifest(self):
+        """Test that a run stores its manifest with the rows it wrote."""
+        etl = ETL(self.settings, phases=["load"])
+        etl.db_manager = DatabaseManager("sqlite://")
+        etl.run(data=self.etl.transform(self.sample_data))
+
+        manifest = etl.db_manager.get_run(etl.manifest.run_id)
+        self.assertEqual(manifest["status"], "succeeded")
+        self.assertEqual(manifest["totals"]["rows_inserted"], 1)
+        self.assertIn("load", manifest["timings"])
+
+    def test_run_stops_when_circuit_opens(self):
+        """Test that a run whose breaker opened before scraping anything checkpoints and stops."""
+        scraper = MagicMock(circuit_open=True, status="circuit_open", detail_cache=None, resume_entries=[],
+                            frontier=[{"source_url": "http://example.com/bus/2"}], stats=ScrapeStats())
+        scraper.adapter.name = "central_states"
+        etl = ETL(self.settings, phases=["extract", "transform", "export"])
+        etl.scheduler = MagicMock(scrapers=[scraper])
+        etl.scheduler.run.return_value = []
+        etl.s3_client = MagicMock()
+        with tempfile.TemporaryDirectory() as directory:
+            etl.settings.FRONTIER_CHECKPOINT_PATH = os.path.join(directory, "frontier.json")
+            self.assertIsNone(etl.run())
+            self.assertTrue(os.path.exists(os.path.join(directory, "frontier.central_states.json")))
+        self.assertEqual(etl.manifest.status, "circuit_open")
+        self.assertEqual(etl.manifest.sources["central_states"]["status"], "circuit_open")
+        etl.s3_client.put_object.assert_not_called()
+
+    def test_run_with_a_failed_source_is_partial(self):
+        """Test that a run where one source failed records it and finishes as partial."""
+        scrapers = []
+        for name, status in (("central_states", "completed"), ("other", "failed")):
+            scraper = MagicMock(circuit_open=False, status=status, detail_cache=None, resume_entries=[],
+                                frontier=[], stats=ScrapeStats())
+            scraper.adapter.name = name
+            scrapers.append(scraper)
+        etl = ETL(self.settings, phases=["extract", "transform", "load"])
+        etl.settings.S3_BUCKET_NAME = None
+        etl.db_manager = DatabaseManager("sqlite://")
+        etl.scheduler = MagicMock(scrapers=scrapers, failures={"other": RuntimeError("listing markup changed")})
+        etl.scheduler.run.return_value = self.sample_data
+        with tempfile.TemporaryDirectory() as directory:
+            etl.settings.FRONTIER_CHECKPOINT_PATH = os.path.join(directory, "frontier.json")
+            etl.run()
+
+        self.assertEqual(etl.manifest.status, "partial")
+        self.assertEqual(etl.manifest.sources["other"]["status"], "failed")
+        self.assertEqual(dict(etl.manifest.errors), {"RuntimeError": 1})
+        self.assertEqual(etl.db_manager.get_run(etl.manifest.run_id)["status"], "partial")
+
+    def test_failed_scrape_persists_extracted_details(self):
+        """Test that details extracted before a scrape failure are saved, and checkpoints are kept."""
+        scraper = MagicMock(detail_cache=MagicMock(path="/nonexistent/cache.json"), resume_entries=[],
+                            frontier=[], stats=ScrapeStats())
+        scraper.adapter.name = "central_states"
+        etl = ETL(self.settings, phases=["extract"])
+        etl.settings.S3_BUCKET_NAME = None
+        etl.scheduler = MagicMock(scrapers=[scraper])
+        etl.scheduler.run.side_effect = RuntimeError("worker crashed")
+        with tempfile.TemporaryDirectory() as directory:
+            etl.settings.FRONTIER_CHECKPOINT_PATH = os.path.join(directory, "frontier.json")
+            checkpoint_path = os.path.join(directory, "frontier.central_states.json")
+            with open(checkpoint_path, "w", encoding="utf-8") as checkpoint_file:
+                checkpoint_file.write("[]")
+            with self.assertRaises(RuntimeError):
+                etl.extract()
+            self.assertTrue(os.path.exists(checkpoint_path))
+        scraper.detail_cache.save.assert_called_once()
+
+    def test_dry_run_leaves_caches_and_checkpoints_alone(self):
+        """Test that a dry run reads the checkpoints but neither clears nor rewrites them."""
+        scraper = MagicMock(detail_cache=MagicMock(path="/nonexistent/cache.json"), frontier=[],
+                            status="completed", stats=ScrapeStats())
+        scraper.adapter.name = "central_states"
+        etl = ETL(self.settings, phases=["extract"])
+        etl.settings.DRY_RUN = True
+        etl.settings.S3_BUCKET_NAME = None
+        etl.scheduler = MagicMock(scrapers=[scraper], failures={})
+        etl.scheduler.run.return_value = self.sample_data
+        with tempfile.TemporaryDirectory() as directory:
+            etl.settings.FRONTIER_CHECKPOINT_PATH = os.path.join(directory, "frontier.json")
+            checkpoint_path = os.path.join(directory, "frontier.central_states.json")
+            with open(checkpoint_path, "w", encoding="utf-8") as checkpoint_file:
+                checkpoint_file.write('[{"source_url": "http://example.com/bus/2"}]')
+            etl.extract()
+            self.assertEqual(scraper.resume_entries, [{"source_url": "http://example.com/bus/2"}])
+            self.assertTrue(os.path.exists(checkpoint_path))
+        scraper.detail_cache.save.assert_not_called()
+
+    def test_backfill_loads_archived_pages(self):
+        """Test that a backfill run re-extracts archived pages without creating a scraper."""
+        from src.scraper.archive import LocalRawArchive
+        from src.tests.test_scraper import DETAIL_HTML
+        with tempfile.TemporaryDirectory() as directory:
+            archive = LocalRawArchive(directory)
+            archive.put("central_states", {"title": "2019 Ford E450", "price": "45000",
+                                           "source_url": "http://example.com/bus/1"}, DETAIL_HTML)
+            etl = ETL(self.settings, phases=["extract", "transform", "load"])
+            etl.settings.BACKFILL = True
+            etl.settings.BACKFILL_PROCESSES = 1
+            etl.raw_archive = archive
+            etl.db_manager = DatabaseManager("sqlite://")
+            etl.run()
+
+        self.assertIsNone(etl._scheduler)
+        self.assertEqual(etl.manifest.rows["inserted"], 1)
+        self.assertEqual(etl.manifest.sources["central_states"]["status"], "backfill")
+
+    def test_init_is_lazy(self):
+        """Test that ETL creates no database, scraper or S3 client until they are used."""
+        etl = ETL(self.settings, phases=["export"])
+        self.assertIsNone(etl._db_manager)
+        self.assertIsNone(etl._scheduler)
+        self.assertIsNone(etl._s3_client)
+
+    def test_unknown_phase(self):
+        """Test that unknown phases are rejected."""
+        with self.assertRaises(ValueError):
+            ETL(self.settings, phases=["crawl"])
+
+    def test_run_export_only(self):
+        """Test that an export-only run uploads the given data without touching the database."""
+        etl = ETL(self.settings, phases=["export"])
+        etl.s3_client = MagicMock()
+        data = {"buses": [], "overview": [], "images": []}
+        etl.run(data=data)
+        etl.s3_client.put_object.assert_called_once()
+        self.assertIsNone(etl._db_manager)
+
+    def test_run_export_only_from_database(self):
+        """Test that an export-only run without data exports the buses stored in the database."""
+        db_manager = DatabaseManager("sqlite://")
+        self.etl.db_manager = db_manager
+        self.etl.load(self.etl.transform(self.sample_data))
+
+        etl = ETL(self.settings, phases=["export"])
+        etl.db_manager = db_manager
+        etl.s3_client = MagicMock()
+        data = etl.run()
+        self.assertEqual([bus["source_url"] for bus in data["buses"]], ["http://example.com/bus/1"])
+        self.assertEqual(data["buses"][0]["airconditioning"], "DASH")
+        self.assertEqual(len(data["overview"]), 1)
+        self.assertEqual(len(data["images"]), 1)
+        etl.s3_client.put_object.assert_called_once()
+
+    def test_run_load_only_without_data(self):
+        """Test that a load-only run fails without data to load."""
+        etl = ETL(self.settings, phases=["load"])
+        with self.assertRaises(ValueError):
+            etl.run()
 
 if __name__ == "__main__":
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import unittest
+from datetime import datetime, timedelta
+from unittest.mock import MagicMock
+from src.database.db_manager import DatabaseManager
+from src.scraper.frontier import CrawlBudget, PriorityFrontier
+from src.scraper.main_scraper import BusScraper
+from src.tests.test_discovery import mock_response
+from src.tests.test_scraper import DETAIL_HTML
+
+BASE_URL = "https://www.centralstatesbus.com"
+NOW = datetime(2024, 11, 10)
+
+def entry(slug, price="45000", **fields):
+    return dict({"title": slug, "price": price, "source_url": f"{BASE_URL}/listings/{slug}/"}, **fields)
+
+def history(price="45000", updated_days_ago=1, created_days_ago=90, changes=0):
+    return {
+        "price": price,
+        "updated_at": NOW - timedelta(days=updated_days_ago),
+        "created_at": NOW - timedelta(days=created_days_ago),
+        "changes": changes,
+    }
+
+class TestPriorityFrontier(unittest.TestCase):
+    def test_orders_by_likelihood_of_change(self):
+        frontier = PriorityFrontier({
+            entry("unchanged")["source_url"]: history(),
+            entry("repriced")["source_url"]: history(price="$49,000"),
+            entry("stale")["source_url"]: history(updated_days_ago=30),
+            entry("volatile")["source_url"]: history(changes=6),
+        }, now=NOW)
+        entries = [entry("unchanged"), entry("volatile"), entry("stale"), entry("repriced"), entry("new")]
+
+        ordered = [item["title"] for item in frontier.order(entries)]
+
+        self.assertEqual(ordered, ["new", "repriced", "stale", "volatile", "unchanged"])
+
+    def test_sitemap_lastmod_newer_than_fetch_is_boosted(self):
+        url = entry("modified")["source_url"]
+        frontier = PriorityFrontier({url: history(updated_days_ago=3)}, now=NOW)
+        modified = entry("modified", lastmod=NOW - timedelta(days=1))
+        self.assertGreater(frontier.score(modified), frontier.score(entry("modified")))
+
+    def test_without_history_keeps_discovery_order(self):
+        entries = [entry("b"), entry("a")]
+        self.assertEqual(PriorityFrontier().order(entries), entries)
+
+class TestCrawlBudget(unittest.TestCase):
+    def test_request_budget(self):
+        budget = CrawlBudget(max_requests=2)
+        budget.start()
+        self.assertEqual([budget.spend() for _ in range(3)], [True, True, False])
+        self.assertTrue(budget.exhausted)
+        self.assertFalse(CrawlBudget().exhausted)
+
+    def test_scraper_fetches_highest_priority_within_budget(self):
+        """Only the budgeted fetches are made, for the most valuable listings; the rest are deferred."""
+        session = MagicMock()
+        session.get.return_value = mock_response(DETAIL_HTML)
+        scraper = BusScraper(http_session=session, max_workers=1, budget=CrawlBudget(max_requests=1))
+        scraper.discover = lambda: [entry("unchanged"), entry("repriced", price="39000")]
+        scraper.crawl_history = {
+            entry("unchanged")["source_url"]: history(),
+            entry("repriced")["source_url"]: history(),
+        }
+
+        buses = scraper.scrape_all_pages()
+
+        self.assertEqual([bus.source_url for bus in buses], [entry("repriced")["source_url"]])
+        self.assertEqual(session.get.call_count, 1)
+        self.assertEqual([item["title"] for item in scraper.frontier], ["unchanged"])
+        self.assertEqual(scraper.status, "budget_exhausted")
+        self.assertEqual(scraper.stats.to_dict()["listings_deferred"], 1)
+
+    def test_resumed_listings_are_fetched_before_higher_scoring_ones(self):
+        """A checkpointed listing is fetched before new listings, however they score."""
+        session = MagicMock()
+        session.get.return_value = mock_response(DETAIL_HTML)
+        scraper = BusScraper(http_session=session, max_workers=1, budget=CrawlBudget(max_requests=1))
+        scraper.discover = lambda: [entry("new-listing"), entry("deferred")]
+        scraper.resume_entries = [entry("deferred")]
+        scraper.crawl_history = {entry("deferred")["source_url"]: history()}
+
+        buses = scraper.scrape_all_pages()
+
+        self.assertEqual([bus.source_url for bus in buses], [entry("deferred")["source_url"]])
+        self.assertEqual([item["title"] for item in scraper.frontier], ["new-listing"])
+
+class TestCrawlHistory(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager("sqlite://")
+
+    def tearDown(self):
+        self.db_manager.engine.dispose()
+
+    def test_counts_changes_after_insert(self):
+        url = "http://example.com/1"
+        bus = {"title": "Bus", "price": "45000", "source": "central_states", "source_url": url}
+        self.db_manager.insert_data("buses", [bus])
+        self.db_manager.insert_data("buses", [dict(bus, price="42000")])
+        self.db_manager.insert_data("buses", [dict(bus, price="42000")])
+
+        known = self.db_manager.get_crawl_history("central_states")[url]
+
+        self.assertEqual(known["price"], "42000")
+        self.assertEqual(known["changes"], 1)
+        self.assertIsNotNone(known["updated_at"])
+        self.assertEqual(self.db_manager.get_crawl_history("other_source"), {})
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,120 @@
+import hashlib
+import io
+import unittest
+from unittest.mock import MagicMock
+from src.scraper.images import ImagePipeline, canonicalize_image_url, select_largest_variants
+from src.scraper.scheduler import SourceScheduler
+
+BUS_URL = "https://www.centralstatesbus.com/listings/2019-ford-e450/"
+
+def image_response(body):
+    response = MagicMock()
+    response.__enter__.return_value = response
+    response.raw = io.BytesIO(body)
+    response.headers = {"Content-Type": "image/jpeg"}
+    response.raise_for_status.return_value = None
+    return response
+
+class TestImagePipeline(unittest.TestCase):
+    def test_canonicalize_image_url(self):
+        """Test that size variants of an asset share one canonical URL."""
+        thumb = canonicalize_image_url("http://WWW.Example.com/uploads/bus-150x150.jpg?ver=2")
+        original = canonicalize_image_url("https://www.example.com/uploads/bus.jpg")
+        self.assertEqual(thumb, ("https://www.example.com/uploads/bus.jpg", 22500))
+        self.assertEqual(original, ("https://www.example.com/uploads/bus.jpg", None))
+
+    def test_select_largest_variants(self):
+        """Test that only the largest variant of each image is kept per bus."""
+        images = [
+            {"source_url": BUS_URL, "url": "https://example.com/a-800x600.jpg", "image_index": 0},
+            {"source_url": BUS_URL, "url": "https://example.com/b-800x600.jpg", "image_index": 1},
+            {"source_url": BUS_URL, "url": "https://example.com/a-150x150.jpg", "image_index": 2},
+            {"source_url": BUS_URL, "url": "https://example.com/b.jpg", "image_index": 3},
+        ]
+        selected = select_largest_variants(images)
+        self.assertEqual(
+            [(image["url"], image["image_index"]) for image in selected],
+            [("https://example.com/a-800x600.jpg", 0), ("https://example.com/b.jpg", 1)],
+        )
+
+    def test_store_dedupes_identical_content(self):
+        """Test that images with identical bytes end up under a single content-addressed key."""
+        http = MagicMock()
+        http.get.side_effect = lambda url, **kwargs: image_response(b"same-bytes")
+        s3_client = FakeS3()
+
+        pipeline = ImagePipeline(s3_client, "bucket", max_workers=1, http=http)
+        stored = pipeline.store([
+            {"source_url": BUS_URL, "url": "https://example.com/a.jpg", "image_index": 0},
+            {"source_url": BUS_URL, "url": "https://example.com/b.jpg", "image_index": 1},
+        ])
+
+        self.assertEqual(len(stored), 1)
+        self.assertEqual(stored[0]["storage_key"], f"images/{hashlib.sha256(b'same-bytes').hexdigest()}.jpg")
+        self.assertEqual(s3_client.uploads, 1)
+        self.assertEqual(pipeline.bytes_downloaded, 2 * len(b"same-bytes"))
+
+    def test_later_runs_reuse_stored_assets(self):
+        """Test that a second run downloads nothing, even for query or size variants, and deletes nothing."""
+        http = MagicMock()
+        http.get.side_effect = lambda url, **kwargs: image_response(url.split("?")[0].encode())
+        get_mock = http.get
+        s3_client = FakeS3()
+        first = ImagePipeline(s3_client, "bucket", http=http).store([
+            {"source_url": BUS_URL, "url": "https://example.com/a.jpg?ver=1", "image_index": 0},
+        ])
+        self.assertEqual(get_mock.call_count, 1)
+
+        second = ImagePipeline(s3_client, "bucket", http=http).store([
+            {"source_url": BUS_URL, "url": "https://example.com/a.jpg?ver=2", "image_index": 0},
+            {"source_url": "https://example.com/other-bus/", "url": "https://example.com/a-300x200.jpg",
+             "image_index": 0},
+        ])
+
+        self.assertEqual(get_mock.call_count, 1)
+        self.assertEqual({image["storage_key"] for image in second}, {first[0]["storage_key"]})
+        self.assertIn(first[0]["storage_key"], s3_client.objects)
+        self.assertEqual(s3_client.deletes, 0)
+
+    def test_open_breaker_stops_downloads(self):
+        """Test that images are fetched through the source host's clients and skipped once its breaker is open."""
+        scheduler = SourceScheduler(requests_per_second=0)
+        session, _, breaker = scheduler.host_clients("www.centralstatesbus.com")
+        session.get = MagicMock(side_effect=lambda url, **kwargs: image_response(b"bytes"))
+        pipeline = ImagePipeline(FakeS3(), "bucket", http=scheduler)
+
+        self.assertIsNotNone(pipeline.store_image("https://www.centralstatesbus.com/uploads/a.jpg"))
+        breaker.reason = "5 consecutive failures"
+        self.assertIsNone(pipeline.store_image("https://www.centralstatesbus.com/uploads/b.jpg"))
+        self.assertEqual(session.get.call_count, 1)
+
+class FakeS3:
+    """In-memory stand-in for the S3 calls made by the image pipeline."""
+
+    def __init__(self):
+        self.objects = {}
+        self.uploads = 0
+        self.deletes = 0
+
+    def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise Exception("Not Found")
+
+    def get_object(self, Bucket, Key):
+        if Key not in self.objects:
+            raise Exception("NoSuchKey")
+        return {"Body": io.BytesIO(self.objects[Key])}
+
+    def put_object(self, Bucket, Key, Body, **kwargs):
+        self.objects[Key] = Body
+
+    def upload_fileobj(self, fileobj, Bucket, Key, ExtraArgs=None):
+        self.uploads += 1
+        self.objects[Key] = fileobj.read()
+
+    def delete_object(self, Bucket, Key):
+        self.deletes += 1
+        self.objects.pop(Key, None)
+
+if __name__ == "__main__":
+    unittest.main()
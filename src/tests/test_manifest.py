@@ -0,0 +1,59 @@
+import io
+import unittest
+from contextlib import redirect_stdout
+from unittest.mock import patch
+from src.database.db_manager import DatabaseManager
+from src.database.manifest import RunManifest, format_comparison, main
+from src.scraper.stats import ScrapeStats
+
+class TestRunManifest(unittest.TestCase):
+    def make_manifest(self, fetched, failed):
+        stats = ScrapeStats()
+        stats.increment("details_fetched", fetched)
+        stats.increment("details_failed", failed)
+        stats.record_error(TimeoutError())
+        manifest = RunManifest(["extract", "load"])
+        with manifest.stage("extract"):
+            manifest.add_source("busesforsale", stats)
+        manifest.rows = {"inserted": fetched, "updated": 0, "unchanged": 0}
+        manifest.finish("succeeded")
+        return manifest
+
+    def test_totals(self):
+        manifest = self.make_manifest(fetched=9, failed=1)
+        manifest.record_error(ValueError("boom"))
+        totals = manifest.to_dict()["totals"]
+        self.assertEqual(totals["details_fetched"], 9)
+        self.assertEqual(totals["failure_rate"], 0.1)
+        self.assertEqual(totals["rows_inserted"], 9)
+        self.assertEqual(totals["errors"], {"TimeoutError": 1, "ValueError": 1})
+        self.assertEqual(totals["error_count"], 2)
+        self.assertIn("extract", manifest.timings)
+        self.assertIsNotNone(manifest.duration_seconds)
+
+    def test_record_and_compare_runs(self):
+        db_manager = DatabaseManager("sqlite://")
+        try:
+            first = self.make_manifest(fetched=10, failed=0).to_dict()
+            second = self.make_manifest(fetched=8, failed=2).to_dict()
+            db_manager.record_run(first)
+            db_manager.record_run(second)
+            db_manager.record_run(second)
+
+            self.assertEqual([run["run_id"] for run in db_manager.get_runs()],
+                             [second["run_id"], first["run_id"]])
+            self.assertEqual(db_manager.get_run(first["run_id"]), first)
+            self.assertIsNone(db_manager.get_run("unknown"))
+
+            table = format_comparison([first, second])
+            self.assertRegex(table, r"details_fetched\s+10\s+8\s+-2 \(-20\.0%\)")
+
+            output = io.StringIO()
+            with patch("src.database.db_manager.DatabaseManager", return_value=db_manager), redirect_stdout(output):
+                self.assertEqual(main(["compare"]), 0)
+            self.assertIn("failure_rate", output.getvalue())
+        finally:
+            db_manager.engine.dispose()
+
+if __name__ == "__main__":
+    unittest.main()
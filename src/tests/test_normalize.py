@@ -0,0 +1,84 @@
+import importlib.util
+import os
+import sys
+import tempfile
+import unittest
+from decimal import Decimal
+from unittest.mock import patch
+from src.scraper.normalize import (
+    ColumnBatch, STATE_CODES, STATE_REGIONS, airconditioning_option, parse_integer, parse_price, parse_state,
+    region_for_location,
+)
+from src.database.models import USRegion
+
+class TestNormalize(unittest.TestCase):
+    def test_region_table_covers_every_state(self):
+        self.assertEqual(len(STATE_REGIONS), 51)
+        self.assertEqual(set(STATE_CODES.values()), set(STATE_REGIONS))
+        self.assertTrue(set(STATE_REGIONS.values()) <= set(USRegion.__members__))
+
+    def test_locations(self):
+        self.assertEqual(parse_state("missouri"), "Missouri")
+        self.assertEqual(parse_state("St. Louis, MO"), "Missouri")
+        self.assertEqual(parse_state("Charleston West Virginia"), "West Virginia")
+        self.assertEqual(region_for_location("Tennessee"), "SOUTHEAST")
+        self.assertEqual(region_for_location("Ontario"), "OTHER")
+
+    def test_scalar_parsers(self):
+        self.assertEqual(parse_price(45000.0), Decimal("45000"))
+        self.assertEqual(parse_price("$45,000.50"), Decimal("45000.50"))
+        self.assertIsNone(parse_price("Call for price"))
+        self.assertEqual(parse_integer("85,000 mi"), 85000)
+        self.assertIsNone(parse_integer(True))
+        self.assertEqual(airconditioning_option(True), "DASH")
+        self.assertEqual(airconditioning_option("Front & Rear"), "BOTH")
+        self.assertEqual(airconditioning_option(None), "NONE")
+
+    def test_column_batch(self):
+        batch = ColumnBatch([
+            {"title": "A", "year": "2019", "price": "45000.0", "mileage": 85000, "passengers": "14",
+             "location": "St. Louis, MO", "airconditioning": "DASH"},
+            {"title": "B", "year": None, "price": None, "mileage": "n/a", "location": "Yard 3"},
+        ])
+        self.assertEqual(batch.columns["year"], [2019, None])
+        self.assertEqual(batch.columns["price"], [Decimal("45000"), None])
+
+        rows = batch.db_rows()
+        self.assertEqual(rows[0]["price"], "45000")
+        # The scraped location is kept; the state goes to its own column
+        self.assertEqual(rows[0]["location"], "St. Louis, MO")
+        self.assertEqual(rows[0]["state"], "Missouri")
+        self.assertEqual(rows[0]["us_region"], "MIDWEST")
+        self.assertEqual(rows[1]["price"], "0")
+        self.assertEqual(rows[1]["location"], "Yard 3")
+        self.assertIsNone(rows[1]["state"])
+        self.assertEqual(rows[1]["airconditioning"], "NONE")
+
+    @unittest.skipUnless(importlib.util.find_spec("pyarrow"), "pyarrow is not installed")
+    def test_to_parquet_round_trip(self):
+        import pyarrow.parquet as pq
+        rows = [
+            {"title": "A", "year": "2019", "price": "45000.50", "mileage": "85,000 mi", "passengers": "14",
+             "location": "St. Louis, MO", "airconditioning": "Front & Rear"},
+            {"title": "B", "year": None, "price": None, "mileage": None, "passengers": None,
+             "location": "Yard 3", "airconditioning": None},
+        ]
+        batch = ColumnBatch(rows)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "buses.parquet")
+            batch.to_parquet(path)
+            table = pq.read_table(path)
+
+        self.assertEqual(table.num_rows, 2)
+        self.assertEqual(table.to_pydict(), batch.to_columns())
+        self.assertEqual(str(table.schema.field("year").type), "int32")
+        self.assertEqual(str(table.schema.field("price").type), "decimal128(12, 2)")
+
+    def test_to_parquet_without_pyarrow(self):
+        batch = ColumnBatch([{"title": "A", "year": "2019"}])
+        with patch.dict(sys.modules, {"pyarrow": None, "pyarrow.parquet": None}):
+            with self.assertRaisesRegex(RuntimeError, "requires pyarrow"):
+                batch.to_parquet(os.path.join(tempfile.gettempdir(), "unused.parquet"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,64 @@
+import json
+import os
+import pstats
+import tempfile
+import threading
+import time
+import unittest
+from unittest.mock import patch
+from src.profiling import NULL_PROFILER, RunProfiler
+
+def busy(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        sum(range(100))
+
+class TestRunProfiler(unittest.TestCase):
+    def test_writes_profiles(self):
+        profiler = RunProfiler(sample_interval=0.001)
+        profiler.start()
+        with profiler.section("load"):
+            busy(0.05)
+        worker = threading.Thread(target=busy, args=(0.05,))
+        worker.start()
+        worker.join()
+        # Known durations: call i takes i ms, except call 7 which takes a second
+        durations = [1.0 if index == 7 else index / 1000 for index in range(30)]
+        clock = [value for duration in durations for value in (0.0, duration)]
+        with patch("src.profiling.time.perf_counter", side_effect=clock):
+            for index in range(30):
+                with profiler.timed("extract_details", f"http://example.com/{index}", size=index):
+                    pass
+        profiler.stop()
+
+        with tempfile.TemporaryDirectory() as directory:
+            paths = profiler.write(directory)
+            names = sorted(os.path.basename(path) for path in paths)
+            self.assertEqual(names, ["allocations.txt", "load.pstats", "stacks.collapsed", "timings.json"])
+
+            stats = pstats.Stats(os.path.join(directory, "load.pstats"))
+            self.assertTrue(any(function[2] == "busy" for function in stats.stats))
+            with open(os.path.join(directory, "stacks.collapsed"), encoding="utf-8") as stacks_file:
+                self.assertRegex(stacks_file.read(), r"busy \(test_profiling\.py:\d+\) \d+\n")
+            with open(os.path.join(directory, "timings.json"), encoding="utf-8") as timings_file:
+                timings = json.load(timings_file)["extract_details"]
+            self.assertEqual(timings["calls"], 30)
+            slowest = [7] + sorted((index for index in range(30) if index != 7), reverse=True)[:24]
+            self.assertEqual([call["label"] for call in timings["slowest"]],
+                             [f"http://example.com/{index}" for index in slowest])
+            self.assertEqual(timings["slowest"][0]["seconds"], 1.0)
+
+    def test_concurrent_sections_do_not_nest_profilers(self):
+        profiler = RunProfiler(trace_allocations=False)
+        with profiler.section("scrape_all_pages.a"):
+            with profiler.section("scrape_all_pages.b"):
+                pass
+        self.assertEqual(list(profiler.profiles), ["scrape_all_pages.a"])
+
+    def test_null_profiler_is_a_no_op(self):
+        with NULL_PROFILER.section("load"), NULL_PROFILER.timed("extract_details", "url"):
+            pass
+        self.assertFalse(NULL_PROFILER.enabled)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,179 @@
+import json
+import unittest
+from datetime import datetime
+from decimal import Decimal
+from unittest.mock import patch
+from sqlalchemy import event
+from src.database.db_manager import DatabaseManager, price_bucket
+from src.database.models import Bus, BusChange
+from src.database.queries import BusQueries, FacetCache
+from src.database.search_index import query_terms, spec_terms
+
+def sample_buses():
+    return [
+        {"title": "2018 Ford E350", "year": "2018", "make": "Ford", "price": "38000.0", "us_region": "MIDWEST",
+         "airconditioning": "REAR", "wheelchair": "Yes", "source_url": "http://example.com/1"},
+        {"title": "2019 Ford E450", "year": "2019", "make": "Ford", "price": "52000.0", "us_region": "MIDWEST",
+         "airconditioning": "BOTH", "wheelchair": "No", "source_url": "http://example.com/2"},
+        {"title": "2021 Blue Bird Vision", "year": "2021", "make": "Blue Bird", "price": "105000.0",
+         "us_region": "WEST", "airconditioning": "BOTH", "source_url": "http://example.com/3"},
+        {"title": "2015 Chevrolet 4500", "year": "2015", "make": "Chevrolet", "price": "0",
+         "us_region": "SOUTHEAST", "source_url": "http://example.com/4"},
+    ]
+
+class TestBusQueries(unittest.TestCase):
+    def setUp(self):
+        self.db_manager = DatabaseManager("sqlite://")
+        self.db_manager.upsert_buses(sample_buses())
+        self.queries = BusQueries(self.db_manager, cache=FacetCache(), ttl=0)
+
+    def tearDown(self):
+        self.db_manager.engine.dispose()
+
+    def test_search_filters(self):
+        page = self.queries.search(make="Ford", price_min=40000)
+        self.assertEqual([bus.title for bus in page.buses], ["2019 Ford E450"])
+
+        page = self.queries.search(year_min=2016, year_max=2020, region="midwest", airconditioning="REAR")
+        self.assertEqual([bus.title for bus in page.buses], ["2018 Ford E350"])
+
+        with self.assertRaises(ValueError):
+            self.queries.search(region="ATLANTIS")
+
+    def test_range_filters_use_indexes(self):
+        with self.db_manager.engine.connect() as connection:
+            plan = connection.exec_driver_sql(
+                "EXPLAIN QUERY PLAN SELECT id FROM buses WHERE price_amount >= 40000 AND year_number <= 2020"
+            ).all()
+        self.assertRegex(" ".join(row[-1] for row in plan), r"INDEX ix_buses_(price_amount|year_number)")
+
+    def test_search_keyset_pagination(self):
+        first = self.queries.search(limit=3)
+        self.assertEqual(len(first.buses), 3)
+        self.assertIsNotNone(first.next_cursor)
+
+        second = self.queries.search(limit=3, cursor=first.next_cursor)
+        self.assertEqual(len(second.buses), 1)
+        self.assertIsNone(second.next_cursor)
+        titles = [bus.title for bus in first.buses + second.buses]
+        self.assertEqual(len(set(titles)), 4)
+
+    def test_facet_counts_reload_only_after_refresh(self):
+        self.db_manager.refresh_facet_counts()
+        counts = self.queries.facet_counts()
+        self.assertEqual(counts["make"], {"Ford": 2, "Blue Bird": 1, "Chevrolet": 1})
+        self.assertEqual(counts["price"], {"25000-50000": 1, "50000-75000": 1, "100000+": 1})
+        self.assertEqual(counts["us_region"]["MIDWEST"], 2)
+
+        # Unchanged runs cost only the version lookup
+        statements = []
+        event.listen(self.db_manager.engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+        self.queries.facet_counts()
+        self.assertEqual(len(statements), 1)
+
+        self.db_manager.upsert_buses([{"title": "2020 Ford Transit", "make": "Ford",
+                                       "source_url": "http://example.com/5"}])
+        self.assertEqual(self.queries.facet_counts()["make"]["Ford"], 2)
+        self.db_manager.refresh_facet_counts()
+        self.assertEqual(self.queries.facet_counts()["make"]["Ford"], 3)
+
+    def test_facet_counts_reload_after_refresh_in_the_same_second(self):
+        frozen = datetime(2030, 1, 15, 12, 0, 0)
+        with patch("src.database.db_manager.datetime") as clock:
+            clock.utcnow.return_value = frozen
+            self.db_manager.refresh_facet_counts()
+            self.assertEqual(self.queries.facet_counts()["make"]["Ford"], 2)
+            self.db_manager.upsert_buses([{"title": "2020 Ford Transit", "make": "Ford",
+                                           "source_url": "http://example.com/5"}])
+            self.db_manager.refresh_facet_counts()
+        self.assertEqual(self.queries.facet_counts()["make"]["Ford"], 3)
+
+    def test_search_text_ranks_and_updates_incrementally(self):
+        bus_ids = self.db_manager.get_bus_ids([bus["source_url"] for bus in sample_buses()])
+        specs = json.dumps({"Air Conditioning": "Rear", "Capacity": "14"})
+        self.db_manager.replace_bus_children(
+            overviews=[
+                {"bus_id": bus_ids["http://example.com/1"], "mdesc": "Wheelchair lift, low miles.", "specs": specs},
+                {"bus_id": bus_ids["http://example.com/2"], "mdesc": "Diesel shuttle with rear lift."},
+            ],
+            images=[],
+        )
+        self.db_manager.update_search_index(list(bus_ids.values()))
+
+        results = self.queries.search_text("wheelchair lift")
+        self.assertEqual([bus.source_url for bus, _ in results][:2],
+                         ["http://example.com/1", "http://example.com/2"])
+        self.assertGreater(results[0][1], 0)
+        self.assertEqual([bus.title for bus, _ in self.queries.search_text("air_conditioning:rear")],
+                         ["2018 Ford E350"])
+        self.assertEqual(self.queries.search_text("the"), [])
+
+        self.db_manager.upsert_buses([dict(sample_buses()[2], title="2021 Blue Bird Vision Lift")])
+        self.db_manager.update_search_index([bus_ids["http://example.com/3"]])
+        self.assertIn("http://example.com/3", [bus.source_url for bus, _ in self.queries.search_text("lift")])
+
+    def test_spec_tokenization(self):
+        terms = spec_terms(json.dumps({"Air Conditioning": "Rear", "Engine": "6.7L Diesel"}))
+        self.assertIn("air_conditioning:rear", terms)
+        self.assertIn("engine:6.7", terms)
+        self.assertIn("diesel", terms)
+        self.assertEqual(query_terms("Ford capacity:14 the ford"), ["capacity:14", "ford"])
+
+    def test_facet_counts_match_collapsed_search(self):
+        session = self.db_manager.Session()
+        buses = {bus.source_url: bus for bus in session.query(Bus)}
+        # The two Ford listings are one bus; the second is the one shown
+        shown = buses["http://example.com/2"].id
+        buses["http://example.com/1"].cluster_id = buses["http://example.com/2"].cluster_id = shown
+        session.commit()
+        session.close()
+        self.db_manager.refresh_facet_counts()
+
+        counts = self.queries.facet_counts()
+        self.assertEqual(counts["make"]["Ford"], len(self.queries.search(make="Ford").buses))
+        self.assertEqual(counts["make"]["Ford"], 1)
+        self.assertEqual(sum(counts["us_region"].values()), len(self.queries.search().buses))
+
+    def test_price_history_and_trends(self):
+        self.db_manager.upsert_buses([dict(sample_buses()[0], price="36000")])
+
+        history = self.queries.price_history("http://example.com/1")
+        self.assertEqual([price for _, price in history], [Decimal("38000.0"), Decimal("36000")])
+
+        trends = self.queries.price_trends(period="month", make="Ford")
+        self.assertEqual(len(trends), 1)
+        # Two Ford buses; one of them changed its price once
+        self.assertEqual(trends[0]["listings"], 2)
+        self.assertEqual(trends[0]["changes"], 3)
+        self.assertEqual(trends[0]["drops"], 1)
+        self.assertEqual(trends[0]["median_price"], Decimal("38000.0"))
+        with self.assertRaises(ValueError):
+            self.queries.price_trends(period="decade")
+
+    def test_price_trends_ignore_unchanged_prices(self):
+        session = self.db_manager.Session()
+        bus = session.query(Bus).filter_by(source_url="http://example.com/1").one()
+        changed_at = datetime(2030, 1, 15)
+        session.add_all([
+            BusChange(bus_id=bus.id, source_url=bus.source_url, field="price", old_value="38000.0",
+                      new_value="38000", changed_at=changed_at),
+            BusChange(bus_id=bus.id, source_url=bus.source_url, field="price", old_value="call",
+                      new_value="40000", changed_at=changed_at),
+        ])
+        session.commit()
+        session.close()
+
+        trends = self.queries.price_trends(period="month", since=changed_at)
+        self.assertEqual(len(trends), 1)
+        self.assertEqual(trends[0]["changes"], 2)
+        self.assertEqual((trends[0]["drops"], trends[0]["increases"]), (0, 0))
+
+    def test_price_bucket(self):
+        self.assertEqual(price_bucket("24999.99"), "0-25000")
+        self.assertEqual(price_bucket("100000"), "100000+")
+        self.assertIsNone(price_bucket("0"))
+        self.assertIsNone(price_bucket("call"))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,113 @@
+import time
+import unittest
+from unittest.mock import MagicMock
+from src.scraper.breaker import CircuitOpenError
+from src.scraper.records import BusRecord
+from src.scraper.scheduler import RateLimiter, SourceScheduler, SourcesFailedError, get_source_adapter
+from src.scraper.sources.base import SourceAdapter
+from src.tests.test_scraper import mock_response
+
+class FakeAdapter(SourceAdapter):
+    """Adapter serving one listing page with two listings from an in-memory site."""
+
+    name = "fake"
+    default_base_url = "https://dealer.example.com"
+
+    def listing_url(self, page_number):
+        return f"{self.base_url}/inventory/{page_number}"
+
+    def parse_total_pages(self, soup):
+        return 1
+
+    def parse_listing(self, soup):
+        return [{"title": f"Bus {i}", "price": 1000.0 * i, "source_url": f"{self.base_url}/bus/{i}"}
+                for i in (1, 2)]
+
+    def extract_details(self, soup):
+        return {"specs": {"make": soup.get_text(strip=True)}}
+
+    def build_record(self, entry, details):
+        return BusRecord(title=entry["title"], price=str(entry["price"]), source_url=entry["source_url"],
+                         make=details["specs"]["make"])
+
+class OtherFakeAdapter(FakeAdapter):
+    name = "other_fake"
+    default_base_url = "https://other.example.com"
+
+class TestSourceScheduler(unittest.TestCase):
+    def test_unknown_source(self):
+        """Test that unknown source names are rejected."""
+        with self.assertRaises(ValueError):
+            get_source_adapter("unknown")
+
+    def test_run_merges_sources(self):
+        """Test that every source is scraped and tagged with its name."""
+        scheduler = SourceScheduler(max_workers=2, requests_per_second=0)
+        for adapter in (FakeAdapter(), OtherFakeAdapter()):
+            scraper = scheduler.add_source(adapter)
+            scraper.http = MagicMock()
+            scraper.http.get.return_value = mock_response("<p>Ford</p>")
+
+        buses = scheduler.run()
+
+        self.assertEqual(len(buses), 4)
+        self.assertEqual(sorted({bus.source for bus in buses}), ["fake", "other_fake"])
+        self.assertTrue(all(bus.make == "Ford" for bus in buses))
+
+    def test_run_reports_failed_sources(self):
+        """Test that a failing source is reported, and that a run where every source fails raises."""
+        scheduler = SourceScheduler(max_workers=2, requests_per_second=0)
+        working = scheduler.add_source(FakeAdapter())
+        working.http = MagicMock()
+        working.http.get.return_value = mock_response("<p>Ford</p>")
+        failing = scheduler.add_source(OtherFakeAdapter())
+        failing.scrape_all_pages = MagicMock(side_effect=RuntimeError("listing markup changed"))
+
+        buses = scheduler.run()
+
+        self.assertEqual(len(buses), 2)
+        self.assertEqual(list(scheduler.failures), ["other_fake"])
+        self.assertEqual((working.status, failing.status), ("completed", "failed"))
+
+        working.scrape_all_pages = MagicMock(side_effect=RuntimeError("connection reset"))
+        with self.assertRaises(SourcesFailedError):
+            scheduler.run()
+
+    def test_sources_on_one_host_share_pool_and_limiter(self):
+        """Test that connection pools and rate limits are kept per host."""
+        scheduler = SourceScheduler()
+        first = scheduler.add_source(FakeAdapter())
+        second = scheduler.add_source(FakeAdapter("https://dealer.example.com/used"))
+        third = scheduler.add_source(OtherFakeAdapter())
+        self.assertIs(first.http, second.http)
+        self.assertIs(first.rate_limiter, second.rate_limiter)
+        self.assertIsNot(first.http, third.http)
+
+    def test_get_uses_host_clients(self):
+        """Test that requests outside the scrapers go through their host's session, limiter and breaker."""
+        scheduler = SourceScheduler(requests_per_second=0, max_consecutive_failures=1)
+        scraper = scheduler.add_source(FakeAdapter())
+        scraper.http.get = MagicMock(return_value=mock_response("image"))
+        scraper.rate_limiter.wait = MagicMock()
+
+        scheduler.get("https://dealer.example.com/uploads/bus.jpg", stream=True)
+
+        scraper.http.get.assert_called_once_with("https://dealer.example.com/uploads/bus.jpg", stream=True)
+        scraper.rate_limiter.wait.assert_called_once()
+        self.assertEqual(scraper.breaker.requests, 1)
+
+        scraper.breaker.record_failure()
+        with self.assertRaises(CircuitOpenError):
+            scheduler.get("https://dealer.example.com/uploads/other.jpg")
+        self.assertEqual(scraper.http.get.call_count, 1)
+
+    def test_rate_limiter_spaces_requests(self):
+        """Test that the rate limiter enforces the minimum interval between requests."""
+        limiter = RateLimiter(requests_per_second=50)
+        start = time.monotonic()
+        for _ in range(5):
+            limiter.wait()
+        self.assertGreaterEqual(time.monotonic() - start, 4 / 50 - 0.005)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,7 +1,44 @@
 import unittest
+from unittest.mock import MagicMock, patch
+from bs4 import BeautifulSoup
 from src.scraper.main_scraper import BusScraper
+from src.scraper.records import BusRecord
 from config.settings import Settings
 
+LISTING_HTML = """
+<div class="listing-list-loop stm-listing-directory-list-loop">
+  <div class="title heading-font"><a href="https://www.centralstatesbus.com/listings/2019-ford-e450/">2019 Ford E450</a></div>
+  <div class="price"><div class="heading-font">$45,000</div></div>
+</div>
+"""
+
+DETAIL_HTML = """
+<div class="vc_tta-panel" id="Options-1"><p>Great condition bus.</p></div>
+<table>
+  <tr><td class="t-label">Make</td><td class="t-value">Ford</td></tr>
+  <tr><td class="t-label">Model</td><td class="t-value">E450 Diesel 6.7L</td></tr>
+  <tr><td class="t-label">Year</td><td class="t-value">2019</td></tr>
+  <tr><td class="t-label">Mileage</td><td class="t-value">85,000 mi</td></tr>
+  <tr><td class="t-label">Capacity</td><td class="t-value">14</td></tr>
+  <tr><td class="t-label">Air Conditioning</td><td class="t-value">Yes</td></tr>
+  <tr><td class="t-label">Location</td><td class="t-value">Missouri</td></tr>
+</table>
+<div class="stm-big-car-gallery"><img src="https://example.com/bus-1.jpg" alt="Front"></div>
+<div class="widgets cols_3 clearfix">
+  <aside class="extendedwopts-md-center widget widget_text">
+    <div class="widget-title"><h6>Missouri</h6></div>
+    <a href="tel:6365551234">(636) 555-1234</a>
+  </aside>
+</div>
+"""
+
+def mock_response(text):
+    response = MagicMock()
+    response.text = text
+    response.content = text.encode()
+    response.raise_for_status.return_value = None
+    return response
+
 class TestBusScraper(unittest.TestCase):
     def setUp(self):
         """Set up the test case with a scraper instance."""
@@ -19,7 +56,41 @@ class TestBusScraper(unittest.TestCase):
         buses = self.scraper.parse_data(html)
         self.assertIsInstance(buses, list, "Parsed data should be a list.")
         self.assertTrue(len(buses) > 0, "There should be at least one bus parsed.")
-        self.assertTrue(all(hasattr(bus, 'name') for bus in buses), "Each bus should have a 'name' attribute.")
+        self.assertTrue(all(hasattr(bus, 'title') for bus in buses), "Each bus should have a 'title' attribute.")
+
+    def test_parse_data_offline(self):
+        """Test that listing and detail pages are parsed into records without network access."""
+        http_session = MagicMock()
+        http_session.get.return_value = mock_response(DETAIL_HTML)
+        scraper = BusScraper(self.settings.BASE_URL, http_session=http_session)
+        buses = scraper.parse_data(LISTING_HTML)
+
+        self.assertEqual(len(buses), 1)
+        bus = buses[0]
+        self.assertIsInstance(bus, BusRecord)
+        self.assertEqual(bus.source, "central_states")
+        self.assertEqual(bus.title, "2019 Ford E450")
+        self.assertEqual(bus.make, "Ford")
+        self.assertEqual(bus.year, "2019")
+        self.assertEqual(bus.mileage, 85000)
+        self.assertEqual(bus.airconditioning, "DASH")
+        self.assertEqual(bus.contact_phone, "636555-1234")
+        self.assertEqual(bus.overview.mdesc, "Great condition bus.")
+        self.assertEqual([image.url for image in bus.images], ["https://example.com/bus-1.jpg"])
+
+    def test_contact_directory_built_once(self):
+        """Test that the contact widgets are indexed once and reused across pages."""
+        adapter = self.scraper.adapter
+        with patch.object(adapter, "build_contact_directory", wraps=adapter.build_contact_directory) as build_mock:
+            for _ in range(3):
+                soup = BeautifulSoup(DETAIL_HTML, "html.parser")
+                self.assertEqual(adapter.extract_contact_phone(soup, "missouri"), "636555-1234")
+            self.assertIsNone(adapter.extract_contact_phone(soup, "Kansas"))
+            build_mock.assert_called_once()
+
+        changed = DETAIL_HTML.replace("(636) 555-1234", "(636) 555-9999")
+        soup = BeautifulSoup(changed, "html.parser")
+        self.assertEqual(adapter.extract_contact_phone(soup, "Missouri"), "636555-9999")
 
 if __name__ == "__main__":
     unittest.main()
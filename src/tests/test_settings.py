@@ -0,0 +1,28 @@
+import os
+import unittest
+from unittest.mock import patch
+from config.settings import Settings
+
+class TestSettingsValidate(unittest.TestCase):
+    def test_export_from_database_requires_database_variables(self):
+        """An export without extract or load reads the database, so its variables are checked up front."""
+        with patch.dict(os.environ, {"S3_BUCKET": "bucket"}, clear=True):
+            with self.assertRaises(RuntimeError) as raised:
+                Settings().validate(["export"])
+            self.assertIn("DB_HOST", str(raised.exception))
+            Settings().validate(["export"], has_data=True)
+            Settings().validate(["extract", "transform", "export"])
+        with patch.dict(os.environ, {"S3_BUCKET": "bucket", "DATABASE_URL": "sqlite://"}, clear=True):
+            Settings().validate(["export"])
+
+    def test_validate_reads_instance_overrides(self):
+        """The image pipeline needs a bucket unless this run's settings switched it off."""
+        with patch.dict(os.environ, {}, clear=True), patch.object(Settings, "IMAGE_PIPELINE_ENABLED", True):
+            with self.assertRaises(RuntimeError):
+                Settings().validate(["extract", "transform"])
+            settings = Settings()
+            settings.IMAGE_PIPELINE_ENABLED = False
+            settings.validate(["extract", "transform"])
+
+if __name__ == "__main__":
+    unittest.main()
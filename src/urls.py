@@ -0,0 +1,31 @@
+import re
+from typing import Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+# WordPress stores resized variants as "<name>-<width>x<height>.<ext>"
+SIZE_SUFFIX_PATTERN = re.compile(r"-(\d+)x(\d+)(?=\.[A-Za-z0-9]+$)")
+
+def canonicalize_image_url(url: str) -> Tuple[str, Optional[int]]:
+    """
+    Canonicalize an image URL and report the size of the variant it points to.
+
+    The scheme is normalized to https, the host is lowercased, query strings and
+    fragments are dropped and the WordPress size suffix is removed, so every size of
+    the same asset maps to one canonical URL.
+
+    Args:
+        url (str): Image URL as found in the gallery.
+
+    Returns:
+        Tuple[str, Optional[int]]: Canonical URL and the variant's pixel area, or None
+            for the original (unsuffixed) file.
+    """
+    parts = urlsplit(url.strip())
+    path = parts.path
+    area = None
+    match = SIZE_SUFFIX_PATTERN.search(path)
+    if match:
+        area = int(match.group(1)) * int(match.group(2))
+        path = path[:match.start()] + path[match.end():]
+    canonical = urlunsplit(("https", parts.netloc.lower(), path, "", ""))
+    return canonical, area